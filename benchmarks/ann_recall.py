@@ -0,0 +1,161 @@
+"""
+Recall and speed of the LSH neighbour index against the exact top-K path
+Builds both indexes on synthetic clustered sparse vectors (or a movies CSV) and compares them
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, random as sparse_random
+from sklearn.preprocessing import normalize
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender.ann import LSHIndex
+from recommender.content_based import ContentBasedRecommender
+from recommender.similarity import lsh_top_k_similarity, top_k_cosine_similarity
+
+
+def make_vectors(n_rows: int, n_features: int, n_clusters: int, seed: int) -> csr_matrix:
+    """
+    Generate sparse TF-IDF-like vectors around random sparse cluster centres.
+    
+    Args:
+        n_rows: Number of vectors
+        n_features: Number of features
+        n_clusters: Number of cluster centres
+        seed: Random seed
+    
+    Returns:
+        CSR matrix of shape (n_rows, n_features)
+    """
+    rng = np.random.default_rng(seed)
+    centres = sparse_random(n_clusters, n_features, density=0.01, random_state=rng, format='csr')
+    noise = sparse_random(n_rows, n_features, density=0.005, random_state=rng, format='csr')
+    labels = rng.integers(0, n_clusters, n_rows)
+    return (2 * centres[labels] + noise).tocsr()
+
+
+def catalog_vectors(filepath: str) -> csr_matrix:
+    """Get the TF-IDF feature vectors the content-based model builds for a movies CSV."""
+    return ContentBasedRecommender(pd.read_csv(filepath)).tfidf_matrix
+
+
+def recall_at_n(exact: csr_matrix, approximate: csr_matrix) -> float:
+    """Fraction of the exact off-diagonal neighbours the approximate index also holds."""
+    exact, approximate = exact.tocoo(), approximate.tocoo()
+    n_rows = np.int64(exact.shape[0])
+    exact_pairs = exact.row[exact.row != exact.col] * n_rows + exact.col[exact.row != exact.col]
+    found_pairs = approximate.row.astype(np.int64) * n_rows + approximate.col
+    if len(exact_pairs) == 0:
+        return 1.0
+    return float(np.isin(exact_pairs, found_pairs).mean())
+
+
+def query_latency_ms(search, n_queries: int) -> dict:
+    """Time single-query searches and summarize the latencies in milliseconds."""
+    timings = []
+    for query in range(n_queries):
+        start = time.perf_counter()
+        search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50': round(float(np.percentile(timings, 50)), 3),
+        'p99': round(float(np.percentile(timings, 99)), 3)
+    }
+
+
+def run(args) -> dict:
+    """Run the benchmark and return the results."""
+    if args.movies:
+        vectors = catalog_vectors(args.movies)
+    else:
+        vectors = make_vectors(args.rows, args.features, max(1, args.rows // args.cluster_size), args.seed)
+    normalized = normalize(csr_matrix(vectors, dtype=np.float64))
+    normalized_t = normalized.T.tocsc()
+    n_queries = min(args.queries, normalized.shape[0])
+    
+    start = time.perf_counter()
+    exact = top_k_cosine_similarity(vectors, args.neighbors, n_jobs=args.jobs)
+    exact_seconds = time.perf_counter() - start
+    
+    results = {
+        'rows': normalized.shape[0],
+        'features': normalized.shape[1],
+        'neighbors': args.neighbors,
+        'exact': {
+            'build_seconds': round(exact_seconds, 3),
+            'query_ms': query_latency_ms(lambda q: (normalized[q] @ normalized_t).toarray(), n_queries)
+        },
+        'lsh': []
+    }
+    
+    for n_tables in args.tables:
+        for window in args.windows:
+            start = time.perf_counter()
+            approximate = lsh_top_k_similarity(
+                vectors, args.neighbors, n_tables=n_tables, window=window, seed=args.seed, n_jobs=args.jobs
+            )
+            build_seconds = time.perf_counter() - start
+            
+            index = LSHIndex(vectors, n_tables=n_tables, window=window, seed=args.seed)
+            results['lsh'].append({
+                'n_tables': n_tables,
+                'window': window,
+                'build_seconds': round(build_seconds, 3),
+                'speedup': round(exact_seconds / build_seconds, 2),
+                'recall': round(recall_at_n(exact, approximate), 4),
+                'query_ms': query_latency_ms(lambda q: index.search(normalized[q], args.neighbors), n_queries)
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the LSH neighbour index with the exact top-K path',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmarks/ann_recall.py --rows 20000
+  python benchmarks/ann_recall.py --tables 4 8 16 --windows 128 256 --output ann.json
+  python benchmarks/ann_recall.py --movies data/movies.csv
+        """
+    )
+    parser.add_argument('--rows', type=int, default=10000, help='Number of synthetic vectors (default: 10000)')
+    parser.add_argument('--features', type=int, default=5000, help='Number of synthetic features (default: 5000)')
+    parser.add_argument('--cluster-size', type=int, default=50, help='Average synthetic cluster size (default: 50)')
+    parser.add_argument('--movies', help='Benchmark the TF-IDF vectors of this movies CSV instead')
+    parser.add_argument('--neighbors', type=int, default=10, help='Neighbours per row, N in recall@N (default: 10)')
+    parser.add_argument('--tables', type=int, nargs='+', default=[4, 8, 16], help='LSH table counts to try')
+    parser.add_argument('--windows', type=int, nargs='+', default=[128, 256], help='LSH window sizes to try')
+    parser.add_argument('--queries', type=int, default=200, help='Single queries timed per index (default: 200)')
+    parser.add_argument('--jobs', type=int, default=1, help='Threads building each index (default: 1)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+    
+    results = run(args)
+    
+    exact = results['exact']
+    print(f"{results['rows']} rows x {results['features']} features, recall@{results['neighbors']}")
+    print(f"{'index':<16}{'build s':>10}{'speedup':>10}{'recall':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    print(f"{'exact':<16}{exact['build_seconds']:>10.2f}{1:>10.2f}{1:>10.3f}"
+          f"{exact['query_ms']['p50']:>10.2f}{exact['query_ms']['p99']:>10.2f}")
+    for row in results['lsh']:
+        name = f"lsh {row['n_tables']}x{row['window']}"
+        print(f"{name:<16}{row['build_seconds']:>10.2f}{row['speedup']:>10.2f}{row['recall']:>10.3f}"
+              f"{row['query_ms']['p50']:>10.2f}{row['query_ms']['p99']:>10.2f}")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
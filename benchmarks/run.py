@@ -0,0 +1,340 @@
+"""
+Benchmark suite for the recommenders at synthetic scale
+Times model builds, peak memory, single-query latency and batch throughput, and writes comparable JSON results
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_dataset, write_dataset
+from recommender.collaborative import CollaborativeFilteringRecommender
+from recommender.content_based import ContentBasedRecommender
+
+
+# (movies, ratings, users) of each preset scale
+SCALES = {
+    'small': (2000, 100_000, 5_000),
+    'medium': (20_000, 1_000_000, 50_000),
+    'large': (100_000, 10_000_000, 500_000)
+}
+METHODS = ('content', 'user', 'item', 'mf', 'engine')
+
+
+def measure(function: Callable, trace_memory: bool = True) -> Tuple[object, float, Optional[float]]:
+    """
+    Run a function once.
+    
+    Args:
+        function: Function to run
+        trace_memory: Whether to track the peak of Python and NumPy allocations
+    
+    Returns:
+        Tuple of (result, elapsed seconds, peak traced memory in MB or None)
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = function()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def latency(function: Callable, arguments: np.ndarray) -> Dict[str, float]:
+    """
+    Time one call per argument.
+    
+    Args:
+        function: Function of one argument
+        arguments: Arguments to call it with
+    
+    Returns:
+        Dictionary with p50, p99 and mean latency in milliseconds
+    """
+    timings = np.empty(len(arguments))
+    for i, argument in enumerate(arguments.tolist()):
+        start = time.perf_counter()
+        function(argument)
+        timings[i] = time.perf_counter() - start
+    timings *= 1000
+    return {
+        'p50': round(float(np.percentile(timings, 50)), 4),
+        'p99': round(float(np.percentile(timings, 99)), 4),
+        'mean': round(float(timings.mean()), 4)
+    }
+
+
+def throughput(function: Callable, arguments: np.ndarray) -> Dict[str, float]:
+    """
+    Time one batch call over all arguments.
+    
+    Args:
+        function: Function taking an array of arguments
+        arguments: Batch of arguments
+    
+    Returns:
+        Dictionary with size, seconds and per_second
+    """
+    start = time.perf_counter()
+    function(arguments)
+    elapsed = time.perf_counter() - start
+    return {
+        'size': len(arguments),
+        'seconds': round(elapsed, 4),
+        'per_second': round(len(arguments) / elapsed, 1) if elapsed else None
+    }
+
+
+def bench_content(args, movies_df, ratings_path, movie_sample, user_sample) -> dict:
+    """Benchmark ContentBasedRecommender."""
+    model, build_seconds, peak = measure(
+        lambda: ContentBasedRecommender(movies_df, n_neighbors=args.neighbors, n_jobs=args.jobs),
+        args.memory
+    )
+    return {
+        'build_seconds': round(build_seconds, 3),
+        'peak_memory_mb': round(peak, 1) if peak is not None else None,
+        'latency_ms': {
+            'recommend_by_movie': latency(lambda movie_id: model.recommend_by_movie(movie_id, 10), movie_sample)
+        },
+        'batch': throughput(lambda ids: model.get_similar_movie_ids_batch(ids, 10), movie_sample)
+    }
+
+
+def bench_collaborative(method: str):
+    """Get the benchmark of one CollaborativeFilteringRecommender method."""
+    def bench(args, movies_df, ratings_path, movie_sample, user_sample) -> dict:
+        model, build_seconds, peak = measure(
+            lambda: CollaborativeFilteringRecommender.from_ratings_file(
+                ratings_path,
+                movies_df,
+                method=method,
+                n_neighbors=args.neighbors if method != 'mf' else None,
+                n_jobs=args.jobs
+            ),
+            args.memory
+        )
+        return {
+            'build_seconds': round(build_seconds, 3),
+            'peak_memory_mb': round(peak, 1) if peak is not None else None,
+            'latency_ms': {
+                'recommend_for_user': latency(lambda user_id: model.recommend_for_user(user_id, 10), user_sample)
+            },
+            'batch': throughput(lambda ids: model.recommend_for_users(ids, 10), user_sample)
+        }
+    return bench
+
+
+def bench_engine(args, movies_df, ratings_path, movie_sample, user_sample) -> dict:
+    """
+    Benchmark app.RecommendationEngine, as configured by the app's environment
+    variables, over the synthetic files (models are saved to a temporary MODEL_DIR).
+    """
+    data_dir = os.path.dirname(ratings_path)
+    with tempfile.TemporaryDirectory() as model_dir:
+        os.environ.update({
+            'MOVIE_CATALOG': os.path.join(data_dir, 'movies.csv'),
+            'RATINGS_SOURCE': ratings_path,
+            'MODEL_DIR': model_dir,
+            'CF_METHOD': args.cf_method,
+            'BUILD_JOBS': str(args.jobs),
+            'WARM_UP': ''
+        })
+        app = importlib.reload(sys.modules['app']) if 'app' in sys.modules else importlib.import_module('app')
+        _, build_seconds, peak = measure(lambda: app.warm_up(app.models), args.memory)
+        engine = app.engine
+        titles = movies_df['title'].to_numpy()[np.searchsorted(movies_df['movieId'].to_numpy(), movie_sample)]
+        prefixes = np.asarray([title.split()[0][:4] for title in titles])
+        
+        return {
+            'build_seconds': round(build_seconds, 3),
+            'peak_memory_mb': round(peak, 1) if peak is not None else None,
+            'latency_ms': {
+                'get_similar_movies': latency(lambda movie_id: engine.get_similar_movies(movie_id, 10), movie_sample),
+                'recommend_for_users': latency(lambda user_id: engine.recommend_for_users([user_id], 10), user_sample),
+                'search_movies': latency(lambda query: engine.search_movies(query, 10), prefixes)
+            },
+            'batch': throughput(lambda ids: engine.get_similar_movies_batch(ids, 10), movie_sample)
+        }
+
+
+BENCHMARKS = {
+    'content': bench_content,
+    'user': bench_collaborative('user'),
+    'item': bench_collaborative('item'),
+    'mf': bench_collaborative('mf'),
+    'engine': bench_engine
+}
+
+
+def git_commit() -> Optional[str]:
+    """Get the commit of the working tree, if it is a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    """Generate (or reuse) the dataset and run the selected benchmarks."""
+    n_movies, n_ratings, n_users = SCALES[args.scale]
+    n_movies = args.movies or n_movies
+    n_ratings = args.ratings or n_ratings
+    n_users = args.users or n_users
+    
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='movie-benchmark-')
+    movies_path = os.path.join(data_dir, 'movies.csv')
+    ratings_path = os.path.join(data_dir, 'ratings.csv')
+    start = time.perf_counter()
+    if not (args.data_dir and os.path.exists(movies_path) and os.path.exists(ratings_path)):
+        print(f"Generating {n_movies} movies and {n_ratings} ratings from {n_users} users in {data_dir}...")
+        write_dataset(data_dir, *generate_dataset(n_movies, n_ratings, n_users, args.seed))
+    generate_seconds = time.perf_counter() - start
+    
+    movies_df = pd.read_csv(movies_path)
+    rated = pd.read_csv(ratings_path, usecols=['userId'])['userId']
+    rng = np.random.default_rng(args.seed)
+    movie_sample = rng.choice(movies_df['movieId'].to_numpy(), args.queries)
+    user_sample = rng.choice(rated.unique(), args.queries)
+    
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {
+            'scale': args.scale,
+            'neighbors': args.neighbors,
+            'jobs': args.jobs,
+            'queries': args.queries,
+            'cf_method': args.cf_method,
+            'seed': args.seed
+        },
+        'dataset': {
+            'movies': len(movies_df),
+            'ratings': int(len(rated)),
+            'users': int(rated.nunique()),
+            'generate_seconds': round(generate_seconds, 3)
+        },
+        'results': []
+    }
+    
+    for method in args.methods:
+        print(f"Benchmarking {method}...")
+        result = BENCHMARKS[method](args, movies_df, ratings_path, movie_sample, user_sample)
+        results['results'].append({'method': method, **result})
+    return results
+
+
+def print_results(results: dict, baseline: Optional[dict] = None) -> None:
+    """Print a results table, with ratios against a baseline run if given."""
+    dataset = results['dataset']
+    print(f"\n{dataset['movies']} movies, {dataset['ratings']} ratings, {dataset['users']} users "
+          f"(commit {results['meta']['commit']})")
+    previous = {row['method']: row for row in baseline['results']} if baseline else {}
+    
+    print(f"{'method':<8} {'query':<22} {'build s':>9} {'peak MB':>9} {'p50 ms':>9} {'p99 ms':>9} {'batch/s':>10}")
+    for row in results['results']:
+        for query, timings in row['latency_ms'].items():
+            peak = row['peak_memory_mb']
+            print(f"{row['method']:<8} {query:<22} {row['build_seconds']:>9.3f} "
+                  f"{peak if peak is not None else float('nan'):>9.1f} {timings['p50']:>9.3f} {timings['p99']:>9.3f} "
+                  f"{row['batch']['per_second'] or float('nan'):>10.1f}")
+            old = previous.get(row['method'])
+            if old and query in old['latency_ms']:
+                # Ratio new / old: below 1 is faster (or smaller) than the baseline
+                ratios = [
+                    row['build_seconds'] / old['build_seconds'] if old['build_seconds'] else float('nan'),
+                    peak / old['peak_memory_mb'] if peak and old['peak_memory_mb'] else float('nan'),
+                    timings['p50'] / old['latency_ms'][query]['p50'],
+                    timings['p99'] / old['latency_ms'][query]['p99'],
+                    (old['batch']['per_second'] or float('nan')) / (row['batch']['per_second'] or float('nan'))
+                ]
+                print(f"{'':<8} {'  vs ' + str(baseline['meta']['commit']):<22} "
+                      + ' '.join(f"{ratio:>8.2f}x" for ratio in ratios[:4])
+                      + f" {ratios[4]:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark model builds and query latency on synthetic data',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmarks/run.py --scale small
+  python benchmarks/run.py --scale medium --methods content item --output benchmarks/results/medium.json
+  python benchmarks/run.py --scale medium --compare benchmarks/results/medium.json
+  python benchmarks/run.py --movies 100000 --ratings 10000000 --users 500000 --data-dir data/large --methods item mf
+
+Ratios printed by --compare are new / baseline, so below 1 means faster
+or smaller (batch ratios are baseline / new throughput).
+        """
+    )
+    parser.add_argument('--scale', choices=list(SCALES), default='small', help='Preset dataset size (default: small)')
+    parser.add_argument('--movies', type=int, help='Number of movies (overrides --scale)')
+    parser.add_argument('--ratings', type=int, help='Number of ratings (overrides --scale)')
+    parser.add_argument('--users', type=int, help='Number of users (overrides --scale)')
+    parser.add_argument('--data-dir', help='Reuse (or write) the synthetic dataset in this directory')
+    parser.add_argument('--methods', nargs='+', choices=list(METHODS), default=list(METHODS),
+                        help='Recommenders to benchmark (default: all)')
+    parser.add_argument('--neighbors', type=int, default=50,
+                        help='Top-K neighbours kept per movie/user by the content, user and item models (default: 50)')
+    parser.add_argument('--cf-method', choices=['user', 'item', 'mf'], default='item',
+                        help='Collaborative method served by the engine benchmark (default: item)')
+    parser.add_argument('--queries', type=int, default=200, help='Single queries timed per method (default: 200)')
+    parser.add_argument('--jobs', type=int, default=1, help='Threads building similarity matrices (default: 1)')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='Skip peak memory tracking (tracemalloc slows builds down)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Print ratios against the results of an earlier run (JSON file)')
+    args = parser.parse_args()
+    
+    results = run(args)
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Synthetic movies.csv / ratings.csv generator for benchmarks
+Movie popularity and user activity follow power laws, like real rating data
+"""
+
+import argparse
+import os
+import time
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+GENRES = [
+    'Action', 'Adventure', 'Biography', 'Comedy', 'Crime', 'Drama', 'Epic', 'Family', 'Fantasy', 'History',
+    'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Spy', 'Thriller', 'War'
+]
+LANGUAGES = ['Hindi', 'Telugu', 'Tamil', 'Kannada', 'Malayalam']
+TITLE_WORDS = [
+    'Dil', 'Raja', 'Pyaar', 'Dost', 'Kahani', 'Safar', 'Zindagi', 'Toofan', 'Sapna', 'Jung', 'Sher', 'Rani',
+    'Mission', 'Express', 'Returns', 'Chapter', 'Rising', 'Night', 'Gold', 'Empire', 'Shadow', 'Hero', 'Tiger',
+    'Monsoon', 'Saga', 'Code', 'Legend', 'Bandit', 'Street', 'Dreams', 'Fire', 'Storm'
+]
+
+
+def power_law_weights(n: int, exponent: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Get sampling probabilities proportional to 1 / rank^exponent.
+    
+    Ranks are shuffled, so popularity is not tied to ID order.
+    
+    Args:
+        n: Number of items
+        exponent: Power-law exponent (0 = uniform)
+        rng: Random generator
+    
+    Returns:
+        Probabilities summing to 1
+    """
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def generate_movies(n_movies: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a movies table in the movies.csv schema.
+    
+    Genre frequencies and director filmographies are skewed like the real
+    catalog: a few genres and directors account for most movies.
+    
+    Args:
+        n_movies: Number of movies
+        seed: Random seed
+    
+    Returns:
+        DataFrame with columns: movieId, title, genres, imdb_rating, year, director, language
+    """
+    rng = np.random.default_rng(seed)
+    genre_weights = power_law_weights(len(GENRES), 1.0, rng)
+    n_genres = rng.integers(1, 4, n_movies)
+    genres = [
+        '|'.join(np.asarray(GENRES)[rng.choice(len(GENRES), count, replace=False, p=genre_weights)])
+        for count in n_genres
+    ]
+    
+    words = np.asarray(TITLE_WORDS)[rng.integers(0, len(TITLE_WORDS), (n_movies, 2))]
+    titles = [f"{first} {second} {movie_id}" for movie_id, (first, second) in enumerate(words, 1)]
+    
+    n_directors = max(1, n_movies // 5)
+    directors = rng.choice(n_directors, n_movies, p=power_law_weights(n_directors, 1.0, rng))
+    
+    return pd.DataFrame({
+        'movieId': np.arange(1, n_movies + 1),
+        'title': titles,
+        'genres': genres,
+        'imdb_rating': np.round(np.clip(rng.normal(6.5, 1.2, n_movies), 1.0, 9.9), 1),
+        'year': rng.integers(1970, 2025, n_movies),
+        'director': [f"Director {director + 1}" for director in directors],
+        'language': np.asarray(LANGUAGES)[rng.choice(len(LANGUAGES), n_movies, p=[0.8, 0.08, 0.06, 0.04, 0.02])]
+    })
+
+
+def generate_ratings(
+    movies_df: pd.DataFrame,
+    n_ratings: int,
+    n_users: int,
+    popularity_exponent: float = 1.0,
+    activity_exponent: float = 0.8,
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Generate a ratings table in the ratings.csv schema.
+    
+    Movies are drawn with power-law popularity and users with power-law
+    activity; a (user, movie) pair is rated at most once, so slightly fewer
+    than n_ratings rows can come back when the sample is dense. Ratings
+    follow the movie's IMDb rating plus a per-user bias and noise, on the
+    0.5 - 5 half-star scale.
+    
+    Args:
+        movies_df: Movies table (e.g. from generate_movies)
+        n_ratings: Number of ratings to draw
+        n_users: Number of users
+        popularity_exponent: Power-law exponent of movie popularity
+        activity_exponent: Power-law exponent of user activity
+        seed: Random seed
+    
+    Returns:
+        DataFrame with columns: userId, movieId, rating, timestamp
+    """
+    rng = np.random.default_rng(seed + 1)
+    movie_ids = movies_df['movieId'].to_numpy(dtype=np.int64)
+    n_movies = len(movie_ids)
+    
+    movies = rng.choice(n_movies, n_ratings, p=power_law_weights(n_movies, popularity_exponent, rng))
+    users = rng.choice(n_users, n_ratings, p=power_law_weights(n_users, activity_exponent, rng))
+    
+    # Keep the first draw of each (user, movie) pair
+    _, first = np.unique(users.astype(np.int64) * n_movies + movies, return_index=True)
+    first.sort()
+    users, movies = users[first], movies[first]
+    
+    quality = movies_df['imdb_rating'].to_numpy(dtype=float)[movies] / 2
+    user_bias = rng.normal(0.0, 0.5, n_users)[users]
+    ratings = np.clip(np.round((quality + user_bias + rng.normal(0.0, 0.7, len(users))) * 2) / 2, 0.5, 5.0)
+    
+    return pd.DataFrame({
+        'userId': users + 1,
+        'movieId': movie_ids[movies],
+        'rating': ratings,
+        'timestamp': np.sort(rng.integers(1_500_000_000, 1_700_000_000, len(users)))
+    })
+
+
+def generate_dataset(
+    n_movies: int,
+    n_ratings: int,
+    n_users: int,
+    seed: int = 0
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Generate matching movies and ratings tables.
+    
+    Args:
+        n_movies: Number of movies
+        n_ratings: Number of ratings to draw
+        n_users: Number of users
+        seed: Random seed
+    
+    Returns:
+        Tuple of (movies, ratings) DataFrames
+    """
+    movies_df = generate_movies(n_movies, seed)
+    return movies_df, generate_ratings(movies_df, n_ratings, n_users, seed=seed)
+
+
+def write_dataset(data_dir: str, movies_df: pd.DataFrame, ratings_df: pd.DataFrame) -> None:
+    """Write movies.csv and ratings.csv to a data directory."""
+    os.makedirs(data_dir, exist_ok=True)
+    movies_df.to_csv(os.path.join(data_dir, 'movies.csv'), index=False)
+    ratings_df.to_csv(os.path.join(data_dir, 'ratings.csv'), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate a synthetic movies.csv / ratings.csv dataset',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmarks/synthetic.py --output-dir data/synthetic
+  python benchmarks/synthetic.py --movies 100000 --ratings 10000000 --users 500000 --output-dir data/large
+  python main.py --data-dir data/synthetic --method collaborative --user-id 1
+        """
+    )
+    parser.add_argument('--movies', type=int, default=10000, help='Number of movies (default: 10000)')
+    parser.add_argument('--ratings', type=int, default=1000000, help='Number of ratings (default: 1000000)')
+    parser.add_argument('--users', type=int, default=50000, help='Number of users (default: 50000)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--output-dir', required=True, help='Directory to write movies.csv and ratings.csv to')
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    movies_df, ratings_df = generate_dataset(args.movies, args.ratings, args.users, args.seed)
+    write_dataset(args.output_dir, movies_df, ratings_df)
+    print(f"Wrote {len(movies_df)} movies and {len(ratings_df)} ratings from "
+          f"{ratings_df['userId'].nunique()} users to {args.output_dir} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,24 +4,230 @@ Provides a command-line interface for getting movie recommendations
 """
 
 import argparse
+import cProfile
+import json
 import sys
 import os
+import time
 
 # Fix encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
-from recommender.data_loader import DataLoader
+from recommender.batch import read_ids, run_batch, write_results
+from recommender.data_loader import DataLoader, lookup_titles
+from recommender.evaluation import EVALUATION_MODELS, SPLIT_STRATEGIES, evaluate_models
+from recommender.genres import GENRE_MATCHES
+from recommender.log import LOG_FORMATS, configure_logging
+from recommender.metrics import metrics
 from recommender.content_based import ContentBasedRecommender
 from recommender.collaborative import CollaborativeFilteringRecommender
+from recommender.persistence import load_or_build, source_fingerprint
+from recommender.precompute import build_movie_table, build_user_table
 from recommender.utils import (
     print_recommendations, 
     print_movie_details, 
     print_statistics,
+    print_evaluation,
+    print_profile,
     get_imdb_rating_category
 )
 
 
+CF_METHOD_LABELS = {
+    'user': 'User-Based',
+    'item': 'Item-Based',
+    'mf': 'Matrix Factorization'
+}
+
+
+def get_content_model(args, loader, movies_df):
+    """
+    Load the content-based model from --model-dir if it is up to date,
+    otherwise build it (and save it when --model-dir is set).
+    """
+    def build():
+        return ContentBasedRecommender(movies_df, movie_index=loader.movie_index, n_jobs=args.jobs)
+    
+    if not args.model_dir:
+        return build()
+    
+    path = os.path.join(args.model_dir, 'content-movies')
+    source = source_fingerprint([os.path.join(args.data_dir, 'movies.csv')])
+    model, loaded = load_or_build(path, 'content', source, build, ContentBasedRecommender.load)
+    print(f"{'📦 Loaded' if loaded else '💾 Saved'} content-based model {'from' if loaded else 'to'} {path}")
+    return model
+
+
+def get_collaborative_model(args, loader, movies_df, ratings_df):
+    """
+    Load the collaborative filtering model from --model-dir if it is up to
+    date, otherwise build it (and save it when --model-dir is set).
+    """
+    def build():
+        return CollaborativeFilteringRecommender(
+            ratings_df,
+            movies_df,
+            method=args.cf_method,
+            movie_index=loader.movie_index,
+            n_factors=args.n_factors,
+            n_jobs=args.jobs
+        )
+    
+    if not args.model_dir:
+        return build()
+    
+    path = os.path.join(args.model_dir, f'collaborative-{args.cf_method}')
+    source = source_fingerprint([
+        os.path.join(args.data_dir, 'movies.csv'),
+        os.path.join(args.data_dir, 'ratings.csv')
+    ])
+    params = {'method': args.cf_method}
+    if args.cf_method == 'mf':
+        params['n_factors'] = args.n_factors
+    
+    model, loaded = load_or_build(
+        path,
+        'collaborative',
+        source,
+        build,
+        CollaborativeFilteringRecommender.load,
+        params
+    )
+    print(f"{'📦 Loaded' if loaded else '💾 Saved'} collaborative filtering model "
+          f"{'from' if loaded else 'to'} {path}")
+    return model
+
+
+def run_batch_mode(args, loader, movies_df, ratings_df):
+    """
+    Recommend for every movie ID (content) or user ID (collaborative) listed
+    in --batch, writing the results to --output or printing them.
+    """
+    if args.method == 'content':
+        print("🔧 Building content-based recommendation model...")
+        model = get_content_model(args, loader, movies_df)
+        column, method, score_name = 'movieId', 'get_similar_movie_ids_batch', 'score'
+        kwargs = {'n_recommendations': args.n, 'min_imdb_rating': args.min_imdb}
+    elif args.method == 'collaborative':
+        print(f"🔧 Building {CF_METHOD_LABELS[args.cf_method]} collaborative filtering model...")
+        model = get_collaborative_model(args, loader, movies_df, ratings_df)
+        column, method, score_name = 'userId', 'recommend_for_users', 'predicted_rating'
+        kwargs = {'n_recommendations': args.n, 'min_rating': args.min_rating}
+    else:
+        print("❌ Error: --batch is supported for the content and collaborative methods")
+        sys.exit(1)
+    
+    try:
+        ids = read_ids(args.batch, column)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Error: Could not read {column} values from {args.batch}: {e}")
+        sys.exit(1)
+    
+    start = time.perf_counter()
+    movie_ids, scores = run_batch(model, method, ids, n_jobs=args.jobs, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"⚡ Computed recommendations for {len(ids)} {column} values in {elapsed:.2f}s")
+    
+    titles = lookup_titles(movies_df['title'].values, loader.movie_index, movie_ids.ravel()).reshape(movie_ids.shape)
+    if args.output:
+        write_results(args.output, column, ids, movie_ids, titles, scores, score_name)
+        print(f"💾 Wrote recommendations to {args.output}")
+        return
+    
+    for input_id, row_ids, row_titles, row_scores in zip(ids.tolist(), movie_ids, titles, scores):
+        found = row_ids >= 0
+        print_recommendations(
+            list(zip(row_titles[found].tolist(), row_scores[found].tolist())),
+            f"Recommendations for {column} {input_id}"
+        )
+
+
+def run_precompute(args, loader, movies_df, ratings_df):
+    """
+    Write the top --n recommendations of every movie (content) or every
+    user (collaborative) to the table directory given by --precompute.
+    """
+    start = time.perf_counter()
+    if args.method == 'content':
+        print("🔧 Building content-based recommendation model...")
+        model = get_content_model(args, loader, movies_df)
+        table = build_movie_table(model, args.n, min_imdb_rating=args.min_imdb, n_jobs=args.jobs)
+        source = source_fingerprint([os.path.join(args.data_dir, 'movies.csv')])
+        label = 'movies'
+    elif args.method == 'collaborative':
+        print(f"🔧 Building {CF_METHOD_LABELS[args.cf_method]} collaborative filtering model...")
+        model = get_collaborative_model(args, loader, movies_df, ratings_df)
+        table = build_user_table(model, args.n, min_rating=args.min_rating, n_jobs=args.jobs)
+        source = source_fingerprint([
+            os.path.join(args.data_dir, 'movies.csv'),
+            os.path.join(args.data_dir, 'ratings.csv')
+        ])
+        label = 'users'
+    else:
+        print("❌ Error: --precompute is supported for the content and collaborative methods")
+        sys.exit(1)
+    
+    table.save(args.precompute, source=source)
+    elapsed = time.perf_counter() - start
+    print(f"💾 Wrote top-{table.width} recommendations for {len(table)} {label} to {args.precompute} "
+          f"in {elapsed:.2f}s")
+
+
+def run_evaluation(args, movies_df, ratings_df):
+    """
+    Hold out part of every user's ratings, then train and score the models
+    listed in --evaluate (all of them if none is listed).
+    """
+    models = args.evaluate or list(EVALUATION_MODELS)
+    print(f"🧪 Evaluating {', '.join(models)} on a {args.split} holdout of "
+          f"{args.test_fraction:.0%} of each user's ratings...")
+    results = evaluate_models(
+        ratings_df,
+        movies_df,
+        models=models,
+        strategy=args.split,
+        test_fraction=args.test_fraction,
+        k=args.n,
+        relevant_rating=args.relevant_rating,
+        seed=args.seed,
+        n_factors=args.n_factors,
+        n_jobs=args.jobs
+    )
+    print_evaluation(results)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            # NaN metrics (e.g. RMSE of the content model) are written as null
+            json.dump(
+                [{key: None if value != value else value for key, value in row.items()} for row in results],
+                f,
+                indent=2
+            )
+        print(f"💾 Wrote evaluation results to {args.output}")
+
+
+def run_profiled(args):
+    """
+    Run with the timers enabled and print where the time went; with
+    --profile-output, also write cProfile statistics to that file.
+    """
+    metrics.enabled = True
+    profiler = cProfile.Profile() if args.profile_output else None
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.runcall(run, args)
+        else:
+            run(args)
+    finally:
+        print_profile(metrics.summary(), metrics.counters(), time.perf_counter() - start)
+        if profiler is not None:
+            profiler.dump_stats(args.profile_output)
+            print(f"💾 Wrote cProfile statistics to {args.profile_output} "
+                  f"(view with: python -m pstats {args.profile_output})")
+
+
 def main():
     """Main function to run the recommendation system."""
     parser = argparse.ArgumentParser(
@@ -52,6 +258,33 @@ Examples:
   
   # Collaborative filtering (item-based)
   python main.py --method collaborative --user-id 1 --cf-method item
+  
+  # Collaborative filtering (matrix factorization)
+  python main.py --method collaborative --user-id 1 --cf-method mf --n-factors 10
+  
+  # Reuse saved models between runs (built on first use, rebuilt when the data changes)
+  python main.py --method collaborative --user-id 1 --model-dir models
+  
+  # Batch mode: recommendations for every user ID in a file, across 4 processes
+  python main.py --method collaborative --batch users.csv --output recommendations.csv --jobs 4
+  
+  # Batch mode: similar movies for every movie ID in a JSON lines file
+  python main.py --method content --batch movies.jsonl --output similar.jsonl
+  
+  # Precompute the top 20 recommendations of every user into a memory-mappable table
+  python main.py --method collaborative --precompute models/recommendations-users --n 20 --jobs 4
+  
+  # Compare all models on a temporal holdout (precision@10, recall@10, NDCG, RMSE, throughput)
+  python main.py --evaluate --split temporal
+  
+  # Compare user- and item-based CF on a random 30% holdout, saving the results
+  python main.py --evaluate user item --test-fraction 0.3 --output evaluation.json
+  
+  # Time each stage (loading, vectorizing, similarity, prediction) and keep a cProfile dump
+  python main.py --method collaborative --user-id 1 --cf-method item --profile --profile-output cf.prof
+  
+  # Progress messages as JSON lines with rows, shape and elapsed_ms fields
+  python main.py --method content --movie "Dangal" --log-format json
         """
     )
     
@@ -59,8 +292,7 @@ Examples:
         '--method',
         type=str,
         choices=['content', 'collaborative', 'imdb', 'director'],
-        required=True,
-        help='Recommendation method: content, collaborative, imdb, or director'
+        help='Recommendation method: content, collaborative, imdb, or director (required unless --evaluate)'
     )
     
     parser.add_argument(
@@ -70,6 +302,12 @@ Examples:
         help='Directory containing dataset files (default: data)'
     )
     
+    parser.add_argument(
+        '--model-dir',
+        type=str,
+        help='Directory to load saved models from and save built models to'
+    )
+    
     # Content-based arguments
     parser.add_argument(
         '--movie',
@@ -89,6 +327,14 @@ Examples:
         help='List of genres (e.g., Action Thriller Drama)'
     )
     
+    parser.add_argument(
+        '--genre-match',
+        type=str,
+        choices=list(GENRE_MATCHES),
+        default='any',
+        help='Match movies with any or all of the --genres (default: any)'
+    )
+    
     # Director argument
     parser.add_argument(
         '--director',
@@ -120,9 +366,16 @@ Examples:
     parser.add_argument(
         '--cf-method',
         type=str,
-        choices=['user', 'item'],
+        choices=['user', 'item', 'mf'],
         default='user',
-        help='Collaborative filtering method: user or item (default: user)'
+        help='Collaborative filtering method: user, item, or mf for matrix factorization (default: user)'
+    )
+    
+    parser.add_argument(
+        '--n-factors',
+        type=int,
+        default=20,
+        help='Number of latent factors for --cf-method mf (default: 20)'
     )
     
     # Common arguments
@@ -140,8 +393,122 @@ Examples:
         help='Minimum predicted rating for collaborative filtering (default: 3.0)'
     )
     
+    # Batch arguments
+    parser.add_argument(
+        '--batch',
+        type=str,
+        help='CSV (with a movieId or userId column) or JSONL file of IDs to recommend for in one run'
+    )
+    
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Write batch results to this .csv or .jsonl file instead of printing them (or --evaluate results as JSON)'
+    )
+    
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Threads building similarity matrices and worker processes for --batch and --precompute '
+             '(-1 for one per CPU, default: 1)'
+    )
+    
+    parser.add_argument(
+        '--precompute',
+        type=str,
+        help='Write the top --n recommendations of every movie (content) or user (collaborative) to this directory'
+    )
+    
+    # Evaluation arguments
+    parser.add_argument(
+        '--evaluate',
+        nargs='*',
+        choices=list(EVALUATION_MODELS),
+        metavar='MODEL',
+        help=f"Evaluate models on a holdout split of the ratings: {', '.join(EVALUATION_MODELS)} "
+             "(default: all); --n sets k for precision@k, recall@k and NDCG"
+    )
+    
+    parser.add_argument(
+        '--split',
+        type=str,
+        choices=list(SPLIT_STRATEGIES),
+        default='random',
+        help="Holdout for --evaluate: random, or temporal to hold out each user's latest ratings (default: random)"
+    )
+    
+    parser.add_argument(
+        '--test-fraction',
+        type=float,
+        default=0.2,
+        help="Fraction of each user's ratings held out by --evaluate (default: 0.2)"
+    )
+    
+    parser.add_argument(
+        '--relevant-rating',
+        type=float,
+        default=4.0,
+        help='Minimum held-out rating counted as relevant by --evaluate (default: 4.0)'
+    )
+    
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Random seed of the --evaluate random holdout (default: 0)'
+    )
+    
+    parser.add_argument(
+        '--fit-report',
+        action='store_true',
+        help='Also print the collaborative model\'s RMSE/MAE on the ratings it was built from '
+             '(an in-sample fit, not a quality estimate; see --evaluate)'
+    )
+    
+    # Profiling arguments
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Print how long each stage (data loading, vectorizing, similarity building, prediction) took'
+    )
+    
+    parser.add_argument(
+        '--profile-output',
+        type=str,
+        help='Also write cProfile statistics to this file (implies --profile; view with python -m pstats)'
+    )
+    
+    # Logging arguments
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='Hide progress messages from data loading and model building (warnings are still shown)'
+    )
+    
+    parser.add_argument(
+        '--log-format',
+        type=str,
+        choices=list(LOG_FORMATS),
+        default='plain',
+        help='Progress message format: plain, text (with time, level and fields such as rows and elapsed_ms) '
+             'or json (default: plain)'
+    )
+    
     args = parser.parse_args()
+    if args.method is None and args.evaluate is None:
+        parser.error('--method is required unless --evaluate is given')
+    
+    configure_logging(fmt=args.log_format, stream=sys.stdout, quiet=args.quiet)
     
+    if args.profile or args.profile_output:
+        run_profiled(args)
+    else:
+        run(args)
+
+
+def run(args):
+    """Load the dataset and run the mode selected by the arguments."""
     # Load data
     print("\n🎬 Bollywood Movie Recommendation System")
     print("="*50)
@@ -160,10 +527,22 @@ Examples:
         print("\nPlease ensure the dataset files (movies.csv and ratings.csv) are in the data/ directory.")
         sys.exit(1)
     
+    if args.evaluate is not None:
+        run_evaluation(args, movies_df, ratings_df)
+        return
+    
+    if args.batch:
+        run_batch_mode(args, loader, movies_df, ratings_df)
+        return
+    
+    if args.precompute:
+        run_precompute(args, loader, movies_df, ratings_df)
+        return
+    
     # Run recommendation based on method
     if args.method == 'content':
         print("🔧 Building content-based recommendation model...")
-        content_recommender = ContentBasedRecommender(movies_df)
+        content_recommender = get_content_model(args, loader, movies_df)
         
         recommendations = []
         
@@ -206,7 +585,8 @@ Examples:
             recommendations = content_recommender.recommend_by_genre(
                 args.genres,
                 n_recommendations=args.n,
-                min_imdb_rating=args.min_imdb
+                min_imdb_rating=args.min_imdb,
+                match=args.genre_match
             )
             
         else:
@@ -220,14 +600,15 @@ Examples:
     
     elif args.method == 'imdb':
         print("🔧 Building IMDb-based recommendation model...")
-        content_recommender = ContentBasedRecommender(movies_df)
+        content_recommender = get_content_model(args, loader, movies_df)
         
         print(f"🔍 Finding top movies by IMDb rating (min: {args.min_imdb})")
         recommendations = content_recommender.recommend_by_imdb_rating(
             n_recommendations=args.n,
             min_rating=args.min_imdb if args.min_imdb > 0 else 7.0,
             genres=args.genres,
-            year_from=args.year_from
+            year_from=args.year_from,
+            match=args.genre_match
         )
         
         if recommendations:
@@ -241,7 +622,7 @@ Examples:
             sys.exit(1)
         
         print("🔧 Building director-based recommendation model...")
-        content_recommender = ContentBasedRecommender(movies_df)
+        content_recommender = get_content_model(args, loader, movies_df)
         
         print(f"🔍 Finding movies by director: {args.director}")
         recommendations = content_recommender.recommend_by_director(
@@ -259,12 +640,15 @@ Examples:
             print("❌ Error: --user-id is required for collaborative filtering")
             sys.exit(1)
         
-        print(f"🔧 Building {args.cf_method}-based collaborative filtering model...")
-        cf_recommender = CollaborativeFilteringRecommender(
-            ratings_df,
-            movies_df,
-            method=args.cf_method
-        )
+        cf_label = CF_METHOD_LABELS[args.cf_method]
+        print(f"🔧 Building {cf_label} collaborative filtering model...")
+        cf_recommender = get_collaborative_model(args, loader, movies_df, ratings_df)
+        
+        if args.fit_report:
+            # How well the model reproduces the ratings it was built from (use --evaluate for holdout scores)
+            fit = cf_recommender.evaluate(ratings_df)
+            print(f"📏 In-sample fit on known ratings: RMSE {fit['rmse']:.4f} | MAE {fit['mae']:.4f} "
+                  f"({fit['coverage']:.0%} of ratings predictable)")
         
         # Check if user exists and show their history
         user_ratings = loader.get_user_ratings(args.user_id)
@@ -290,7 +674,7 @@ Examples:
         if recommendations:
             print_recommendations(
                 recommendations, 
-                f"{args.cf_method.capitalize()}-Based Collaborative Filtering Recommendations"
+                f"{cf_label} Collaborative Filtering Recommendations"
             )
         else:
             print("No recommendations found. Try lowering --min-rating or using a different user.")
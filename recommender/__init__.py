@@ -2,4 +2,9 @@
 Movie Recommendation System Package
 """
 
+import logging
+
 __version__ = "1.0.0"
+
+# Silent unless the application configures logging (see recommender.log)
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -0,0 +1,174 @@
+"""
+Approximate nearest neighbours for cosine similarity
+Random-projection LSH: rows are sorted by their hash codes and only rows close in that order are scored
+"""
+
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+
+
+class LSHIndex:
+    """
+    Random-projection (SimHash) index over the rows of a matrix.
+    
+    Each of n_tables tables hashes a row to the signs of its projections on
+    n_bits random hyperplanes and sorts the rows by that code; rows at a
+    small angle tend to share their leading bits and so sit close together
+    in the order. A search only scores the window rows around the query's
+    position in every table.
+    
+    Recall is traded for speed with n_tables and window: each row is
+    compared with at most n_tables x window others instead of all of them.
+    """
+    
+    def __init__(
+        self,
+        vectors,
+        n_tables: int = 8,
+        window: int = 256,
+        n_bits: int = 16,
+        seed: int = 0
+    ):
+        """
+        Build the index.
+        
+        Args:
+            vectors: Dense or sparse matrix whose rows are indexed
+            n_tables: Number of hash tables (independent sort orders)
+            window: Number of neighbouring rows per table scored for a query
+            n_bits: Hyperplanes per table
+            seed: Random seed for the hyperplanes
+        """
+        if n_tables < 1:
+            raise ValueError("n_tables must be at least 1")
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        if not 1 <= n_bits <= 62:
+            raise ValueError("n_bits must be between 1 and 62")
+        
+        self.vectors = normalize(csr_matrix(vectors, dtype=np.float64))
+        self.n_tables = n_tables
+        self.window = window
+        self.n_bits = n_bits
+        self.seed = seed
+        
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((self.vectors.shape[1], n_tables * n_bits))
+        # The first hyperplane is the most significant bit of the code
+        self._powers = 1 << np.arange(n_bits - 1, -1, -1, dtype=np.int64)
+        
+        # Rows without features are similar to nothing and are not indexed
+        indexed = np.flatnonzero(np.diff(self.vectors.indptr) > 0)
+        codes = self._hash(self.vectors[indexed])
+        
+        # Per table: indexed rows sorted by code
+        self._sorted_codes = []
+        self._sorted_rows = []
+        for table in range(n_tables):
+            order = np.argsort(codes[:, table], kind='stable')
+            self._sorted_codes.append(codes[order, table])
+            self._sorted_rows.append(indexed[order])
+    
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+    
+    def _hash(self, normalized: csr_matrix) -> np.ndarray:
+        """Get the code of every row in every table, shape (rows, n_tables)."""
+        projections = np.asarray(normalized @ self._planes).reshape(-1, self.n_tables, self.n_bits)
+        return (projections >= 0).astype(np.int64) @ self._powers
+    
+    def blocks(self) -> Iterator[np.ndarray]:
+        """
+        Split every table's order into consecutive blocks of window rows.
+        
+        Every pair of rows within a block is a candidate pair. Odd tables
+        shift their block boundaries by half a window, so rows split by a
+        boundary in one table share a block in another.
+        
+        Yields:
+            Row indices of each block
+        """
+        for table, rows in enumerate(self._sorted_rows):
+            offset = self.window // 2 if table % 2 else 0
+            starts = [0] + list(range(offset or self.window, len(rows), self.window))
+            for start, end in zip(starts, starts[1:] + [len(rows)]):
+                if end - start > 1:
+                    yield rows[start:end]
+    
+    def candidates(self, queries: csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the indexed rows within half a window of each query in any table.
+        
+        Args:
+            queries: Normalized query rows (CSR)
+        
+        Returns:
+            Tuple of (query positions, row indices), one entry per distinct pair
+        """
+        n_queries = queries.shape[0]
+        codes = self._hash(queries)
+        query_parts, row_parts = [], []
+        for table in range(self.n_tables):
+            rows = self._sorted_rows[table]
+            positions = np.searchsorted(self._sorted_codes[table], codes[:, table])
+            starts = np.clip(positions - self.window // 2, 0, max(len(rows) - self.window, 0))
+            length = min(self.window, len(rows))
+            offsets = np.tile(np.arange(length), n_queries)
+            query_parts.append(np.repeat(np.arange(n_queries), length))
+            row_parts.append(rows[np.repeat(starts, length) + offsets])
+        
+        n_rows = np.int64(self.vectors.shape[0])
+        pairs = np.unique(np.concatenate(query_parts) * n_rows + np.concatenate(row_parts))
+        return pairs // n_rows, pairs % n_rows
+    
+    def search(
+        self,
+        queries,
+        n: int,
+        exclude: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the approximate top-n most similar rows for each query.
+        
+        Args:
+            queries: Dense or sparse query vectors (one per row, same
+                features as the indexed vectors)
+            n: Number of neighbours per query
+            exclude: Optional row index per query that must not be returned
+                (e.g. the query's own row)
+            mask: Optional boolean array over the indexed rows; only True
+                rows are scored and returned
+        
+        Returns:
+            Tuple of (row indices, similarity scores), each of shape
+            (n_queries, n), best first; missing entries (including rows
+            with no positive similarity) are -1 / NaN
+        """
+        queries = normalize(csr_matrix(queries, dtype=np.float64))
+        n_queries = queries.shape[0]
+        indices = np.full((n_queries, n), -1, dtype=np.int64)
+        scores = np.full((n_queries, n), np.nan)
+        if n_queries == 0 or n < 1 or len(self._sorted_rows[0]) == 0:
+            return indices, scores
+        
+        query_positions, rows = self.candidates(queries)
+        if exclude is not None:
+            keep = rows != np.asarray(exclude)[query_positions]
+            query_positions, rows = query_positions[keep], rows[keep]
+        if mask is not None:
+            keep = np.asarray(mask, dtype=bool)[rows]
+            query_positions, rows = query_positions[keep], rows[keep]
+        pair_scores = np.asarray(queries[query_positions].multiply(self.vectors[rows]).sum(axis=1)).ravel()
+        
+        # Best n per query: sort by query, then score descending, then row
+        order = np.lexsort((rows, -pair_scores, query_positions))
+        query_positions, rows, pair_scores = query_positions[order], rows[order], pair_scores[order]
+        rank = np.arange(len(order)) - np.searchsorted(query_positions, query_positions)
+        keep = (rank < n) & (pair_scores > 0)
+        indices[query_positions[keep], rank[keep]] = rows[keep]
+        scores[query_positions[keep], rank[keep]] = pair_scores[keep]
+        return indices, scores
@@ -0,0 +1,144 @@
+"""
+Batch recommendation jobs
+Ranks many movies or users with the models' batch methods, optionally across a process pool
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Model held by each pool worker (set once per process by _init_worker)
+_worker_model = None
+
+
+def read_ids(filepath: str, column: str) -> np.ndarray:
+    """
+    Read the IDs of a batch job.
+    
+    Args:
+        filepath: CSV file with a header row containing column, or a JSON
+            lines file (.jsonl) of objects with a column key or bare IDs
+        column: ID column name, e.g. 'movieId' or 'userId'
+    
+    Returns:
+        Array of IDs in file order
+    """
+    if filepath.lower().endswith('.jsonl'):
+        ids = []
+        with open(filepath, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                value = json.loads(line)
+                ids.append(value[column] if isinstance(value, dict) else value)
+        return np.asarray(ids, dtype=np.int64)
+    
+    return pd.read_csv(filepath, usecols=[column])[column].to_numpy(dtype=np.int64)
+
+
+def _init_worker(model) -> None:
+    """Store the model in a pool worker."""
+    global _worker_model
+    _worker_model = model
+
+
+def _run_chunk(task: tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """Run a batch method of the worker's model on one chunk of IDs."""
+    method, ids, kwargs = task
+    return getattr(_worker_model, method)(ids, **kwargs)
+
+
+def run_batch(
+    model,
+    method: str,
+    ids: np.ndarray,
+    n_jobs: int = 1,
+    chunk_size: int = 1024,
+    **kwargs
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run a model's batch method over many IDs.
+    
+    With n_jobs > 1 the IDs are split into chunks scored by a process pool.
+    Each worker receives the model once (inherited without copying where
+    processes are forked) and returns (ids, scores) arrays for its chunks.
+    
+    Args:
+        model: Recommender, e.g. a ContentBasedRecommender or a
+            CollaborativeFilteringRecommender
+        method: Batch method name, e.g. 'get_similar_movie_ids_batch' or
+            'recommend_for_users'
+        ids: IDs passed to the method
+        n_jobs: Number of worker processes (-1 for one per CPU)
+        chunk_size: Number of IDs per pool task
+        **kwargs: Further arguments of the method
+    
+    Returns:
+        Tuple of (movie IDs, scores) arrays with one row per input ID
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    
+    if n_jobs == 1 or len(ids) <= chunk_size:
+        return getattr(model, method)(ids, **kwargs)
+    
+    tasks = [(method, ids[start:start + chunk_size], kwargs) for start in range(0, len(ids), chunk_size)]
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(model,)) as pool:
+        results = list(pool.map(_run_chunk, tasks))
+    
+    return (
+        np.concatenate([movie_ids for movie_ids, _ in results]),
+        np.concatenate([scores for _, scores in results])
+    )
+
+
+def write_results(
+    filepath: str,
+    column: str,
+    ids: np.ndarray,
+    movie_ids: np.ndarray,
+    titles: np.ndarray,
+    scores: np.ndarray,
+    score_name: str = 'score'
+) -> None:
+    """
+    Write the results of a batch job.
+    
+    A .jsonl file gets one object per input ID with its ranked
+    recommendations; any other file gets CSV rows of
+    (column, rank, movieId, title, score_name).
+    
+    Args:
+        filepath: Output file
+        column: Name of the input ID column, e.g. 'movieId' or 'userId'
+        ids: Input IDs
+        movie_ids: Recommended movie IDs per input ID (-1 where missing)
+        titles: Titles aligned with movie_ids
+        scores: Scores aligned with movie_ids
+        score_name: Name of the score field
+    """
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        if filepath.lower().endswith('.jsonl'):
+            for input_id, row_ids, row_titles, row_scores in zip(ids.tolist(), movie_ids, titles, scores):
+                found = row_ids >= 0
+                recommendations = [
+                    {'movieId': movie_id, 'title': title, score_name: round(score, 4)}
+                    for movie_id, title, score in zip(
+                        row_ids[found].tolist(), row_titles[found].tolist(), row_scores[found].tolist()
+                    )
+                ]
+                f.write(json.dumps({column: input_id, 'recommendations': recommendations}) + '\n')
+        else:
+            writer = csv.writer(f)
+            writer.writerow([column, 'rank', 'movieId', 'title', score_name])
+            for input_id, row_ids, row_titles, row_scores in zip(ids.tolist(), movie_ids, titles, scores):
+                for rank, (movie_id, title, score) in enumerate(zip(row_ids, row_titles, row_scores), 1):
+                    if movie_id >= 0:
+                        writer.writerow([input_id, rank, int(movie_id), title, round(float(score), 4)])
@@ -0,0 +1,87 @@
+"""
+In-process LRU cache
+Used by the web app to keep serialized API responses between requests
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with a fixed number of entries.
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_size: Maximum number of entries; the least recently used
+                entry is evicted when it is exceeded
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable, default=None):
+        """
+        Get an entry and mark it as recently used.
+        
+        Args:
+            key: Cache key
+            default: Value returned when the key is not cached
+        
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Hashable, value) -> None:
+        """
+        Store an entry, evicting the least recently used one if full.
+        
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        """
+        Get cache usage counters.
+        
+        Returns:
+            Dictionary with size, max_size, hits and misses
+        """
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses
+        }
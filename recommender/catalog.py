@@ -0,0 +1,204 @@
+"""
+Movie catalog served by the web application
+Wraps a movies DataFrame with the JSON records, ID index and source fingerprint
+"""
+
+import hashlib
+import json
+import os
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from .data_loader import DataLoader, IdIndex
+from .persistence import source_fingerprint
+from .search import SearchIndex
+
+
+# Poster path used when a catalog entry has none
+DEFAULT_POSTER = "/static/posters/{movie_id}.jpg"
+
+
+class MovieCatalog:
+    """
+    Movies available to the web app, as JSON-ready records.
+    
+    The catalog can be read from a catalog JSON file (with cast, posters and
+    descriptions) or from a movies CSV file; both go through DataLoader, so
+    the records and the recommenders share one movies table.
+    """
+    
+    def __init__(
+        self,
+        movies_df: pd.DataFrame,
+        movie_index: Optional[IdIndex] = None,
+        source: Optional[dict] = None
+    ):
+        """
+        Initialize the catalog.
+        
+        Args:
+            movies_df: Movies DataFrame in the DataLoader schema
+            movie_index: Optional prebuilt movieId index over movies_df rows
+            source: Optional fingerprint of the file movies_df was read from
+        """
+        self.movies_df = movies_df
+        self.movie_index = movie_index if movie_index is not None else IdIndex(movies_df['movieId'].values)
+        self.source = source
+        self.records = _to_records(movies_df)
+        
+        # Changes whenever the source (or, without one, the records) changes
+        fingerprint = source if source is not None else self.records
+        self.version = hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        
+        self._build_views()
+    
+    def _build_views(self):
+        """Precompute the sorted lists, genre lists and stats served by the API."""
+        # sorted() is stable, so ties keep catalog order
+        self.top_rated = sorted(self.records, key=lambda movie: movie['imdb'], reverse=True)
+        self.latest = sorted(self.records, key=lambda movie: movie['year'], reverse=True)
+        
+        # Genre -> its movies, best rated first
+        self.by_genre = {}
+        for movie in self.top_rated:
+            for genre in movie['genres']:
+                self.by_genre.setdefault(genre, []).append(movie)
+        self.genre_names = sorted(self.by_genre)
+        
+        years = sorted(set(movie['year'] for movie in self.records), reverse=True)
+        self.stats = {
+            "total_movies": len(self.records),
+            "genres": len(self.genre_names),
+            "years": years,
+            "avg_rating": round(sum(movie['imdb'] for movie in self.records) / len(self.records), 1) if self.records else 0.0,
+            "latest_year": max(years) if years else None,
+            "oldest_year": min(years) if years else None
+        }
+    
+    @classmethod
+    def from_file(cls, filepath: str, use_cache: bool = True) -> 'MovieCatalog':
+        """
+        Load a catalog from a catalog JSON file or a movies CSV file.
+        
+        Args:
+            filepath: Path of the .json catalog or .csv movies file
+            use_cache: Whether DataLoader may use its columnar cache
+        
+        Returns:
+            MovieCatalog for the file
+        """
+        loader = DataLoader(data_dir=os.path.dirname(filepath) or '.', use_cache=use_cache)
+        filename = os.path.basename(filepath)
+        if filename.lower().endswith('.json'):
+            movies_df = loader.load_catalog(filename)
+        else:
+            movies_df = loader.load_movies(filename)
+        return cls(movies_df, loader.movie_index, source_fingerprint([filepath]))
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def get(self, movie_id: int) -> Optional[dict]:
+        """
+        Get the record of a movie.
+        
+        Args:
+            movie_id: Movie ID to look up
+        
+        Returns:
+            Movie record or None if the movie is not in the catalog
+        """
+        position = self.movie_index.get(movie_id)
+        if position is None:
+            return None
+        return self.records[position]
+    
+    def get_many(self, movie_ids: Iterable[int]) -> List[dict]:
+        """
+        Get the records of many movies, skipping unknown IDs.
+        
+        Args:
+            movie_ids: Movie IDs to look up
+        
+        Returns:
+            List of movie records in the order of movie_ids
+        """
+        positions = self.movie_index.get_many(movie_ids)
+        return [self.records[position] for position in positions if position >= 0]
+    
+    def genres(self) -> List[str]:
+        """Get all genres in the catalog, sorted by name."""
+        return self.genre_names
+    
+    def build_search_index(self) -> SearchIndex:
+        """
+        Build a search index over titles, cast and directors.
+        
+        Title matches rank above cast matches, which rank above director
+        matches; ties go to the higher IMDb rating.
+        
+        Returns:
+            SearchIndex whose document positions are catalog positions
+        """
+        return SearchIndex(
+            [
+                ('title', [movie['title'] for movie in self.records]),
+                ('cast', [movie['cast'] for movie in self.records]),
+                ('director', [movie['director'] for movie in self.records])
+            ],
+            [movie['imdb'] for movie in self.records]
+        )
+    
+    def movies_by_genre(self, genre: str, n: Optional[int] = None) -> List[dict]:
+        """
+        Get the movies of a genre, best rated first.
+        
+        Args:
+            genre: Genre name (exact match)
+            n: Maximum number of movies, or None for all
+        
+        Returns:
+            List of movie records
+        """
+        return self.by_genre.get(genre, [])[:n]
+
+
+def _split(value) -> List[str]:
+    """Split a '|'-joined field into a list."""
+    if not isinstance(value, str) or not value:
+        return []
+    return value.split('|')
+
+
+def _to_records(movies_df: pd.DataFrame) -> List[dict]:
+    """Build the JSON records served by the API from a movies DataFrame."""
+    n_movies = len(movies_df)
+    casts = movies_df['cast'].tolist() if 'cast' in movies_df else [''] * n_movies
+    posters = movies_df['poster'].tolist() if 'poster' in movies_df else [''] * n_movies
+    descriptions = movies_df['description'].tolist() if 'description' in movies_df else [''] * n_movies
+    
+    records = []
+    for movie_id, title, year, genres, imdb, director, cast, poster, description in zip(
+        movies_df['movieId'].tolist(),
+        movies_df['title'].tolist(),
+        movies_df['year'].tolist(),
+        movies_df['genres'].tolist(),
+        movies_df['imdb_rating'].tolist(),
+        movies_df['director'].tolist(),
+        casts,
+        posters,
+        descriptions
+    ):
+        records.append({
+            "id": int(movie_id),
+            "title": title,
+            "year": int(year),
+            "genres": _split(genres),
+            "imdb": float(imdb),
+            "director": director,
+            "cast": _split(cast),
+            "poster": poster or DEFAULT_POSTER.format(movie_id=int(movie_id)),
+            "description": description or ""
+        })
+    return records
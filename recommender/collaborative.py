@@ -1,26 +1,55 @@
 """
 Collaborative Filtering Recommendation System
-Implements both User-Based and Item-Based Collaborative Filtering
+Implements User-Based, Item-Based and Matrix-Factorization Collaborative Filtering
 """
 
+import logging
+import time
+
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from scipy.sparse import csr_matrix
-from typing import List, Tuple, Optional
+from sklearn.decomposition import TruncatedSVD
+from typing import Dict, List, Tuple, Optional
+
+from . import persistence
+from .data_loader import IdIndex, RatingMatrixBuilder, lookup_titles, read_rating_chunks
+from .log import elapsed_ms
+from .metrics import inc, timed, timer
+from .similarity import (
+    build_similarity_matrix,
+    positive_neighbour_weights,
+    row_neighbours,
+    similarity_row,
+    update_similarity_matrix
+)
+from .utils import calculate_mae, calculate_rmse, top_n_indices, top_n_indices_batch
+
+
+logger = logging.getLogger(__name__)
+
+CF_METHODS = ('user', 'item', 'mf')
+SIMILARITY_MEASURES = ('cosine', 'pearson', 'adjusted_cosine')
 
 
 class CollaborativeFilteringRecommender:
     """
     Collaborative Filtering Recommendation System.
-    Supports both User-Based and Item-Based approaches.
+    Supports User-Based, Item-Based and Matrix-Factorization approaches.
     """
     
     def __init__(
         self, 
         ratings_df: pd.DataFrame,
         movies_df: pd.DataFrame,
-        method: str = 'user'
+        method: str = 'user',
+        similarity: str = 'cosine',
+        n_neighbors: Optional[int] = None,
+        block_size: int = 1024,
+        movie_index: Optional[IdIndex] = None,
+        n_factors: int = 20,
+        n_jobs: int = 1,
+        ann: Optional[dict] = None
     ):
         """
         Initialize Collaborative Filtering Recommender.
@@ -28,60 +57,517 @@ class CollaborativeFilteringRecommender:
         Args:
             ratings_df: DataFrame with columns: userId, movieId, rating
             movies_df: DataFrame with columns: movieId, title
-            method: 'user' for user-based or 'item' for item-based filtering
+            method: 'user' for user-based, 'item' for item-based filtering, or
+                'mf' for a low-rank matrix factorization (truncated SVD)
+            similarity: 'cosine' on raw ratings, or 'pearson' / 'adjusted_cosine'
+                for cosine on ratings centered by each user's mean
+            n_neighbors: If set, store only the top n_neighbors similar users/items
+                per row in a sparse index instead of the full dense similarity
+                matrix; predictions then only draw on these neighbours
+            block_size: Number of rows scored at once when building the similarity matrix
+            movie_index: Optional prebuilt movieId index over movies_df rows
+                (e.g. DataLoader.movie_index); built from movies_df if omitted
+            n_factors: Number of latent factors for the 'mf' method
+            n_jobs: Number of threads building the similarity matrix (-1 for one per CPU)
+            ann: Optional LSH parameters (n_tables, window, n_bits, seed) to
+                find the n_neighbors approximately instead of scoring every
+                pair (see similarity.lsh_top_k_similarity); needs n_neighbors
         """
         self.ratings_df = ratings_df.copy()
+        self._configure(movies_df, method, similarity, n_neighbors, block_size, n_factors, n_jobs, ann)
+        
+        # Build the sparse user-movie matrix directly from the rating triples
+        builder = RatingMatrixBuilder()
+        builder.add_frame(self.ratings_df)
+        self._fit(*builder.build(), movie_index)
+    
+    @classmethod
+    def from_rating_matrix(
+        cls,
+        rating_matrix: csr_matrix,
+        user_ids: np.ndarray,
+        movie_ids: np.ndarray,
+        movies_df: pd.DataFrame,
+        movie_index: Optional[IdIndex] = None,
+        **kwargs
+    ) -> 'CollaborativeFilteringRecommender':
+        """
+        Build a recommender from a prebuilt sparse rating matrix.
+        
+        Args:
+            rating_matrix: Sparse user x movie ratings (0 = unrated), e.g. from
+                RatingMatrixBuilder or DataLoader.load_rating_matrix
+            user_ids: User ID of each matrix row
+            movie_ids: Movie ID of each matrix column
+            movies_df: DataFrame with columns: movieId, title
+            movie_index: Optional prebuilt movieId index over movies_df rows
+            **kwargs: method, similarity, n_neighbors, block_size, n_factors, n_jobs,
+                ann as for the constructor
+            
+        Returns:
+            CollaborativeFilteringRecommender (ratings_df is None)
+        """
+        model = cls.__new__(cls)
+        model.ratings_df = None
+        model._configure(movies_df, **kwargs)
+        model._fit(rating_matrix, user_ids, movie_ids, movie_index)
+        return model
+    
+    @classmethod
+    def from_ratings_file(
+        cls,
+        filepath: str,
+        movies_df: pd.DataFrame,
+        chunksize: int = 1_000_000,
+        movie_index: Optional[IdIndex] = None,
+        **kwargs
+    ) -> 'CollaborativeFilteringRecommender':
+        """
+        Build a recommender by streaming a ratings CSV file in chunks.
+        
+        Only the sparse rating matrix is kept in memory; the file is never
+        loaded as a whole DataFrame.
+        
+        Args:
+            filepath: Path of a CSV file with columns: userId, movieId, rating
+            movies_df: DataFrame with columns: movieId, title
+            chunksize: Number of CSV rows parsed at once
+            movie_index: Optional prebuilt movieId index over movies_df rows
+            **kwargs: method, similarity, n_neighbors, block_size, n_factors, n_jobs,
+                ann as for the constructor
+            
+        Returns:
+            CollaborativeFilteringRecommender (ratings_df is None)
+        """
+        builder = RatingMatrixBuilder()
+        with timer('stage_seconds', stage='read_ratings'):
+            for chunk in read_rating_chunks(filepath, chunksize):
+                builder.add_frame(chunk)
+        return cls.from_rating_matrix(*builder.build(), movies_df, movie_index, **kwargs)
+    
+    def _configure(
+        self,
+        movies_df: pd.DataFrame,
+        method: str = 'user',
+        similarity: str = 'cosine',
+        n_neighbors: Optional[int] = None,
+        block_size: int = 1024,
+        n_factors: int = 20,
+        n_jobs: int = 1,
+        ann: Optional[dict] = None
+    ):
+        """Validate and store the model parameters."""
         self.movies_df = movies_df.copy()
         self.method = method.lower()
+        self.similarity = similarity.lower()
+        self.n_neighbors = n_neighbors
+        self.block_size = block_size
+        self.n_factors = n_factors
+        self.n_jobs = n_jobs
+        self.ann = ann
         
-        if self.method not in ['user', 'item']:
-            raise ValueError("Method must be 'user' or 'item'")
+        if self.method not in CF_METHODS:
+            raise ValueError("Method must be 'user', 'item' or 'mf'")
         
-        # Create user-movie matrix
-        self.user_movie_matrix = self.ratings_df.pivot_table(
-            index='userId',
-            columns='movieId',
-            values='rating'
-        ).fillna(0)
+        if self.similarity not in SIMILARITY_MEASURES:
+            raise ValueError(f"Similarity must be one of {', '.join(SIMILARITY_MEASURES)}")
+    
+    def _fit(
+        self,
+        rating_matrix: csr_matrix,
+        user_ids: np.ndarray,
+        movie_ids: np.ndarray,
+        movie_index: Optional[IdIndex] = None
+    ):
+        """
+        Fit the model on a sparse user x movie rating matrix.
         
-        # Create sparse matrix for efficient computation
-        self.sparse_matrix = csr_matrix(self.user_movie_matrix.values)
+        Args:
+            rating_matrix: Sparse ratings (0 = unrated)
+            user_ids: User ID of each matrix row
+            movie_ids: Movie ID of each matrix column
+            movie_index: Optional prebuilt movieId index over movies_df rows
+        """
+        start = time.perf_counter()
+        self.sparse_matrix = csr_matrix(rating_matrix, dtype=np.float64)
+        self._build_rating_statistics()
+        self._init_lookups(user_ids, movie_ids, movie_index)
         
-        # Build similarity matrix
+        # Build similarity matrix (or latent factors for matrix factorization)
         self.similarity_matrix = None
-        self._build_similarity_matrix()
+        self.user_factors = None
+        self.item_factors = None
+        if self.method == 'mf':
+            self._build_factor_model()
+        else:
+            self._build_similarity_matrix()
+        
+        logger.info(
+            "Built %s-based collaborative filtering model (matrix shape %s)", self.method, self.sparse_matrix.shape,
+            extra={
+                'method': self.method,
+                'shape': self.sparse_matrix.shape,
+                'ratings': self.sparse_matrix.nnz,
+                'elapsed_ms': elapsed_ms(start)
+            }
+        )
+    
+    @property
+    def user_movie_matrix(self) -> pd.DataFrame:
+        """
+        Dense user x movie rating table (0 = unrated), built on demand.
+        
+        Only meant for inspecting small datasets; the model itself works on
+        the sparse matrix.
+        """
+        return pd.DataFrame(
+            self.sparse_matrix.toarray(),
+            index=pd.Index(self.user_index.ids, name='userId'),
+            columns=pd.Index(self.column_index.ids, name='movieId')
+        )
+    
+    def _init_lookups(
+        self,
+        user_ids: np.ndarray,
+        movie_ids: np.ndarray,
+        movie_index: Optional[IdIndex] = None
+    ):
+        """
+        Set up ID maps for the matrix rows/columns and the column titles.
+        
+        Args:
+            user_ids: User ID of each matrix row
+            movie_ids: Movie ID of each matrix column
+            movie_index: Optional prebuilt movieId index over movies_df rows
+        """
+        # ID -> matrix position maps for users (rows) and movies (columns)
+        self.user_index = IdIndex(user_ids)
+        self.column_index = IdIndex(movie_ids)
+        
+        # Titles aligned with the matrix columns (None for movies missing from movies_df)
+        if movie_index is None:
+            movie_index = IdIndex(self.movies_df['movieId'].values)
+        self._column_titles = lookup_titles(
+            self.movies_df['title'].values,
+            movie_index,
+            movie_ids
+        )
+    
+    def _build_rating_statistics(self):
+        """
+        Cache per-user means and the mean-centered rating matrix.
+        
+        The centered matrix keeps the sparsity pattern of sparse_matrix
+        (a rating equal to the user's mean is stored as an explicit zero),
+        so it doubles as the set of rated entries.
+        """
+        counts = np.diff(self.sparse_matrix.indptr)
+        sums = np.asarray(self.sparse_matrix.sum(axis=1)).ravel()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.user_means = sums / counts
+        
+        self.centered_matrix = self.sparse_matrix.copy()
+        self.centered_matrix.data = (
+            self.centered_matrix.data - np.repeat(self.user_means, counts)
+        )
         
-        print(f"Built {self.method}-based collaborative filtering model")
-        print(f"Matrix shape: {self.user_movie_matrix.shape}")
+        self._rated_matrix = self.sparse_matrix.copy()
+        self._rated_matrix.data = np.ones_like(self._rated_matrix.data)
+        
+        # Column-major copy for per-movie lookups of raters
+        self._centered_by_movie = self.centered_matrix.tocsc()
+        self._centered_by_movie.sort_indices()
+    
+    def _similarity_vectors(self):
+        """Get the vectors compared by the similarity matrix (one row per user or movie)."""
+        if self.similarity == 'cosine':
+            vectors = self.sparse_matrix
+        else:
+            # Pearson (user-based) / adjusted cosine (item-based)
+            vectors = self.centered_matrix
+        
+        if self.method == 'item':
+            # Item-based: compute similarity between movies
+            vectors = vectors.T
+        return vectors
     
     def _build_similarity_matrix(self):
         """Build similarity matrix based on the chosen method."""
-        if self.method == 'user':
-            # User-based: compute similarity between users
-            self.similarity_matrix = cosine_similarity(self.sparse_matrix)
+        self.similarity_matrix = build_similarity_matrix(
+            self._similarity_vectors(),
+            n_neighbors=self.n_neighbors,
+            block_size=self.block_size,
+            n_jobs=self.n_jobs,
+            ann=self.ann
+        )
+        
+        # Neighbour weights used by the batch predictors
+        self._similarity_weights = positive_neighbour_weights(self.similarity_matrix)
+    
+    @timed('stage_seconds', stage='factorize')
+    def _build_factor_model(self):
+        """
+        Learn low-rank user and item factors with a truncated SVD.
+        
+        The SVD is taken of the mean-centered rating matrix, so unrated entries
+        stand for "the user's average" and a prediction is the user's mean plus
+        the dot product of the user and item factors.
+        """
+        n_components = min(self.n_factors, min(self.centered_matrix.shape) - 1)
+        if n_components < 1:
+            raise ValueError("Matrix factorization needs at least 2 users and 2 movies")
+        
+        svd = TruncatedSVD(n_components=n_components, random_state=42)
+        self.user_factors = svd.fit_transform(self.centered_matrix)
+        self.item_factors = svd.components_.T
+    
+    def add_ratings(
+        self,
+        ratings_df: pd.DataFrame,
+        rebuild_threshold: Optional[float] = None
+    ) -> Dict[str, object]:
+        """
+        Update the model with new ratings without refitting from scratch.
+        
+        A new rating for a (user, movie) pair that is already rated replaces
+        the old one; repeated pairs within ratings_df are averaged. Unseen
+        users and movies are appended as new matrix rows/columns. User means
+        and the centered matrices are recomputed, but only the similarity
+        rows/columns of the users (user-based) or movies (item-based) whose
+        vectors changed are rescored; see update_similarity_matrix for how a
+        top-K index is merged. For 'mf', the factors of the affected users
+        are re-projected onto the existing item factors and new movies get
+        zero factors (so their predictions are the user's mean).
+        
+        Args:
+            ratings_df: DataFrame with columns: userId, movieId, rating
+            rebuild_threshold: If set, refit the similarity (or factor) model in
+                full once more than this fraction of its rows is affected
+            
+        Returns:
+            Dictionary with n_ratings, new_users, new_movies, updated_rows, rebuilt
+        """
+        start = time.perf_counter()
+        builder = RatingMatrixBuilder()
+        builder.add_frame(ratings_df)
+        added, added_user_ids, added_movie_ids = builder.build()
+        summary = {
+            'n_ratings': builder.n_ratings,
+            'new_users': 0,
+            'new_movies': 0,
+            'updated_rows': 0,
+            'rebuilt': False
+        }
+        if added.nnz == 0:
+            return summary
+        
+        # Unseen users/movies become new rows/columns after the existing ones
+        new_users = added_user_ids[self.user_index.get_many(added_user_ids) < 0]
+        new_movies = added_movie_ids[self.column_index.get_many(added_movie_ids) < 0]
+        summary['new_users'] = len(new_users)
+        summary['new_movies'] = len(new_movies)
+        
+        n_old_users, n_old_movies = self.sparse_matrix.shape
+        user_ids = np.concatenate([self.user_index.ids, new_users])
+        movie_ids = np.concatenate([self.column_index.ids, new_movies])
+        shape = (len(user_ids), len(movie_ids))
+        
+        # Positions of the new ratings in the model's matrix
+        added = added.tocoo()
+        rows = IdIndex(user_ids).get_many(added_user_ids[added.row])
+        cols = IdIndex(movie_ids).get_many(added_movie_ids[added.col])
+        
+        # Existing ratings for the same pairs are replaced by the new ones
+        existing = self.sparse_matrix.tocoo()
+        replaced = np.isin(
+            existing.row.astype(np.int64) * shape[1] + existing.col,
+            rows * shape[1] + cols
+        )
+        self.sparse_matrix = csr_matrix(
+            (
+                np.concatenate([existing.data[~replaced], added.data]),
+                (
+                    np.concatenate([existing.row[~replaced], rows]),
+                    np.concatenate([existing.col[~replaced], cols])
+                )
+            ),
+            shape=shape
+        )
+        self._build_rating_statistics()
+        self._init_lookups(user_ids, movie_ids)
+        
+        if self.ratings_df is not None:
+            # Keep the frame in step with the matrix: new ratings supersede old ones for the same pairs
+            pairs = ['userId', 'movieId']
+            superseded = pd.MultiIndex.from_frame(self.ratings_df[pairs]).isin(
+                pd.MultiIndex.from_frame(ratings_df[pairs])
+            )
+            self.ratings_df = pd.concat([self.ratings_df[~superseded], ratings_df], ignore_index=True)
+        
+        affected_users = np.unique(rows)
+        if self.method in ('user', 'mf'):
+            changed = affected_users
+            n_total = shape[0]
+        elif self.similarity == 'cosine':
+            changed = np.unique(cols)
+            n_total = shape[1]
         else:
-            # Item-based: compute similarity between movies
-            self.similarity_matrix = cosine_similarity(self.sparse_matrix.T)
+            # Re-centering an affected user shifts every movie they rated
+            changed = np.unique(self.sparse_matrix[affected_users].indices)
+            n_total = shape[1]
+        summary['updated_rows'] = len(changed)
+        
+        rebuild = rebuild_threshold is not None and len(changed) > rebuild_threshold * n_total
+        summary['rebuilt'] = rebuild
+        
+        if self.method == 'mf':
+            if rebuild:
+                self._build_factor_model()
+            else:
+                n_factors = self.item_factors.shape[1]
+                self.item_factors = np.vstack([
+                    self.item_factors,
+                    np.zeros((shape[1] - n_old_movies, n_factors))
+                ])
+                self.user_factors = np.vstack([
+                    self.user_factors,
+                    np.zeros((shape[0] - n_old_users, n_factors))
+                ])
+                self.user_factors[changed] = self.centered_matrix[changed] @ self.item_factors
+        elif rebuild:
+            self._build_similarity_matrix()
+        else:
+            self.similarity_matrix = update_similarity_matrix(
+                self.similarity_matrix,
+                self._similarity_vectors(),
+                changed,
+                n_neighbors=self.n_neighbors,
+                block_size=self.block_size
+            )
+            self._similarity_weights = positive_neighbour_weights(self.similarity_matrix)
+        
+        logger.info(
+            "Updated %s-based collaborative filtering model with %d ratings (%d rows rescored%s)",
+            self.method, builder.n_ratings, len(changed), ', full rebuild' if rebuild else '',
+            extra={
+                'method': self.method,
+                'rows': builder.n_ratings,
+                'rescored': len(changed),
+                'rebuilt': rebuild,
+                'shape': self.sparse_matrix.shape,
+                'elapsed_ms': elapsed_ms(start)
+            }
+        )
+        return summary
+    
+    def save(self, path: str, source: Optional[dict] = None) -> None:
+        """
+        Save the fitted model to an artifact directory.
+        
+        Args:
+            path: Directory to write (replaced atomically if it exists)
+            source: Optional fingerprint of the data the model was built from
+        """
+        with persistence.artifact_writer(path) as tmp_path:
+            persistence.save_frame(tmp_path, 'movies', self.movies_df)
+            persistence.save_array(tmp_path, 'user_ids', self.user_index.ids)
+            persistence.save_array(tmp_path, 'movie_ids', self.column_index.ids)
+            persistence.save_matrix(tmp_path, 'ratings', self.sparse_matrix)
+            persistence.save_matrix(tmp_path, 'centered', self.centered_matrix)
+            persistence.save_matrix(tmp_path, 'centered_by_movie', self._centered_by_movie)
+            persistence.save_array(tmp_path, 'user_means', self.user_means)
+            
+            if self.method == 'mf':
+                persistence.save_array(tmp_path, 'user_factors', self.user_factors)
+                persistence.save_array(tmp_path, 'item_factors', self.item_factors)
+            else:
+                persistence.save_matrix(tmp_path, 'similarity', self.similarity_matrix)
+                persistence.save_matrix(tmp_path, 'weights', self._similarity_weights)
+            
+            persistence.write_manifest(
+                tmp_path,
+                'collaborative',
+                {
+                    'method': self.method,
+                    'similarity': self.similarity,
+                    'n_neighbors': self.n_neighbors,
+                    'block_size': self.block_size,
+                    'n_factors': self.n_factors,
+                    'ann': self.ann
+                },
+                source
+            )
+    
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'CollaborativeFilteringRecommender':
+        """
+        Load a model written by save() without refitting it.
+        
+        The loaded model serves predictions and recommendations from the
+        stored matrices; ratings_df is not stored and is None.
+        
+        Args:
+            path: Artifact directory
+            mmap_mode: Memory-map mode for the stored arrays ('r' shares pages
+                between processes; None reads them into memory)
+            
+        Returns:
+            CollaborativeFilteringRecommender ready to serve recommendations
+        """
+        manifest = persistence.read_manifest(path, 'collaborative')
+        params = manifest['params']
+        
+        model = cls.__new__(cls)
+        model.ratings_df = None
+        model.movies_df = persistence.load_frame(path, 'movies')
+        model.method = params['method']
+        model.similarity = params['similarity']
+        model.n_neighbors = params['n_neighbors']
+        model.block_size = params['block_size']
+        model.n_factors = params['n_factors']
+        model.n_jobs = 1
+        model.ann = params.get('ann')
+        model._init_lookups(
+            persistence.load_array(path, 'user_ids', mmap_mode),
+            persistence.load_array(path, 'movie_ids', mmap_mode)
+        )
+        
+        model.sparse_matrix = persistence.load_matrix(path, 'ratings', mmap_mode)
+        model.centered_matrix = persistence.load_matrix(path, 'centered', mmap_mode)
+        model._centered_by_movie = persistence.load_matrix(path, 'centered_by_movie', mmap_mode)
+        model.user_means = persistence.load_array(path, 'user_means', mmap_mode)
+        model._rated_matrix = csr_matrix(
+            (np.ones_like(model.sparse_matrix.data), model.sparse_matrix.indices, model.sparse_matrix.indptr),
+            shape=model.sparse_matrix.shape
+        )
+        
+        model.similarity_matrix = None
+        model.user_factors = None
+        model.item_factors = None
+        if model.method == 'mf':
+            model.user_factors = persistence.load_array(path, 'user_factors', mmap_mode)
+            model.item_factors = persistence.load_array(path, 'item_factors', mmap_mode)
+        else:
+            model.similarity_matrix = persistence.load_matrix(path, 'similarity', mmap_mode)
+            model._similarity_weights = persistence.load_matrix(path, 'weights', mmap_mode)
+        
+        return model
     
     def _get_user_index(self, user_id: int) -> Optional[int]:
         """Get index of user in the matrix."""
-        if user_id not in self.user_movie_matrix.index:
-            return None
-        return self.user_movie_matrix.index.get_loc(user_id)
+        return self.user_index.get(user_id)
     
     def _get_movie_index(self, movie_id: int) -> Optional[int]:
         """Get index of movie in the matrix."""
-        if movie_id not in self.user_movie_matrix.columns:
-            return None
-        return self.user_movie_matrix.columns.get_loc(movie_id)
+        return self.column_index.get(movie_id)
     
     def _get_movie_id_by_index(self, index: int) -> int:
         """Get movie ID by its index in the matrix."""
-        return self.user_movie_matrix.columns[index]
+        return self.column_index.ids[index]
     
     def _get_user_id_by_index(self, index: int) -> int:
         """Get user ID by its index in the matrix."""
-        return self.user_movie_matrix.index[index]
+        return self.user_index.ids[index]
     
     def predict_rating(
         self, 
@@ -102,8 +588,34 @@ class CollaborativeFilteringRecommender:
         """
         if self.method == 'user':
             return self._predict_user_based(user_id, movie_id, k)
-        else:
+        elif self.method == 'item':
             return self._predict_item_based(user_id, movie_id, k)
+        else:
+            return self._predict_mf(user_id, movie_id)
+    
+    def _predict_mf(self, user_id: int, movie_id: int) -> Optional[float]:
+        """
+        Predict rating from the latent factors.
+        
+        Args:
+            user_id: User ID
+            movie_id: Movie ID
+            
+        Returns:
+            Predicted rating or None
+        """
+        user_idx = self._get_user_index(user_id)
+        movie_idx = self._get_movie_index(movie_id)
+        
+        if user_idx is None or movie_idx is None:
+            return None
+        
+        prediction = self.user_means[user_idx] + self.user_factors[user_idx] @ self.item_factors[movie_idx]
+        
+        # Clamp prediction to rating scale
+        prediction = max(0.5, min(5.0, prediction))
+        
+        return float(prediction)
     
     def _predict_user_based(
         self, 
@@ -129,63 +641,37 @@ class CollaborativeFilteringRecommender:
             return None
         
         # Get user's average rating
-        user_ratings = self.user_movie_matrix.iloc[user_idx]
-        user_mean = user_ratings[user_ratings > 0].mean()
+        user_mean = self.user_means[user_idx]
         
         if pd.isna(user_mean):
             return None
         
-        # Get similarity scores for this user
-        user_similarities = self.similarity_matrix[user_idx]
-        
-        # Get users who rated this movie
-        movie_ratings = self.user_movie_matrix.iloc[:, movie_idx]
-        rated_users = movie_ratings[movie_ratings > 0].index
+        # Get users who rated this movie and their mean-centered ratings
+        start = self._centered_by_movie.indptr[movie_idx]
+        end = self._centered_by_movie.indptr[movie_idx + 1]
+        rated_user_indices = self._centered_by_movie.indices[start:end]
+        centered_ratings = self._centered_by_movie.data[start:end]
         
-        if len(rated_users) == 0:
+        if len(rated_user_indices) == 0:
             return None
         
-        # Get indices of users who rated the movie
-        rated_user_indices = [self._get_user_index(uid) for uid in rated_users]
-        
-        # Get similarities and ratings for these users
-        similarities = []
-        ratings = []
-        
-        for rated_user_idx in rated_user_indices:
-            if rated_user_idx == user_idx:
-                continue
-            
-            similarity = user_similarities[rated_user_idx]
-            if similarity > 0:  # Only consider positive similarities
-                rating = movie_ratings.iloc[rated_user_idx]
-                similarities.append(similarity)
-                ratings.append(rating)
+        # Only consider positive similarities from other users
+        similarities = similarity_row(self.similarity_matrix, user_idx)[rated_user_indices]
+        keep = (similarities > 0) & (rated_user_indices != user_idx)
+        similarities = similarities[keep]
+        centered_ratings = centered_ratings[keep]
         
         if len(similarities) == 0:
             return None
         
         # Get top k similar users
         if len(similarities) > k:
-            top_k_indices = np.argsort(similarities)[-k:][::-1]
-            similarities = [similarities[i] for i in top_k_indices]
-            ratings = [ratings[i] for i in top_k_indices]
-        
-        # Calculate weighted average
-        similarities = np.array(similarities)
-        ratings = np.array(ratings)
-        
-        # Get mean ratings for similar users
-        similar_user_means = []
-        for rated_user_idx in rated_user_indices[:len(ratings)]:
-            similar_user_ratings = self.user_movie_matrix.iloc[rated_user_idx]
-            similar_user_mean = similar_user_ratings[similar_user_ratings > 0].mean()
-            similar_user_means.append(similar_user_mean)
-        
-        similar_user_means = np.array(similar_user_means)
+            top_k_indices = np.argsort(-similarities, kind='stable')[:k]
+            similarities = similarities[top_k_indices]
+            centered_ratings = centered_ratings[top_k_indices]
         
         # Weighted average prediction
-        numerator = np.sum(similarities * (ratings - similar_user_means))
+        numerator = np.sum(similarities * centered_ratings)
         denominator = np.sum(np.abs(similarities))
         
         if denominator == 0:
@@ -222,42 +708,30 @@ class CollaborativeFilteringRecommender:
             return None
         
         # Get movies rated by this user
-        user_ratings = self.user_movie_matrix.iloc[user_idx]
-        rated_movies = user_ratings[user_ratings > 0]
+        start = self.sparse_matrix.indptr[user_idx]
+        end = self.sparse_matrix.indptr[user_idx + 1]
+        rated_movie_indices = self.sparse_matrix.indices[start:end]
+        ratings = self.sparse_matrix.data[start:end]
         
-        if len(rated_movies) == 0:
+        if len(rated_movie_indices) == 0:
             return None
         
-        # Get similarity scores for this movie
-        movie_similarities = self.similarity_matrix[movie_idx]
-        
-        # Get similarities and ratings for movies the user has rated
-        similarities = []
-        ratings = []
-        
-        for rated_movie_id, rating in rated_movies.items():
-            rated_movie_idx = self._get_movie_index(rated_movie_id)
-            if rated_movie_idx is None or rated_movie_idx == movie_idx:
-                continue
-            
-            similarity = movie_similarities[rated_movie_idx]
-            if similarity > 0:  # Only consider positive similarities
-                similarities.append(similarity)
-                ratings.append(rating)
+        # Only consider positive similarities to other movies
+        similarities = similarity_row(self.similarity_matrix, movie_idx)[rated_movie_indices]
+        keep = (similarities > 0) & (rated_movie_indices != movie_idx)
+        similarities = similarities[keep]
+        ratings = ratings[keep]
         
         if len(similarities) == 0:
             return None
         
         # Get top k similar items
         if len(similarities) > k:
-            top_k_indices = np.argsort(similarities)[-k:][::-1]
-            similarities = [similarities[i] for i in top_k_indices]
-            ratings = [ratings[i] for i in top_k_indices]
+            top_k_indices = np.argsort(-similarities, kind='stable')[:k]
+            similarities = similarities[top_k_indices]
+            ratings = ratings[top_k_indices]
         
         # Calculate weighted average
-        similarities = np.array(similarities)
-        ratings = np.array(ratings)
-        
         numerator = np.sum(similarities * ratings)
         denominator = np.sum(np.abs(similarities))
         
@@ -271,6 +745,156 @@ class CollaborativeFilteringRecommender:
         
         return float(prediction)
     
+    def predict_ratings_batch(
+        self,
+        user_ids: List[int],
+        k: int = 50
+    ) -> np.ndarray:
+        """
+        Predict ratings for every movie in the matrix for a batch of users.
+        
+        Produces the same values as calling predict_rating for each
+        user-movie pair, but scores the whole batch with sparse matrix
+        products instead of per-pair Python loops.
+        
+        Args:
+            user_ids: User IDs to score
+            k: Number of similar users/items to consider (ignored for 'mf')
+            
+        Returns:
+            Array of shape (len(user_ids), n_movies) aligned with the matrix
+            columns. Entries are NaN where no prediction can be made,
+            including every entry of an unknown user.
+        """
+        n_movies = self.sparse_matrix.shape[1]
+        predictions = np.full((len(user_ids), n_movies), np.nan)
+        
+        user_indices = self.user_index.get_many(user_ids)
+        rows = np.flatnonzero(user_indices >= 0)
+        if len(rows) == 0:
+            return predictions
+        
+        known_indices = user_indices[rows]
+        with timer('stage_seconds', stage=f'predict_{self.method}'):
+            if self.method == 'user':
+                predictions[rows] = self._predict_user_based_batch(known_indices, k)
+            elif self.method == 'item':
+                predictions[rows] = self._predict_item_based_batch(known_indices, k)
+            else:
+                # One matrix product scores the batch against the whole catalog
+                scores = self.user_factors[known_indices] @ self.item_factors.T
+                predictions[rows] = np.clip(
+                    self.user_means[known_indices][:, None] + scores, 0.5, 5.0
+                )
+        inc('predicted_users', len(rows), method=self.method)
+        
+        return predictions
+    
+    def _predict_user_based_batch(self, user_indices: np.ndarray, k: int) -> np.ndarray:
+        """
+        Vectorized user-based prediction for a batch of matrix row indices.
+        
+        Args:
+            user_indices: Row indices of the users to score
+            k: Number of similar users to consider per movie
+            
+        Returns:
+            Array of shape (len(user_indices), n_movies), NaN where undefined
+        """
+        ratings = self.sparse_matrix
+        centered = self.centered_matrix
+        weights = self._similarity_weights[user_indices]
+        max_raters = np.diff(self._centered_by_movie.indptr).max(initial=0)
+        
+        if k >= max_raters:
+            # No movie has more than k raters, so every positive neighbour counts
+            numerator = (weights @ centered).toarray()
+            denominator = (weights @ self._rated_matrix).toarray()
+        else:
+            numerator = np.zeros((len(user_indices), ratings.shape[1]))
+            denominator = np.zeros_like(numerator)
+            for row, user_weights in enumerate(weights.toarray()):
+                neighbours = np.flatnonzero(user_weights)
+                if len(neighbours) == 0:
+                    continue
+                neighbours = neighbours[np.argsort(-user_weights[neighbours], kind='stable')]
+                
+                # Rows of the CSC slice are in descending-similarity order, so the
+                # position of an entry within its column is its neighbour rank
+                neighbour_ratings = centered[neighbours].tocsc()
+                neighbour_ratings.sort_indices()
+                column_counts = np.diff(neighbour_ratings.indptr)
+                columns = np.repeat(np.arange(ratings.shape[1]), column_counts)
+                ranks = np.arange(neighbour_ratings.nnz) - np.repeat(
+                    neighbour_ratings.indptr[:-1], column_counts
+                )
+                keep = ranks < k
+                
+                entry_weights = user_weights[neighbours][neighbour_ratings.indices[keep]]
+                numerator[row] = np.bincount(
+                    columns[keep],
+                    weights=entry_weights * neighbour_ratings.data[keep],
+                    minlength=ratings.shape[1]
+                )
+                denominator[row] = np.bincount(
+                    columns[keep],
+                    weights=entry_weights,
+                    minlength=ratings.shape[1]
+                )
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            predictions = self.user_means[user_indices][:, None] + numerator / denominator
+        predictions[denominator == 0] = np.nan
+        
+        # Clamp predictions to rating scale
+        return np.clip(predictions, 0.5, 5.0)
+    
+    def _predict_item_based_batch(self, user_indices: np.ndarray, k: int) -> np.ndarray:
+        """
+        Vectorized item-based prediction for a batch of matrix row indices.
+        
+        Args:
+            user_indices: Row indices of the users to score
+            k: Number of similar items to consider per movie
+            
+        Returns:
+            Array of shape (len(user_indices), n_movies), NaN where undefined
+        """
+        user_ratings = self.sparse_matrix[user_indices]
+        rated = self._rated_matrix[user_indices]
+        
+        weights_t = self._similarity_weights.T.tocsr()
+        max_rated = np.diff(user_ratings.indptr).max(initial=0)
+        
+        if k >= max_rated:
+            # No user has rated more than k movies, so every positive neighbour counts
+            numerator = (user_ratings @ weights_t).toarray()
+            denominator = (rated @ weights_t).toarray()
+        else:
+            numerator = np.zeros(user_ratings.shape)
+            denominator = np.zeros_like(numerator)
+            for row in range(user_ratings.shape[0]):
+                start, end = user_ratings.indptr[row], user_ratings.indptr[row + 1]
+                rated_movies = user_ratings.indices[start:end]
+                movie_ratings = user_ratings.data[start:end]
+                
+                # Similarity of every movie to each movie this user rated
+                neighbour_weights = weights_t[rated_movies].T.toarray()
+                if len(rated_movies) > k:
+                    top_k = np.argsort(-neighbour_weights, axis=1, kind='stable')[:, :k]
+                    neighbour_weights = np.take_along_axis(neighbour_weights, top_k, axis=1)
+                    movie_ratings = movie_ratings[top_k]
+                
+                numerator[row] = (neighbour_weights * movie_ratings).sum(axis=1)
+                denominator[row] = neighbour_weights.sum(axis=1)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            predictions = numerator / denominator
+        predictions[denominator == 0] = np.nan
+        
+        # Clamp predictions to rating scale
+        return np.clip(predictions, 0.5, 5.0)
+    
     def recommend_for_user(
         self,
         user_id: int,
@@ -295,30 +919,82 @@ class CollaborativeFilteringRecommender:
         if user_idx is None:
             return []
         
-        # Get movies already rated by user
-        user_ratings = self.user_movie_matrix.iloc[user_idx]
-        rated_movie_ids = set(user_ratings[user_ratings > 0].index)
+        # Predict ratings for all movies in one batch
+        predictions = self.predict_ratings_batch([user_id], k)[0]
         
-        # Predict ratings for all unrated movies
-        recommendations = []
+        # Keep unrated movies with a known title and a high enough prediction
+        with np.errstate(invalid='ignore'):
+            mask = (predictions >= min_rating) & pd.notna(self._column_titles)
         
-        for movie_id in self.user_movie_matrix.columns:
-            if movie_id in rated_movie_ids:
-                continue
-            
-            predicted_rating = self.predict_rating(user_id, movie_id, k)
+        # Select top N by predicted rating (descending)
+        top_indices = top_n_indices(
+            predictions,
+            n_recommendations,
+            mask=mask,
+            exclude=self.sparse_matrix[user_idx].indices
+        )
+        
+        return [
+            (self._column_titles[idx], float(predictions[idx]))
+            for idx in top_indices
+        ]
+    
+    @timed('stage_seconds', stage='recommend_users')
+    def recommend_for_users(
+        self,
+        user_ids: List[int],
+        n_recommendations: int = 10,
+        k: int = 50,
+        min_rating: float = 3.0,
+        batch_size: int = 256
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate recommendations for many users at once.
+        
+        Gives the same results as recommend_for_user for each user (up to
+        floating-point rounding between near-tied 'mf' predictions), but
+        predicts and ranks batch_size users at a time with matrix operations.
+        
+        Args:
+            user_ids: User IDs
+            n_recommendations: Number of recommendations per user
+            k: Number of similar users/items to consider
+            min_rating: Minimum predicted rating to include
+            batch_size: Number of users scored at once
             
-            if predicted_rating is not None and predicted_rating >= min_rating:
-                # Get movie title
-                movie_info = self.movies_df[self.movies_df['movieId'] == movie_id]
-                if len(movie_info) > 0:
-                    movie_title = movie_info.iloc[0]['title']
-                    recommendations.append((movie_title, predicted_rating))
+        Returns:
+            Tuple of (movie IDs, predicted ratings), each of shape
+            (len(user_ids), n_recommendations), best first. Missing entries
+            (unknown users or too few candidates) are -1 / NaN.
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        result_ids = np.full((len(user_ids), n_recommendations), -1, dtype=np.int64)
+        result_ratings = np.full((len(user_ids), n_recommendations), np.nan)
+        has_title = pd.notna(self._column_titles)
         
-        # Sort by predicted rating (descending) and return top N
-        recommendations.sort(key=lambda x: x[1], reverse=True)
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            predictions = self.predict_ratings_batch(batch, k)
+            
+            # Never recommend a movie the user has already rated
+            user_indices = self.user_index.get_many(batch)
+            known = np.flatnonzero(user_indices >= 0)
+            rated = self.sparse_matrix[user_indices[known]]
+            predictions[np.repeat(known, np.diff(rated.indptr)), rated.indices] = np.nan
+            
+            with np.errstate(invalid='ignore'):
+                mask = (predictions >= min_rating) & has_title
+            top = top_n_indices_batch(predictions, n_recommendations, mask=mask)
+            
+            found = top >= 0
+            batch_ids = np.full(top.shape, -1, dtype=np.int64)
+            batch_ids[found] = self.column_index.ids[top[found]]
+            result_ids[start:start + len(batch)] = batch_ids
+            result_ratings[start:start + len(batch)] = np.where(
+                found, np.take_along_axis(predictions, np.maximum(top, 0), axis=1), np.nan
+            )
         
-        return recommendations[:n_recommendations]
+        return result_ids, result_ratings
     
     def get_similar_users(self, user_id: int, n: int = 10) -> List[Tuple[int, float]]:
         """
@@ -338,15 +1014,13 @@ class CollaborativeFilteringRecommender:
         if user_idx is None:
             return []
         
-        similarities = list(enumerate(self.similarity_matrix[user_idx]))
-        similarities = sorted(similarities, key=lambda x: x[1], reverse=True)
-        
-        similar_users = []
-        for idx, score in similarities[1:n+1]:  # Skip self (index 0)
-            similar_user_id = self._get_user_id_by_index(idx)
-            similar_users.append((similar_user_id, float(score)))
+        neighbour_indices, neighbour_scores = row_neighbours(self.similarity_matrix, user_idx)
+        top = top_n_indices(neighbour_scores, n, mask=neighbour_indices != user_idx)
         
-        return similar_users
+        return [
+            (self._get_user_id_by_index(idx), float(score))
+            for idx, score in zip(neighbour_indices[top], neighbour_scores[top])
+        ]
     
     def get_similar_movies(self, movie_id: int, n: int = 10) -> List[Tuple[str, float]]:
         """
@@ -366,15 +1040,56 @@ class CollaborativeFilteringRecommender:
         if movie_idx is None:
             return []
         
-        similarities = list(enumerate(self.similarity_matrix[movie_idx]))
-        similarities = sorted(similarities, key=lambda x: x[1], reverse=True)
+        neighbour_indices, neighbour_scores = row_neighbours(self.similarity_matrix, movie_idx)
+        mask = (neighbour_indices != movie_idx) & pd.notna(self._column_titles[neighbour_indices])
+        top = top_n_indices(neighbour_scores, n, mask=mask)
+        
+        return [
+            (self._column_titles[idx], float(score))
+            for idx, score in zip(neighbour_indices[top], neighbour_scores[top])
+        ]
+    
+    def evaluate(
+        self,
+        ratings_df: pd.DataFrame,
+        k: int = 50,
+        batch_size: int = 1024
+    ) -> Dict[str, float]:
+        """
+        Compare predicted ratings against known ratings.
+        
+        Predictions come from the batch path, batch_size users at a time.
+        Pairs that cannot be predicted (unknown user or movie, no neighbours)
+        are left out of the error metrics and reported through coverage.
+        
+        Args:
+            ratings_df: DataFrame with columns: userId, movieId, rating
+            k: Number of similar users/items to consider
+            batch_size: Number of users scored per batch
+            
+        Returns:
+            Dictionary with rmse, mae, n_predicted and coverage
+        """
+        actual = ratings_df['rating'].to_numpy(dtype=float)
+        movie_positions = self.column_index.get_many(ratings_df['movieId'].values)
+        unique_users, user_rows = np.unique(ratings_df['userId'].values, return_inverse=True)
+        
+        predicted = np.full(len(ratings_df), np.nan)
+        order = np.argsort(user_rows, kind='stable')
+        bounds = np.searchsorted(user_rows[order], np.arange(0, len(unique_users) + batch_size, batch_size))
+        
+        for batch, start in enumerate(range(0, len(unique_users), batch_size)):
+            pairs = order[bounds[batch]:bounds[batch + 1]]
+            pairs = pairs[movie_positions[pairs] >= 0]
+            batch_predictions = self.predict_ratings_batch(unique_users[start:start + batch_size], k)
+            predicted[pairs] = batch_predictions[user_rows[pairs] - start, movie_positions[pairs]]
         
-        similar_movies = []
-        for idx, score in similarities[1:n+1]:  # Skip self
-            similar_movie_id = self._get_movie_id_by_index(idx)
-            movie_info = self.movies_df[self.movies_df['movieId'] == similar_movie_id]
-            if len(movie_info) > 0:
-                movie_title = movie_info.iloc[0]['title']
-                similar_movies.append((movie_title, float(score)))
+        mask = ~np.isnan(predicted)
+        n_predicted = int(mask.sum())
         
-        return similar_movies
+        return {
+            'rmse': float(calculate_rmse(actual[mask], predicted[mask])) if n_predicted else float('nan'),
+            'mae': float(calculate_mae(actual[mask], predicted[mask])) if n_predicted else float('nan'),
+            'n_predicted': n_predicted,
+            'coverage': n_predicted / len(ratings_df) if len(ratings_df) else 0.0
+        }
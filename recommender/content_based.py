@@ -3,98 +3,263 @@ Content-Based Filtering Recommendation System for Bollywood Movies
 Uses genres, IMDb ratings, and metadata to find similar movies
 """
 
+import logging
+import time
+
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from typing import List, Tuple, Optional
 
+from . import persistence
+from .ann import LSHIndex
+from .data_loader import IdIndex, lookup_titles
+from .genres import GenreIndex
+from .log import elapsed_ms
+from .metrics import timed, timer
+from .search import SearchIndex
+from .similarity import build_similarity_matrix, row_neighbours, similarity_rows
+from .utils import top_n_indices, top_n_indices_batch
+
+
+logger = logging.getLogger(__name__)
+
 
 class ContentBasedRecommender:
     """
     Content-based recommendation system using movie genres and IMDb ratings.
     """
     
-    def __init__(self, movies_df: pd.DataFrame):
+    def __init__(
+        self,
+        movies_df: pd.DataFrame,
+        n_neighbors: Optional[int] = None,
+        block_size: int = 1024,
+        movie_index: Optional[IdIndex] = None,
+        n_jobs: int = 1,
+        ann: Optional[dict] = None
+    ):
         """
         Initialize Content-Based Recommender.
         
         Args:
             movies_df: DataFrame with columns: movieId, title, genres, imdb_rating, year, director
+            n_neighbors: If set, store only the top n_neighbors similar movies per
+                movie in a sparse index instead of the full dense similarity matrix
+            block_size: Number of movies scored at once when building the similarity matrix
+            movie_index: Optional prebuilt movieId index over movies_df rows
+                (e.g. DataLoader.movie_index); built from movies_df if omitted
+            n_jobs: Number of threads building the similarity matrix (-1 for one per CPU)
+            ann: Optional LSH parameters (n_tables, window, n_bits, seed) to
+                find the n_neighbors approximately (see
+                similarity.lsh_top_k_similarity) and to score genre queries
+                only against the genre's movies near the query in an LSH
+                index; needs n_neighbors
         """
+        if ann is not None and n_neighbors is None:
+            raise ValueError("Approximate neighbours need n_neighbors")
         self.movies_df = movies_df.copy()
+        self.n_neighbors = n_neighbors
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self.ann = ann
+        self._init_lookups(movie_index)
         self.tfidf_matrix = None
         self.similarity_matrix = None
         self.vectorizer = None
         self._build_model()
     
+    def _init_lookups(self, movie_index: Optional[IdIndex] = None):
+        """Set up the ID index and column arrays derived from movies_df."""
+        # ID -> row position map shared with the data loader when available
+        if movie_index is None:
+            movie_index = IdIndex(self.movies_df['movieId'].values)
+        self.movie_index = movie_index
+        
+        # Column arrays used to filter and format ranked results
+        self._titles = self.movies_df['title'].to_numpy()
+        self._imdb_ratings = self.movies_df['imdb_rating'].to_numpy(dtype=float)
+        self._years = self.movies_df['year'].to_numpy()
+        self._genres = self.movies_df['genres'].to_numpy()
+        
+        # Title search index, built on the first title lookup
+        self._title_index = None
+        
+        # Genre bitsets and IMDb ordering, built on the first genre query
+        self._genre_index = None
+        
+        # LSH index over the TF-IDF vectors, built on the first genre query with ann
+        self._lsh_index = None
+    
+    @staticmethod
+    def _make_vectorizer() -> TfidfVectorizer:
+        """Create the (unfitted) TF-IDF vectorizer used for movie features."""
+        return TfidfVectorizer(
+            stop_words='english',
+            max_features=1000,
+            ngram_range=(1, 2)
+        )
+    
     def _build_model(self):
         """Build the TF-IDF model and similarity matrix."""
-        # Create combined features: genres + director for better recommendations
+        start = time.perf_counter()
+        # Create combined features: genres + director (+ cast when available) for better recommendations
         self.movies_df['features'] = (
-            self.movies_df['genres'].apply(lambda x: x.replace('|', ' ').lower()) + ' ' +
+            self.movies_df['genres'].astype(str).str.replace('|', ' ', regex=False).str.lower() + ' ' +
             self.movies_df['director'].str.lower().fillna('')
         )
+        if 'cast' in self.movies_df:
+            self.movies_df['features'] += ' ' + (
+                self.movies_df['cast'].fillna('').astype(str).str.replace('|', ' ', regex=False).str.lower()
+            )
         
         # Initialize TF-IDF Vectorizer
-        self.vectorizer = TfidfVectorizer(
-            stop_words='english',
-            max_features=1000,
-            ngram_range=(1, 2)
-        )
+        self.vectorizer = self._make_vectorizer()
         
         # Create TF-IDF matrix
-        self.tfidf_matrix = self.vectorizer.fit_transform(self.movies_df['features'])
+        with timer('stage_seconds', stage='vectorize'):
+            self.tfidf_matrix = self.vectorizer.fit_transform(self.movies_df['features'])
+        
+        # Compute cosine similarity matrix (or top-K neighbour index)
+        self.similarity_matrix = build_similarity_matrix(
+            self.tfidf_matrix,
+            n_neighbors=self.n_neighbors,
+            block_size=self.block_size,
+            n_jobs=self.n_jobs,
+            ann=self.ann
+        )
         
-        # Compute cosine similarity matrix
-        self.similarity_matrix = cosine_similarity(self.tfidf_matrix)
+        logger.info(
+            "Built content-based model with %d movies", self.similarity_matrix.shape[0],
+            extra={
+                'shape': self.tfidf_matrix.shape,
+                'neighbors': self.n_neighbors,
+                'elapsed_ms': elapsed_ms(start)
+            }
+        )
+    
+    def save(self, path: str, source: Optional[dict] = None) -> None:
+        """
+        Save the fitted model to an artifact directory.
         
-        print(f"✅ Built content-based model with {self.similarity_matrix.shape[0]} movies")
+        Args:
+            path: Directory to write (replaced atomically if it exists)
+            source: Optional fingerprint of the data the model was built from
+        """
+        with persistence.artifact_writer(path) as tmp_path:
+            persistence.save_frame(tmp_path, 'movies', self.movies_df)
+            persistence.save_array(tmp_path, 'movie_ids', self.movie_index.ids)
+            persistence.save_json(
+                tmp_path,
+                'vocabulary',
+                {term: int(col) for term, col in self.vectorizer.vocabulary_.items()}
+            )
+            persistence.save_array(tmp_path, 'idf', self.vectorizer.idf_)
+            persistence.save_matrix(tmp_path, 'tfidf', self.tfidf_matrix)
+            persistence.save_matrix(tmp_path, 'similarity', self.similarity_matrix)
+            persistence.write_manifest(
+                tmp_path,
+                'content',
+                {'n_neighbors': self.n_neighbors, 'block_size': self.block_size, 'ann': self.ann},
+                source
+            )
+    
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'ContentBasedRecommender':
+        """
+        Load a model written by save() without refitting it.
+        
+        Args:
+            path: Artifact directory
+            mmap_mode: Memory-map mode for the stored arrays ('r' shares pages
+                between processes; None reads them into memory)
+            
+        Returns:
+            ContentBasedRecommender ready to serve recommendations
+        """
+        manifest = persistence.read_manifest(path, 'content')
+        
+        model = cls.__new__(cls)
+        model.movies_df = persistence.load_frame(path, 'movies')
+        model.n_neighbors = manifest['params']['n_neighbors']
+        model.block_size = manifest['params']['block_size']
+        model.n_jobs = 1
+        model.ann = manifest['params'].get('ann')
+        model._init_lookups(IdIndex(persistence.load_array(path, 'movie_ids', mmap_mode)))
+        
+        model.vectorizer = cls._make_vectorizer()
+        model.vectorizer.vocabulary_ = persistence.load_json(path, 'vocabulary')
+        model.vectorizer.idf_ = np.asarray(persistence.load_array(path, 'idf', mmap_mode))
+        model.tfidf_matrix = persistence.load_matrix(path, 'tfidf', mmap_mode)
+        model.similarity_matrix = persistence.load_matrix(path, 'similarity', mmap_mode)
+        
+        return model
     
     def get_movie_index(self, movie_id: int) -> Optional[int]:
         """
-        Get the index of a movie in the DataFrame.
+        Get the row position of a movie in the DataFrame.
         
         Args:
             movie_id: Movie ID to look up
             
         Returns:
-            Index in the DataFrame or None if not found
+            Row position in the DataFrame or None if not found
         """
-        mask = self.movies_df['movieId'] == movie_id
-        if mask.sum() == 0:
-            return None
-        return self.movies_df[mask].index[0]
+        return self.movie_index.get(movie_id)
+    
+    def get_titles(self, movie_ids: List[int]) -> np.ndarray:
+        """
+        Look up the titles of many movies at once.
+        
+        Args:
+            movie_ids: Movie IDs to look up
+            
+        Returns:
+            Object array of titles, None where the movie ID is unknown
+        """
+        return lookup_titles(self._titles, self.movie_index, movie_ids)
     
     def get_movie_id_by_title(self, title: str, exact_match: bool = False) -> Optional[int]:
         """
-        Get movie ID by title (partial or exact match).
+        Get movie ID by title (partial, exact or closest match).
         
         Args:
             title: Movie title to search for
             exact_match: If True, requires exact match; otherwise partial match
+                (each word of title must start a word of the movie title),
+                falling back to the closest spelling when nothing matches
             
         Returns:
             Movie ID or None if not found
         """
-        title_lower = title.lower()
+        if self._title_index is None:
+            self._title_index = SearchIndex([('title', self._titles.tolist())], self._imdb_ratings)
         
-        if exact_match:
-            mask = self.movies_df['title'].str.lower() == title_lower
-        else:
-            mask = self.movies_df['title'].str.lower().str.contains(title_lower, na=False)
+        # Candidates have every query word as a title word prefix, highest IMDb rating first
+        matches = self._title_index.search(title, limit=None, fuzzy=False)
         
-        matches = self.movies_df[mask]
+        if exact_match:
+            title_lower = title.lower()
+            matches = [idx for idx in matches if self._titles[idx].lower() == title_lower]
+        elif len(matches) == 0:
+            # Possibly misspelled - use the closest title within the edit distance bound
+            closest = self._title_index.fuzzy.lookup(title, limit=1)
+            if closest:
+                best_match, distance, _ = closest[0]
+                logger.info(
+                    "No movies matching '%s'. Using closest title: %s (edit distance %d)",
+                    title, self._titles[best_match], distance
+                )
+                return int(self.movie_index.ids[best_match])
         
         if len(matches) == 0:
             return None
-        elif len(matches) == 1:
-            return int(matches.iloc[0]['movieId'])
-        else:
-            # Multiple matches - return the one with highest IMDb rating
-            best_match = matches.loc[matches['imdb_rating'].idxmax()]
-            print(f"📋 Found {len(matches)} movies matching '{title}'. Using: {best_match['title']}")
-            return int(best_match['movieId'])
+        
+        best_match = matches[0]
+        if len(matches) > 1:
+            # Multiple matches - use the one with highest IMDb rating
+            logger.info("Found %d movies matching '%s'. Using: %s", len(matches), title, self._titles[best_match])
+        return int(self.movie_index.ids[best_match])
     
     def recommend_by_movie(
         self, 
@@ -115,93 +280,183 @@ class ContentBasedRecommender:
         Returns:
             List of (movie_title, similarity_score, imdb_rating, year) tuples
         """
+        positions, scores = self._rank_similar(movie_id, n_recommendations, exclude_self, min_imdb_rating)
+        return self._format_scored(positions, scores)
+    
+    def get_similar_movie_ids(
+        self,
+        movie_id: int,
+        n_recommendations: int = 10,
+        exclude_self: bool = True,
+        min_imdb_rating: float = 0.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the IDs of the movies most similar to a given movie.
+        
+        Args:
+            movie_id: Movie ID to base recommendations on
+            n_recommendations: Number of movies to return
+            exclude_self: Whether to exclude the input movie from results
+            min_imdb_rating: Minimum IMDb rating filter
+            
+        Returns:
+            Tuple of (movie IDs, similarity scores), best first
+        """
+        positions, scores = self._rank_similar(movie_id, n_recommendations, exclude_self, min_imdb_rating)
+        return self.movie_index.ids[positions], scores
+    
+    @timed('stage_seconds', stage='similar_movies')
+    def get_similar_movie_ids_batch(
+        self,
+        movie_ids: List[int],
+        n_recommendations: int = 10,
+        exclude_self: bool = True,
+        min_imdb_rating: float = 0.0,
+        batch_size: int = 1024
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the most similar movies for many movies at once.
+        
+        Gives the same results as get_similar_movie_ids for each movie, but
+        ranks batch_size similarity rows at a time with array operations.
+        
+        Args:
+            movie_ids: Movie IDs to base recommendations on
+            n_recommendations: Number of movies to return per movie
+            exclude_self: Whether to exclude each input movie from its results
+            min_imdb_rating: Minimum IMDb rating filter
+            batch_size: Number of similarity rows ranked at once
+            
+        Returns:
+            Tuple of (movie IDs, similarity scores), each of shape
+            (len(movie_ids), n_recommendations), best first. Missing entries
+            (unknown input movies or too few candidates) are -1 / NaN.
+        """
+        positions = self.movie_index.get_many(movie_ids)
+        result_ids = np.full((len(positions), n_recommendations), -1, dtype=np.int64)
+        result_scores = np.full((len(positions), n_recommendations), np.nan)
+        rated_enough = self._imdb_ratings >= min_imdb_rating
+        
+        known = np.flatnonzero(positions >= 0)
+        for start in range(0, len(known), batch_size):
+            rows = known[start:start + batch_size]
+            scores = similarity_rows(self.similarity_matrix, positions[rows])
+            if exclude_self:
+                scores[np.arange(len(rows)), positions[rows]] = np.nan
+            
+            top = top_n_indices_batch(scores, n_recommendations, mask=np.broadcast_to(rated_enough, scores.shape))
+            found = top >= 0
+            batch_ids = np.full(top.shape, -1, dtype=np.int64)
+            batch_ids[found] = self.movie_index.ids[top[found]]
+            result_ids[rows] = batch_ids
+            result_scores[rows] = np.where(found, np.take_along_axis(scores, np.maximum(top, 0), axis=1), np.nan)
+        
+        return result_ids, result_scores
+    
+    def _rank_similar(
+        self,
+        movie_id: int,
+        n_recommendations: int,
+        exclude_self: bool,
+        min_imdb_rating: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the row positions and scores of the most similar movies."""
         movie_idx = self.get_movie_index(movie_id)
         
         if movie_idx is None:
-            return []
+            return np.array([], dtype=np.int64), np.array([])
         
         # Get similarity scores for this movie
-        similarity_scores = list(enumerate(self.similarity_matrix[movie_idx]))
-        
-        # Sort by similarity score (descending)
-        similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
+        neighbour_indices, neighbour_scores = row_neighbours(self.similarity_matrix, movie_idx)
         
-        # Get top N recommendations
-        recommendations = []
-        for idx, score in similarity_scores:
-            if exclude_self and idx == movie_idx:
-                continue
-            
-            movie = self.movies_df.iloc[idx]
-            imdb_rating = float(movie['imdb_rating'])
-            
-            # Filter by minimum IMDb rating
-            if imdb_rating < min_imdb_rating:
-                continue
-            
-            movie_title = movie['title']
-            year = int(movie['year'])
-            recommendations.append((movie_title, float(score), imdb_rating, year))
-            
-            if len(recommendations) >= n_recommendations:
-                break
+        # Filter by minimum IMDb rating (and the movie itself) before selecting top N
+        mask = self._imdb_ratings[neighbour_indices] >= min_imdb_rating
+        if exclude_self:
+            mask &= neighbour_indices != movie_idx
         
-        return recommendations
+        top = top_n_indices(neighbour_scores, n_recommendations, mask=mask)
+        return neighbour_indices[top], neighbour_scores[top]
     
+    @timed('stage_seconds', stage='genre_query')
     def recommend_by_genre(
         self,
         genres: List[str],
         n_recommendations: int = 10,
-        min_imdb_rating: float = 0.0
+        min_imdb_rating: float = 0.0,
+        match: str = 'any'
     ) -> List[Tuple[str, float, float, int]]:
         """
         Recommend movies based on genre preferences.
         
+        Only movies with any (or all) of the genres are candidates; they are
+        ranked by the TF-IDF similarity of their features to the genres,
+        ties going to the higher IMDb rating. With ann, only the candidates
+        found near the query by an LSH search are scored.
+        
         Args:
-            genres: List of genre names (e.g., ['Action', 'Drama'])
+            genres: List of genre names (e.g., ['Action', 'Drama']), matched exactly
             n_recommendations: Number of recommendations to return
             min_imdb_rating: Minimum IMDb rating filter
+            match: 'any' for movies with at least one of the genres, 'all'
+                for movies with every one of them
             
         Returns:
             List of (movie_title, relevance_score, imdb_rating, year) tuples
         """
-        # Create a query string from genres
-        query = ' '.join(genres).lower()
+        index = self._get_genre_index()
+        mask = index.mask(genres, match) & (self._imdb_ratings >= min_imdb_rating)
         
-        # Transform query using the same vectorizer
-        query_vector = self.vectorizer.transform([query])
+        # Transform a query string from the genres using the same vectorizer
+        query_vector = self.vectorizer.transform([' '.join(genres).lower()])
         
-        # Compute similarity with all movies
-        similarity_scores = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
+        if self.ann is not None and mask.any():
+            # Only the genre's movies near the query in the LSH index are scored
+            lsh_index = self._get_lsh_index()
+            found, _ = lsh_index.search(query_vector, lsh_index.n_tables * lsh_index.window, mask=mask)
+            mask = np.zeros_like(mask)
+            mask[found[found >= 0]] = True
         
-        # Create list of (index, score) and sort
-        scored_movies = list(enumerate(similarity_scores))
-        scored_movies = sorted(scored_movies, key=lambda x: x[1], reverse=True)
+        candidates = index.ranked(mask)
+        if len(candidates) == 0:
+            return []
         
-        # Get recommendations with IMDb rating filter
-        recommendations = []
-        for idx, score in scored_movies:
-            movie = self.movies_df.iloc[idx]
-            imdb_rating = float(movie['imdb_rating'])
-            
-            if imdb_rating < min_imdb_rating:
-                continue
-            
-            movie_title = movie['title']
-            year = int(movie['year'])
-            recommendations.append((movie_title, float(score), imdb_rating, year))
-            
-            if len(recommendations) >= n_recommendations:
-                break
+        # TF-IDF rows are L2-normalized, so dot products are cosine similarities
+        similarity_scores = (self.tfidf_matrix[candidates] @ query_vector.T).toarray().ravel()
         
-        return recommendations
+        # Candidates are in IMDb order, so equal scores keep the best rated first
+        top = top_n_indices(similarity_scores, n_recommendations)
+        return self._format_scored(candidates[top], similarity_scores[top])
+    
+    def _get_genre_index(self) -> GenreIndex:
+        """Get the genre index over the movies, building it on first use."""
+        if self._genre_index is None:
+            self._genre_index = GenreIndex(self._genres, self._imdb_ratings)
+        return self._genre_index
+    
+    def _get_lsh_index(self) -> LSHIndex:
+        """Get the LSH index over the TF-IDF vectors, building it on first use."""
+        if self._lsh_index is None:
+            self._lsh_index = LSHIndex(self.tfidf_matrix, **self.ann)
+        return self._lsh_index
+    
+    def _format_scored(
+        self,
+        indices: np.ndarray,
+        scores: np.ndarray
+    ) -> List[Tuple[str, float, float, int]]:
+        """Build (movie_title, score, imdb_rating, year) tuples for movie positions."""
+        return [
+            (self._titles[idx], float(score), float(self._imdb_ratings[idx]), int(self._years[idx]))
+            for idx, score in zip(indices, scores)
+        ]
     
     def recommend_by_imdb_rating(
         self,
         n_recommendations: int = 10,
         min_rating: float = 7.0,
         genres: Optional[List[str]] = None,
-        year_from: Optional[int] = None
+        year_from: Optional[int] = None,
+        match: str = 'any'
     ) -> List[Tuple[str, float, str, int]]:
         """
         Recommend top movies by IMDb rating with optional filters.
@@ -209,38 +464,31 @@ class ContentBasedRecommender:
         Args:
             n_recommendations: Number of recommendations to return
             min_rating: Minimum IMDb rating threshold
-            genres: Optional list of genres to filter by
+            genres: Optional list of genres to filter by (matched exactly)
             year_from: Optional minimum year filter
+            match: 'any' for movies with at least one of the genres, 'all'
+                for movies with every one of them
             
         Returns:
             List of (movie_title, imdb_rating, genres, year) tuples
         """
-        filtered_df = self.movies_df[self.movies_df['imdb_rating'] >= min_rating].copy()
+        index = self._get_genre_index()
+        mask = self._imdb_ratings >= min_rating
         
-        # Apply genre filter
+        # Apply genre filter (bitset OR / AND)
         if genres:
-            genre_pattern = '|'.join(genres)
-            filtered_df = filtered_df[
-                filtered_df['genres'].str.contains(genre_pattern, case=False, na=False)
-            ]
+            mask &= index.mask(genres, match)
         
         # Apply year filter
         if year_from:
-            filtered_df = filtered_df[filtered_df['year'] >= year_from]
-        
-        # Sort by IMDb rating
-        filtered_df = filtered_df.sort_values('imdb_rating', ascending=False)
-        
-        recommendations = []
-        for _, movie in filtered_df.head(n_recommendations).iterrows():
-            recommendations.append((
-                movie['title'],
-                float(movie['imdb_rating']),
-                movie['genres'],
-                int(movie['year'])
-            ))
-        
-        return recommendations
+            mask &= self._years >= year_from
+        
+        # Movies in precomputed IMDb order, best first
+        top = index.ranked(mask)[:n_recommendations]
+        return [
+            (self._titles[idx], float(self._imdb_ratings[idx]), self._genres[idx], int(self._years[idx]))
+            for idx in top
+        ]
     
     def recommend_by_director(
         self,
@@ -292,4 +540,4 @@ class ContentBasedRecommender:
         if idx1 is None or idx2 is None:
             return None
         
-        return float(self.similarity_matrix[idx1][idx2])
+        return float(self.similarity_matrix[idx1, idx2])
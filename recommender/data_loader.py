@@ -5,8 +5,218 @@ Supports IMDb ratings, genres, directors, and year-based filtering
 
 import pandas as pd
 import numpy as np
-from typing import Tuple, Optional, List
+from scipy.sparse import csr_matrix
+from typing import Iterator, Tuple, Optional, List, Iterable
+import hashlib
+import json
+import logging
 import os
+import time
+
+from .genres import GenreIndex
+from .log import elapsed_ms
+from .metrics import timed
+from .search import SearchIndex
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the columnar cache files changes
+CACHE_FORMAT_VERSION = 1
+
+# Low-cardinality movie columns stored as pandas categoricals
+MOVIE_CATEGORICAL_COLUMNS = ('genres', 'director', 'language')
+
+# Columns needed to build the user-movie rating matrix
+RATING_COLUMNS = ['userId', 'movieId', 'rating']
+
+
+class IdIndex:
+    """
+    Maps integer IDs (movieId, userId) to their row positions.
+    
+    Single lookups go through a dict; bulk lookups use a sorted copy of the
+    IDs with np.searchsorted, so neither scans the underlying column.
+    When an ID appears more than once, its first position wins.
+    """
+    
+    def __init__(self, ids: Iterable[int]):
+        """
+        Build the index.
+        
+        Args:
+            ids: Array-like of IDs in row order
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self._positions = {}
+        for position, item_id in enumerate(self.ids.tolist()):
+            self._positions.setdefault(item_id, position)
+        
+        self._order = np.argsort(self.ids, kind='stable')
+        self._sorted_ids = self.ids[self._order]
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __contains__(self, item_id) -> bool:
+        return item_id in self._positions
+    
+    def get(self, item_id: int) -> Optional[int]:
+        """
+        Get the row position of an ID.
+        
+        Args:
+            item_id: ID to look up
+            
+        Returns:
+            Row position or None if the ID is unknown
+        """
+        return self._positions.get(item_id)
+    
+    def get_many(self, item_ids: Iterable[int]) -> np.ndarray:
+        """
+        Get the row positions of many IDs at once.
+        
+        Args:
+            item_ids: IDs to look up
+            
+        Returns:
+            Integer array of row positions, -1 where the ID is unknown
+        """
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        if len(self._sorted_ids) == 0:
+            return np.full(item_ids.shape, -1, dtype=np.int64)
+        
+        slots = np.searchsorted(self._sorted_ids, item_ids)
+        slots = np.minimum(slots, len(self._sorted_ids) - 1)
+        found = self._sorted_ids[slots] == item_ids
+        return np.where(found, self._order[slots], -1)
+
+
+class RatingMatrixBuilder:
+    """
+    Assembles a sparse user x movie rating matrix from chunks of ratings.
+    
+    Chunks are kept as compact (userId, movieId, rating) arrays; build()
+    integer-codes the IDs and creates the CSR matrix directly, so no dense
+    users x movies pivot table is ever materialized.
+    """
+    
+    def __init__(self):
+        """Initialize an empty builder."""
+        self._user_ids = []
+        self._movie_ids = []
+        self._ratings = []
+        self.n_ratings = 0
+    
+    def add(self, user_ids: Iterable[int], movie_ids: Iterable[int], ratings: Iterable[float]):
+        """
+        Add a chunk of ratings.
+        
+        Args:
+            user_ids: User ID of each rating
+            movie_ids: Movie ID of each rating
+            ratings: Rating values
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        ratings = np.asarray(ratings, dtype=np.float32)
+        if not len(user_ids) == len(movie_ids) == len(ratings):
+            raise ValueError("user_ids, movie_ids and ratings must have the same length")
+        
+        self._user_ids.append(user_ids)
+        self._movie_ids.append(movie_ids)
+        self._ratings.append(ratings)
+        self.n_ratings += len(ratings)
+    
+    def add_frame(self, ratings_df: pd.DataFrame):
+        """
+        Add a chunk of ratings from a DataFrame with userId, movieId, rating columns.
+        
+        Args:
+            ratings_df: Ratings chunk
+        """
+        self.add(
+            ratings_df['userId'].values,
+            ratings_df['movieId'].values,
+            ratings_df['rating'].values
+        )
+    
+    def build(self) -> Tuple[csr_matrix, np.ndarray, np.ndarray]:
+        """
+        Build the rating matrix from everything added so far.
+        
+        Rows and columns follow sorted user and movie IDs, repeated
+        (user, movie) pairs are averaged and zero ratings count as unrated,
+        matching ratings_df.pivot_table(...).fillna(0).
+        
+        Returns:
+            Tuple of (CSR matrix of shape (n_users, n_movies),
+            user ID of each row, movie ID of each column)
+        """
+        if self.n_ratings == 0:
+            empty = np.array([], dtype=np.int64)
+            return csr_matrix((0, 0)), empty, empty
+        
+        user_ids, rows = np.unique(np.concatenate(self._user_ids), return_inverse=True)
+        movie_ids, cols = np.unique(np.concatenate(self._movie_ids), return_inverse=True)
+        ratings = np.concatenate(self._ratings).astype(np.float64)
+        shape = (len(user_ids), len(movie_ids))
+        
+        # COO -> CSR sums repeated (user, movie) pairs; divide by their counts
+        matrix = csr_matrix((ratings, (rows, cols)), shape=shape)
+        if matrix.nnz < self.n_ratings:
+            counts = csr_matrix((np.ones_like(ratings), (rows, cols)), shape=shape)
+            matrix.data /= counts.data
+        
+        matrix.eliminate_zeros()
+        return matrix, user_ids, movie_ids
+
+
+def read_rating_chunks(filepath: str, chunksize: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """
+    Stream a ratings CSV file in cleaned chunks.
+    
+    Only the userId, movieId and rating columns are parsed.
+    
+    Args:
+        filepath: Path of the ratings CSV file
+        chunksize: Number of rows per chunk
+        
+    Yields:
+        DataFrames with compact userId, movieId, rating columns
+    """
+    for chunk in pd.read_csv(filepath, usecols=RATING_COLUMNS, chunksize=chunksize):
+        yield _clean_ratings(chunk)
+
+
+def _clean_movies(movies_df: pd.DataFrame) -> pd.DataFrame:
+    """Fill missing movie fields and convert to the loader's dtypes."""
+    # Handle missing values
+    movies_df['genres'] = movies_df['genres'].fillna('')
+    movies_df['title'] = movies_df['title'].fillna('Unknown')
+    movies_df['imdb_rating'] = movies_df['imdb_rating'].fillna(0.0)
+    movies_df['year'] = movies_df['year'].fillna(0).astype(int)
+    movies_df['director'] = movies_df['director'].fillna('Unknown')
+    movies_df['language'] = movies_df['language'].fillna('Hindi')
+    
+    # Ensure movieId is integer
+    movies_df['movieId'] = movies_df['movieId'].astype(int)
+    
+    # Repeated strings are stored once per distinct value
+    for column in MOVIE_CATEGORICAL_COLUMNS:
+        movies_df[column] = movies_df[column].astype('category')
+    return movies_df
+
+
+def _clean_ratings(ratings_df: pd.DataFrame) -> pd.DataFrame:
+    """Drop incomplete ratings and convert to compact dtypes."""
+    ratings_df = ratings_df.dropna(subset=RATING_COLUMNS)
+    return ratings_df.astype({
+        'userId': np.int32,
+        'movieId': np.int32,
+        'rating': np.float32
+    })
 
 
 class DataLoader:
@@ -14,17 +224,27 @@ class DataLoader:
     Handles loading and preprocessing of Bollywood movie dataset with IMDb ratings.
     """
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", cache_dir: Optional[str] = None, use_cache: bool = True):
         """
         Initialize DataLoader.
         
         Args:
             data_dir: Directory containing the dataset files
+            cache_dir: Directory for the columnar cache of parsed CSV files
+                (default: <data_dir>/.cache)
+            use_cache: Whether to read and write the columnar cache
         """
         self.data_dir = data_dir
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(data_dir, '.cache')
+        self.use_cache = use_cache
         self.movies_df = None
         self.ratings_df = None
+        self.movie_index = None
+        self.user_index = None
+        self.title_index = None
+        self.genre_index = None
         
+    @timed('stage_seconds', stage='load_movies')
     def load_movies(self, filename: str = "movies.csv") -> pd.DataFrame:
         """
         Load movies dataset with IMDb ratings.
@@ -37,6 +257,7 @@ class DataLoader:
         Returns:
             DataFrame containing movie information
         """
+        start = time.perf_counter()
         filepath = os.path.join(self.data_dir, filename)
         
         if not os.path.exists(filepath):
@@ -45,22 +266,77 @@ class DataLoader:
                 "Please ensure movies.csv exists in the data directory."
             )
         
-        self.movies_df = pd.read_csv(filepath)
+        self.movies_df = self._read_cached(filepath)
+        if self.movies_df is None:
+            self.movies_df = _clean_movies(pd.read_csv(filepath))
+            self._write_cache(filepath, self.movies_df)
+        
+        self.movie_index = IdIndex(self.movies_df['movieId'].values)
+        self.title_index = None
+        self.genre_index = None
+        
+        logger.info(
+            "Loaded %d Bollywood movies", len(self.movies_df),
+            extra={'source': filepath, 'rows': len(self.movies_df), 'elapsed_ms': elapsed_ms(start)}
+        )
+        return self.movies_df
+    
+    @timed('stage_seconds', stage='load_catalog')
+    def load_catalog(self, filename: str = "catalog.json") -> pd.DataFrame:
+        """
+        Load the web catalog of movies as the movies dataset.
+        
+        The catalog is a JSON list of movie records as served by the web app
+        (id, title, year, genres, imdb, director, cast, poster, description).
+        It is converted to the movies schema used by the recommenders, with
+        list fields joined by '|' and the extra cast, poster and description
+        columns.
+        
+        Args:
+            filename: Name of the catalog JSON file
+            
+        Returns:
+            DataFrame containing movie information
+        """
+        start = time.perf_counter()
+        filepath = os.path.join(self.data_dir, filename)
         
-        # Handle missing values
-        self.movies_df['genres'] = self.movies_df['genres'].fillna('')
-        self.movies_df['title'] = self.movies_df['title'].fillna('Unknown')
-        self.movies_df['imdb_rating'] = self.movies_df['imdb_rating'].fillna(0.0)
-        self.movies_df['year'] = self.movies_df['year'].fillna(0).astype(int)
-        self.movies_df['director'] = self.movies_df['director'].fillna('Unknown')
-        self.movies_df['language'] = self.movies_df['language'].fillna('Hindi')
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(
+                f"Catalog file not found at {filepath}. "
+                "Please ensure catalog.json exists in the data directory."
+            )
         
-        # Ensure movieId is integer
-        self.movies_df['movieId'] = self.movies_df['movieId'].astype(int)
+        self.movies_df = self._read_cached(filepath)
+        if self.movies_df is None:
+            with open(filepath, encoding='utf-8') as f:
+                records = json.load(f)
+            
+            catalog = pd.DataFrame(records).rename(columns={'id': 'movieId', 'imdb': 'imdb_rating'})
+            for column in ('genres', 'cast'):
+                if column in catalog:
+                    catalog[column] = catalog[column].map(
+                        lambda values: '|'.join(values) if isinstance(values, list) else values
+                    )
+            for column in ('cast', 'poster', 'description'):
+                catalog[column] = catalog[column].fillna('') if column in catalog else ''
+            if 'language' not in catalog:
+                catalog['language'] = None
+            
+            self.movies_df = _clean_movies(catalog)
+            self._write_cache(filepath, self.movies_df)
         
-        print(f"✅ Loaded {len(self.movies_df)} Bollywood movies")
+        self.movie_index = IdIndex(self.movies_df['movieId'].values)
+        self.title_index = None
+        self.genre_index = None
+        
+        logger.info(
+            "Loaded %d movies from catalog", len(self.movies_df),
+            extra={'source': filepath, 'rows': len(self.movies_df), 'elapsed_ms': elapsed_ms(start)}
+        )
         return self.movies_df
     
+    @timed('stage_seconds', stage='load_ratings')
     def load_ratings(self, filename: str = "ratings.csv") -> pd.DataFrame:
         """
         Load user ratings dataset.
@@ -73,6 +349,7 @@ class DataLoader:
         Returns:
             DataFrame containing rating information
         """
+        start = time.perf_counter()
         filepath = os.path.join(self.data_dir, filename)
         
         if not os.path.exists(filepath):
@@ -81,18 +358,161 @@ class DataLoader:
                 "Please ensure ratings.csv exists in the data directory."
             )
         
-        self.ratings_df = pd.read_csv(filepath)
+        self.ratings_df = self._read_cached(filepath)
+        if self.ratings_df is None:
+            # Drop incomplete ratings and use compact data types
+            self.ratings_df = _clean_ratings(pd.read_csv(filepath))
+            self._write_cache(filepath, self.ratings_df)
+        
+        # Users in sorted order, matching the rows of the user-movie matrix
+        self.user_index = IdIndex(np.unique(self.ratings_df['userId'].values))
+        
+        logger.info(
+            "Loaded %d ratings from %d users", len(self.ratings_df), len(self.user_index),
+            extra={
+                'source': filepath,
+                'rows': len(self.ratings_df),
+                'users': len(self.user_index),
+                'elapsed_ms': elapsed_ms(start)
+            }
+        )
+        return self.ratings_df
+    
+    @timed('stage_seconds', stage='load_rating_matrix')
+    def load_rating_matrix(
+        self,
+        filename: str = "ratings.csv",
+        chunksize: int = 1_000_000
+    ) -> Tuple[csr_matrix, np.ndarray, np.ndarray]:
+        """
+        Build the sparse user-movie rating matrix without loading ratings_df.
         
-        # Handle missing values
-        self.ratings_df = self.ratings_df.dropna(subset=['userId', 'movieId', 'rating'])
+        The ratings are read from the columnar cache if it is up to date,
+        otherwise streamed from the CSV file chunksize rows at a time.
+        Sets user_index to the matrix rows.
         
-        # Ensure correct data types
-        self.ratings_df['userId'] = self.ratings_df['userId'].astype(int)
-        self.ratings_df['movieId'] = self.ratings_df['movieId'].astype(int)
-        self.ratings_df['rating'] = self.ratings_df['rating'].astype(float)
+        Args:
+            filename: Name of the ratings CSV file
+            chunksize: Number of CSV rows parsed at once
+            
+        Returns:
+            Tuple of (CSR rating matrix, user ID of each row, movie ID of each column)
+        """
+        start = time.perf_counter()
+        filepath = os.path.join(self.data_dir, filename)
         
-        print(f"✅ Loaded {len(self.ratings_df)} ratings from {self.ratings_df['userId'].nunique()} users")
-        return self.ratings_df
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(
+                f"Ratings file not found at {filepath}. "
+                "Please ensure ratings.csv exists in the data directory."
+            )
+        
+        builder = RatingMatrixBuilder()
+        cached = self._read_cached(filepath)
+        if cached is not None:
+            builder.add_frame(cached)
+        else:
+            for chunk in read_rating_chunks(filepath, chunksize):
+                builder.add_frame(chunk)
+        
+        matrix, user_ids, movie_ids = builder.build()
+        self.user_index = IdIndex(user_ids)
+        
+        logger.info(
+            "Built rating matrix from %d ratings: %d users x %d movies", builder.n_ratings, *matrix.shape,
+            extra={
+                'source': filepath,
+                'rows': builder.n_ratings,
+                'shape': matrix.shape,
+                'elapsed_ms': elapsed_ms(start)
+            }
+        )
+        return matrix, user_ids, movie_ids
+    
+    def _cache_paths(self, filepath: str) -> Tuple[str, str]:
+        """Get the (data, metadata) cache file paths for a source file."""
+        base = os.path.join(self.cache_dir, os.path.basename(filepath))
+        return f"{base}.npz", f"{base}.json"
+    
+    def _read_cached(self, filepath: str) -> Optional[pd.DataFrame]:
+        """
+        Load a parsed CSV file from the columnar cache.
+        
+        The cache is used when the source file's size and modification time
+        match; if only the modification time changed, the file is re-hashed
+        and the cache is still used when the content is unchanged.
+        
+        Args:
+            filepath: Path of the source CSV file
+            
+        Returns:
+            Cached DataFrame, or None if there is no up-to-date cache
+        """
+        if not self.use_cache:
+            return None
+        
+        data_path, meta_path = self._cache_paths(filepath)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if meta.get('format_version') != CACHE_FORMAT_VERSION:
+            return None
+        
+        stat = os.stat(filepath)
+        source = meta.get('source', {})
+        if source.get('size') != stat.st_size:
+            return None
+        if source.get('mtime_ns') != stat.st_mtime_ns:
+            if source.get('sha1') != _file_sha1(filepath):
+                return None
+            # Touched but unchanged: remember the new mtime to skip re-hashing
+            source['mtime_ns'] = stat.st_mtime_ns
+            _write_json_atomic(meta_path, meta)
+        
+        try:
+            with np.load(data_path, allow_pickle=False) as arrays:
+                return _columns_to_frame(arrays, meta['columns'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def _write_cache(self, filepath: str, df: pd.DataFrame):
+        """
+        Store a parsed CSV file in the columnar cache.
+        
+        Failing to write the cache (e.g. a read-only data directory) is not
+        an error; the CSV is simply parsed again next time.
+        
+        Args:
+            filepath: Path of the source CSV file
+            df: Parsed and cleaned DataFrame
+        """
+        if not self.use_cache:
+            return
+        
+        data_path, meta_path = self._cache_paths(filepath)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            arrays, columns = _frame_to_columns(df)
+            
+            tmp_path = f"{data_path}.tmp-{os.getpid()}.npz"
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, data_path)
+            
+            stat = os.stat(filepath)
+            _write_json_atomic(meta_path, {
+                'format_version': CACHE_FORMAT_VERSION,
+                'source': {
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'sha1': _file_sha1(filepath)
+                },
+                'columns': columns
+            })
+        except OSError:
+            pass
     
     def load_all(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
@@ -118,20 +538,36 @@ class DataLoader:
         if self.movies_df is None:
             self.load_movies()
         
-        movie = self.movies_df[self.movies_df['movieId'] == movie_id]
-        if len(movie) == 0:
+        position = self.movie_index.get(movie_id)
+        if position is None:
             return None
         
+        movie = self.movies_df.iloc[position]
         return {
-            'movieId': int(movie.iloc[0]['movieId']),
-            'title': movie.iloc[0]['title'],
-            'genres': movie.iloc[0]['genres'],
-            'imdb_rating': float(movie.iloc[0]['imdb_rating']),
-            'year': int(movie.iloc[0]['year']),
-            'director': movie.iloc[0]['director'],
-            'language': movie.iloc[0]['language']
+            'movieId': int(movie['movieId']),
+            'title': movie['title'],
+            'genres': movie['genres'],
+            'imdb_rating': float(movie['imdb_rating']),
+            'year': int(movie['year']),
+            'director': movie['director'],
+            'language': movie['language']
         }
     
+    def get_titles(self, movie_ids: Iterable[int]) -> np.ndarray:
+        """
+        Look up the titles of many movies at once.
+        
+        Args:
+            movie_ids: Movie IDs to look up
+            
+        Returns:
+            Object array of titles, None where the movie ID is unknown
+        """
+        if self.movies_df is None:
+            self.load_movies()
+        
+        return lookup_titles(self.movies_df['title'].values, self.movie_index, movie_ids)
+    
     def get_user_ratings(self, user_id: int) -> pd.DataFrame:
         """
         Get all ratings for a specific user with movie details.
@@ -182,19 +618,22 @@ class DataLoader:
         Get movies filtered by genre.
         
         Args:
-            genre: Genre to filter by (e.g., 'Action', 'Drama')
+            genre: Genre to filter by (e.g., 'Action', 'Drama'); matches whole
+                genre names ignoring case, so 'Music' does not match 'Musical'
             
         Returns:
-            DataFrame with movies in the specified genre
+            DataFrame with movies in the specified genre, best rated first
         """
         if self.movies_df is None:
             self.load_movies()
         
-        genre_movies = self.movies_df[
-            self.movies_df['genres'].str.contains(genre, case=False, na=False)
-        ].copy()
+        if self.genre_index is None:
+            self.genre_index = GenreIndex(
+                self.movies_df['genres'].to_numpy(),
+                self.movies_df['imdb_rating'].to_numpy(dtype=float)
+            )
         
-        return genre_movies.sort_values('imdb_rating', ascending=False)
+        return self.movies_df.iloc[self.genre_index.movies([genre])]
     
     def get_movies_by_year(self, year: int) -> pd.DataFrame:
         """
@@ -231,6 +670,7 @@ class DataLoader:
         
         return director_movies.sort_values('imdb_rating', ascending=False)
     
+    @timed('stage_seconds', stage='user_movie_matrix')
     def create_user_movie_matrix(self) -> pd.DataFrame:
         """
         Create a user-movie rating matrix (pivot table).
@@ -241,13 +681,17 @@ class DataLoader:
         if self.ratings_df is None:
             self.load_ratings()
         
+        start = time.perf_counter()
         matrix = self.ratings_df.pivot_table(
             index='userId',
             columns='movieId',
             values='rating'
         )
         
-        print(f"✅ Created user-movie matrix: {matrix.shape[0]} users x {matrix.shape[1]} movies")
+        logger.info(
+            "Created user-movie matrix: %d users x %d movies", *matrix.shape,
+            extra={'shape': matrix.shape, 'elapsed_ms': elapsed_ms(start)}
+        )
         return matrix
     
     def get_statistics(self) -> dict:
@@ -277,21 +721,126 @@ class DataLoader:
         
         return stats
     
-    def search_movies(self, query: str) -> pd.DataFrame:
+    def search_movies(self, query: str, limit: Optional[int] = None) -> pd.DataFrame:
         """
-        Search movies by title (partial match).
+        Search movies by title (each query word matches the start of a title word).
+        
+        When no title matches, the closest spellings are returned instead.
         
         Args:
             query: Search query string
+            limit: Maximum number of movies to return, or None for all
             
         Returns:
-            DataFrame with matching movies
+            DataFrame with matching movies, highest IMDb rating first
         """
         if self.movies_df is None:
             self.load_movies()
         
-        matches = self.movies_df[
-            self.movies_df['title'].str.contains(query, case=False, na=False)
-        ].copy()
+        # Built on first search, reset whenever movies are reloaded
+        if self.title_index is None:
+            self.title_index = SearchIndex(
+                [('title', self.movies_df['title'].tolist())],
+                self.movies_df['imdb_rating'].to_numpy(dtype=float)
+            )
+        
+        positions = self.title_index.search(query, limit=limit)
+        return self.movies_df.iloc[positions].copy()
+
+
+def lookup_titles(titles: np.ndarray, movie_index: IdIndex, movie_ids: Iterable[int]) -> np.ndarray:
+    """
+    Vectorized title lookup through an IdIndex.
+    
+    Args:
+        titles: Titles in the row order of movie_index
+        movie_index: Index mapping movie IDs to row positions
+        movie_ids: Movie IDs to look up
+        
+    Returns:
+        Object array of titles, None where the movie ID is unknown
+    """
+    positions = movie_index.get_many(movie_ids)
+    result = np.full(len(positions), None, dtype=object)
+    found = positions >= 0
+    result[found] = np.asarray(titles, dtype=object)[positions[found]]
+    return result
+
+
+def _file_sha1(filepath: str, chunk_size: int = 1 << 20) -> str:
+    """Hash a file's content in chunks."""
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path: str, obj: dict):
+    """Write a JSON file via a temporary file so readers never see it half-written."""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+def _frame_to_columns(df: pd.DataFrame) -> Tuple[dict, List[list]]:
+    """
+    Split a DataFrame into plain NumPy arrays for the columnar cache.
+    
+    Numeric columns are stored as-is. Categorical and text columns are
+    stored as integer codes plus an array of distinct values, so no
+    pickled objects are needed.
+    
+    Args:
+        df: DataFrame to store
         
-        return matches.sort_values('imdb_rating', ascending=False)
+    Returns:
+        Tuple of (arrays keyed by file name, [column name, kind, dtype] triples)
+    """
+    arrays = {}
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            kind = 'category'
+            categorical = series.cat
+        elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            kind = 'text'
+            categorical = series.astype('category').cat
+        else:
+            arrays[f'c{i}'] = series.to_numpy()
+            columns.append([name, 'plain', str(series.dtype)])
+            continue
+        
+        arrays[f'c{i}_codes'] = categorical.codes.to_numpy()
+        arrays[f'c{i}_categories'] = np.asarray(categorical.categories.astype(str), dtype=str)
+        columns.append([name, kind, str(series.dtype)])
+    
+    return arrays, columns
+
+
+def _columns_to_frame(arrays, columns: List[list]) -> pd.DataFrame:
+    """
+    Rebuild a DataFrame stored by _frame_to_columns.
+    
+    Args:
+        arrays: Mapping of file name -> array (e.g. an open NpzFile)
+        columns: [column name, kind, dtype] triples in column order
+        
+    Returns:
+        DataFrame with the original columns and dtypes
+    """
+    data = {}
+    for i, (name, kind, dtype) in enumerate(columns):
+        if kind == 'plain':
+            data[name] = arrays[f'c{i}']
+            continue
+        
+        values = pd.Categorical.from_codes(
+            arrays[f'c{i}_codes'],
+            categories=arrays[f'c{i}_categories'].astype(object)
+        )
+        data[name] = values if kind == 'category' else pd.Series(values).astype(dtype)
+    
+    return pd.DataFrame(data)
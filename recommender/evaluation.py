@@ -0,0 +1,278 @@
+"""
+Offline evaluation of the recommenders
+Holds out part of every user's ratings, then scores the held-out pairs and top-k lists in batches
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, issparse
+
+from .collaborative import CF_METHODS, CollaborativeFilteringRecommender
+from .content_based import ContentBasedRecommender
+from .data_loader import IdIndex
+from .utils import top_n_indices_batch
+
+
+SPLIT_STRATEGIES = ('random', 'temporal')
+EVALUATION_MODELS = CF_METHODS + ('content',)
+
+
+def holdout_split(
+    ratings_df: pd.DataFrame,
+    test_fraction: float = 0.2,
+    strategy: str = 'random',
+    seed: int = 0
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split ratings into train and test sets per user.
+    
+    Every user with at least two ratings has test_fraction of them (at least
+    one, never all) moved to the test set: a random sample, or with the
+    'temporal' strategy their most recent ratings. Users with a single
+    rating stay entirely in the train set.
+    
+    Args:
+        ratings_df: DataFrame with columns: userId, movieId, rating
+            (and timestamp for the 'temporal' strategy)
+        test_fraction: Fraction of each user's ratings held out
+        strategy: 'random' or 'temporal'
+        seed: Random seed for the 'random' strategy
+    
+    Returns:
+        Tuple of (train, test) DataFrames
+    """
+    if strategy not in SPLIT_STRATEGIES:
+        raise ValueError(f"Strategy must be one of {', '.join(SPLIT_STRATEGIES)}")
+    if not 0 < test_fraction < 1:
+        raise ValueError("test_fraction must be between 0 and 1")
+    
+    users = ratings_df['userId'].to_numpy()
+    if strategy == 'temporal':
+        if 'timestamp' not in ratings_df:
+            raise ValueError("The temporal strategy needs a timestamp column")
+        key = ratings_df['timestamp'].to_numpy()
+    else:
+        key = np.random.default_rng(seed).random(len(ratings_df))
+    
+    # Position of each rating within its user, in key order
+    order = np.lexsort((np.arange(len(users)), key, users))
+    sorted_users = users[order]
+    _, first, counts = np.unique(sorted_users, return_index=True, return_counts=True)
+    position = np.arange(len(order)) - np.repeat(first, counts)
+    
+    # The last n_test ratings of each user (the latest, for 'temporal') are held out
+    n_test = np.where(counts > 1, np.clip(np.round(counts * test_fraction), 1, counts - 1), 0)
+    is_test = np.zeros(len(users), dtype=bool)
+    is_test[order] = position >= np.repeat(counts - n_test, counts)
+    
+    return ratings_df[~is_test].reset_index(drop=True), ratings_df[is_test].reset_index(drop=True)
+
+
+def ranking_metrics(
+    user_ids: np.ndarray,
+    recommended: np.ndarray,
+    test_df: pd.DataFrame,
+    relevant_rating: float = 4.0
+) -> Dict[str, float]:
+    """
+    Score top-k lists against the held-out ratings.
+    
+    A test movie is relevant to its user when rated at least relevant_rating.
+    Users without a relevant test movie are skipped.
+    
+    Args:
+        user_ids: User ID of each row of recommended
+        recommended: Recommended movie IDs, shape (len(user_ids), k), best
+            first and padded with -1
+        test_df: Held-out ratings with columns: userId, movieId, rating
+        relevant_rating: Minimum rating of a relevant movie
+    
+    Returns:
+        Dictionary with precision, recall and ndcg (means over the users
+        scored) and n_users
+    """
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    recommended = np.asarray(recommended, dtype=np.int64)
+    k = recommended.shape[1]
+    
+    relevant = test_df[test_df['rating'].to_numpy(dtype=float) >= relevant_rating]
+    relevant_users = relevant['userId'].to_numpy(dtype=np.int64)
+    relevant_movies = relevant['movieId'].to_numpy(dtype=np.int64)
+    
+    # Count the relevant movies of each evaluated user
+    scored_users, n_relevant = np.unique(relevant_users, return_counts=True)
+    rows = np.flatnonzero(np.isin(user_ids, scored_users))
+    if len(rows) == 0 or k == 0:
+        return {'precision': float('nan'), 'recall': float('nan'), 'ndcg': float('nan'), 'n_users': 0}
+    n_relevant = n_relevant[np.searchsorted(scored_users, user_ids[rows])]
+    
+    # Encode (user, movie) pairs as single integers to test membership at once
+    n_codes = np.int64(max(recommended.max(initial=0), relevant_movies.max(initial=0)) + 1)
+    relevant_codes = relevant_users * n_codes + relevant_movies
+    recommended_codes = user_ids[rows][:, None] * n_codes + recommended[rows]
+    hits = np.isin(recommended_codes, relevant_codes) & (recommended[rows] >= 0)
+    
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    ideal = np.cumsum(discounts)[np.minimum(n_relevant, k) - 1]
+    n_hits = hits.sum(axis=1)
+    return {
+        'precision': float(np.mean(n_hits / k)),
+        'recall': float(np.mean(n_hits / n_relevant)),
+        'ndcg': float(np.mean((hits * discounts).sum(axis=1) / ideal)),
+        'n_users': int(len(rows))
+    }
+
+
+def recommend_by_content(
+    model: ContentBasedRecommender,
+    ratings_df: pd.DataFrame,
+    user_ids: Sequence[int],
+    n_recommendations: int = 10,
+    relevant_rating: float = 4.0,
+    batch_size: int = 1024
+) -> np.ndarray:
+    """
+    Recommend the movies most similar to the ones each user liked.
+    
+    A user's score for a movie is its summed similarity to the movies they
+    rated at least relevant_rating (or to all their rated movies if none
+    is); movies they rated are never recommended.
+    
+    Args:
+        model: Fitted ContentBasedRecommender
+        ratings_df: Known ratings with columns: userId, movieId, rating
+        user_ids: Users to recommend for
+        n_recommendations: Number of recommendations per user
+        relevant_rating: Minimum rating of a liked movie
+        batch_size: Number of users scored at once
+    
+    Returns:
+        Recommended movie IDs, shape (len(user_ids), n_recommendations),
+        best first and padded with -1
+    """
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    result = np.full((len(user_ids), n_recommendations), -1, dtype=np.int64)
+    n_movies = len(model.movie_index.ids)
+    
+    # Rows of each matrix follow user_ids (users without ratings stay empty)
+    rows = IdIndex(user_ids).get_many(ratings_df['userId'].values)
+    positions = model.movie_index.get_many(ratings_df['movieId'].values)
+    known = (rows >= 0) & (positions >= 0)
+    rows, positions = rows[known], positions[known]
+    liked = ratings_df['rating'].to_numpy(dtype=float)[known] >= relevant_rating
+    rated = csr_matrix((np.ones(len(rows)), (rows, positions)), shape=(len(user_ids), n_movies))
+    rated.data[:] = 1.0
+    
+    has_liked = np.bincount(rows[liked], minlength=len(user_ids)) > 0
+    seeds = liked | ~has_liked[rows]
+    seed_matrix = csr_matrix((np.ones(int(seeds.sum())), (rows[seeds], positions[seeds])), shape=rated.shape)
+    seed_matrix.data[:] = 1.0
+    
+    similarity = model.similarity_matrix
+    for start in range(0, len(user_ids), batch_size):
+        batch = slice(start, start + batch_size)
+        scores = seed_matrix[batch] @ similarity
+        scores = scores.toarray() if issparse(scores) else np.asarray(scores)
+        scores[(rated[batch] > 0).toarray()] = np.nan
+        top = top_n_indices_batch(scores, n_recommendations, mask=scores > 0)
+        found = top >= 0
+        result[batch][found] = model.movie_index.ids[top[found]]
+    
+    return result
+
+
+def _timed(function: Callable):
+    """Call a function and return its result with the elapsed seconds."""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def evaluate_models(
+    ratings_df: pd.DataFrame,
+    movies_df: pd.DataFrame,
+    models: Sequence[str] = EVALUATION_MODELS,
+    strategy: str = 'random',
+    test_fraction: float = 0.2,
+    k: int = 10,
+    relevant_rating: float = 4.0,
+    seed: int = 0,
+    n_factors: int = 20,
+    n_jobs: int = 1,
+    split: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None
+) -> List[Dict[str, float]]:
+    """
+    Train each model on a holdout split and score it on the held-out ratings.
+    
+    Rating predictions for all test pairs (collaborative models only) and
+    the top-k lists of all test users are computed with the batch paths.
+    
+    Args:
+        ratings_df: DataFrame with columns: userId, movieId, rating (and timestamp)
+        movies_df: DataFrame with the movie catalog
+        models: Models to evaluate: 'user', 'item', 'mf' and/or 'content'
+        strategy: Holdout strategy, 'random' or 'temporal'
+        test_fraction: Fraction of each user's ratings held out
+        k: Length of the ranked lists (precision@k, recall@k, NDCG@k)
+        relevant_rating: Minimum rating of a relevant test movie
+        seed: Random seed of the split
+        n_factors: Number of latent factors for 'mf'
+        n_jobs: Threads building the similarity matrices
+        split: Optional precomputed (train, test) split used instead
+    
+    Returns:
+        One dictionary per model with its error metrics (rmse, mae,
+        prediction_coverage; NaN for 'content'), ranking metrics (precision,
+        recall, ndcg), catalog coverage, and the build, prediction and
+        recommendation times with their throughputs
+    """
+    unknown = [name for name in models if name not in EVALUATION_MODELS]
+    if unknown:
+        raise ValueError(f"Unknown models: {', '.join(unknown)}")
+    
+    train_df, test_df = split if split is not None else holdout_split(ratings_df, test_fraction, strategy, seed)
+    test_users = np.unique(test_df['userId'].to_numpy(dtype=np.int64))
+    n_catalog = movies_df['movieId'].nunique()
+    
+    results = []
+    for name in models:
+        if name == 'content':
+            model, build_seconds = _timed(lambda: ContentBasedRecommender(movies_df, n_jobs=n_jobs))
+            errors = {'rmse': float('nan'), 'mae': float('nan'), 'prediction_coverage': float('nan')}
+            predict_seconds = 0.0
+            recommended, recommend_seconds = _timed(
+                lambda: recommend_by_content(model, train_df, test_users, k, relevant_rating)
+            )
+        else:
+            model, build_seconds = _timed(lambda: CollaborativeFilteringRecommender(
+                train_df, movies_df, method=name, n_factors=n_factors, n_jobs=n_jobs
+            ))
+            fit, predict_seconds = _timed(lambda: model.evaluate(test_df))
+            errors = {'rmse': fit['rmse'], 'mae': fit['mae'], 'prediction_coverage': fit['coverage']}
+            (recommended, _), recommend_seconds = _timed(
+                lambda: model.recommend_for_users(test_users, k, min_rating=0.0)
+            )
+        
+        ranking = ranking_metrics(test_users, recommended, test_df, relevant_rating)
+        distinct = np.unique(recommended[recommended >= 0])
+        results.append({
+            'model': name,
+            'k': k,
+            **errors,
+            'precision': ranking['precision'],
+            'recall': ranking['recall'],
+            'ndcg': ranking['ndcg'],
+            'coverage': len(distinct) / n_catalog if n_catalog else 0.0,
+            'n_test_ratings': len(test_df),
+            'n_test_users': len(test_users),
+            'build_seconds': build_seconds,
+            'predict_seconds': predict_seconds,
+            'predictions_per_second': len(test_df) / predict_seconds if predict_seconds else float('nan'),
+            'recommend_seconds': recommend_seconds,
+            'users_per_second': len(test_users) / recommend_seconds if recommend_seconds else float('nan')
+        })
+    
+    return results
@@ -0,0 +1,141 @@
+"""
+Genre index over the movie catalog
+Parses the '|'-joined genre strings once into a sparse multi-hot matrix and one bitset per genre
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+
+GENRE_MATCHES = ('any', 'all')
+
+
+class GenreIndex:
+    """
+    Exact-name genre filters over a list of movies.
+    
+    Every movie's genres are split once into a sparse movie x genre
+    multi-hot matrix, and each genre column is packed into a bitset (one
+    bit per movie), so a filter on several genres is a bitwise OR ('any')
+    or AND ('all') of a few byte arrays. Genre names match whole names,
+    ignoring case and surrounding spaces: 'Music' does not match 'Musical'.
+    
+    Movies are also kept in one precomputed order (best rated first), so
+    filtered results come out ranked without sorting.
+    """
+    
+    def __init__(self, genres: Sequence[str], ratings: Optional[np.ndarray] = None):
+        """
+        Build the index.
+        
+        Args:
+            genres: '|'-joined genre string of each movie (empty or missing
+                for none)
+            ratings: Optional rating of each movie (e.g. IMDb); filtered
+                movies are returned highest rated first (ties and missing
+                ratings in movie order)
+        """
+        # Genre strings repeat, so each distinct combination is split once
+        codes, combinations = pd.factorize(pd.Series(genres, dtype=object).fillna(''))
+        self.names: List[str] = []
+        self._columns: Dict[str, int] = {}
+        rows, columns = [], []
+        for row, combination in enumerate(combinations):
+            for name in str(combination).split('|'):
+                name = name.strip()
+                if not name:
+                    continue
+                key = name.lower()
+                if key not in self._columns:
+                    self._columns[key] = len(self.names)
+                    self.names.append(name)
+                rows.append(row)
+                columns.append(self._columns[key])
+        
+        combination_matrix = csr_matrix(
+            (np.ones(len(rows), dtype=np.int8), (rows, columns)),
+            shape=(len(combinations), len(self.names))
+        )
+        combination_matrix.data[:] = 1
+        self.matrix = combination_matrix[codes]
+        self.n_movies = len(codes)
+        
+        # One row of packed bits per genre
+        membership = np.zeros((len(self.names), self.n_movies), dtype=bool)
+        coo = self.matrix.tocoo()
+        membership[coo.col, coo.row] = True
+        self.bitsets = np.packbits(membership, axis=1)
+        
+        if ratings is None:
+            self.order = np.arange(self.n_movies)
+        else:
+            # NaN ratings sort last
+            self.order = np.argsort(-np.asarray(ratings, dtype=float), kind='stable')
+    
+    def __len__(self) -> int:
+        return self.n_movies
+    
+    def __contains__(self, genre: str) -> bool:
+        return genre.strip().lower() in self._columns
+    
+    def genre_ids(self, genres: Iterable[str]) -> List[Optional[int]]:
+        """Get the column of each genre name (None for unknown genres)."""
+        return [self._columns.get(genre.strip().lower()) for genre in genres]
+    
+    def mask(self, genres: Iterable[str], match: str = 'any') -> np.ndarray:
+        """
+        Get the movies having any (or all) of some genres.
+        
+        Args:
+            genres: Genre names
+            match: 'any' for movies with at least one of the genres, 'all'
+                for movies with every one of them
+        
+        Returns:
+            Boolean array with one entry per movie
+        """
+        if match not in GENRE_MATCHES:
+            raise ValueError(f"match must be one of {', '.join(GENRE_MATCHES)}")
+        
+        ids = self.genre_ids(genres)
+        if match == 'all':
+            if None in ids:
+                # No movie has a genre that does not exist
+                return np.zeros(self.n_movies, dtype=bool)
+            if not ids:
+                return np.ones(self.n_movies, dtype=bool)
+            bits = np.bitwise_and.reduce(self.bitsets[ids], axis=0)
+        else:
+            known = [column for column in ids if column is not None]
+            if not known:
+                return np.zeros(self.n_movies, dtype=bool)
+            bits = np.bitwise_or.reduce(self.bitsets[known], axis=0)
+        return np.unpackbits(bits, count=self.n_movies).view(bool)
+    
+    def ranked(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Get the selected movies in rating order.
+        
+        Args:
+            mask: Boolean array with one entry per movie
+        
+        Returns:
+            Positions of the selected movies, highest rated first
+        """
+        return self.order[mask[self.order]]
+    
+    def movies(self, genres: Iterable[str], match: str = 'any') -> np.ndarray:
+        """
+        Get the movies having any (or all) of some genres, highest rated first.
+        
+        Args:
+            genres: Genre names
+            match: 'any' or 'all' (see mask)
+        
+        Returns:
+            Movie positions
+        """
+        return self.ranked(self.mask(genres, match))
@@ -0,0 +1,117 @@
+"""
+Lazy, thread-safe model holders
+Models are built (or loaded from saved artifacts) on first use instead of at import time
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+_UNSET = object()
+
+
+class LazyModel:
+    """
+    Builds a model on first use, exactly once per process.
+    
+    Concurrent first calls block on a lock while one thread runs the factory;
+    later calls return the stored model without locking. A factory that
+    raises leaves the model unloaded, so the next call tries again.
+    """
+    
+    def __init__(self, name: str, factory: Callable[[], object]):
+        """
+        Initialize the holder.
+        
+        Args:
+            name: Name reported by status()
+            factory: Function building or loading the model
+        """
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value = _UNSET
+        self._loading = False
+        self.error = None
+        self.load_seconds = None
+    
+    @property
+    def ready(self) -> bool:
+        """Whether the model has been built."""
+        return self._value is not _UNSET
+    
+    def get(self):
+        """
+        Get the model, building it if needed.
+        
+        Returns:
+            The model returned by the factory
+        """
+        value = self._value
+        if value is not _UNSET:
+            return value
+        
+        with self._lock:
+            if self._value is _UNSET:
+                self._loading = True
+                start = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                    self.error = None
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    self._loading = False
+                    self.load_seconds = time.perf_counter() - start
+            return self._value
+    
+    def status(self) -> dict:
+        """
+        Get the load state of the model.
+        
+        Returns:
+            Dictionary with ready, loading, error and load_seconds
+        """
+        return {
+            'ready': self.ready,
+            'loading': self._loading,
+            'error': self.error,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None
+        }
+
+
+def warm_up(
+    models: Dict[str, LazyModel],
+    names: Optional[Iterable[str]] = None,
+    background: bool = False
+) -> Optional[threading.Thread]:
+    """
+    Build models ahead of their first use.
+    
+    Args:
+        models: Lazy models by name
+        names: Models to build (default: all, in dictionary order)
+        background: Build in a daemon thread instead of blocking
+    
+    Returns:
+        The warm-up thread when background is True, else None
+    """
+    selected: List[LazyModel] = [models[name] for name in (names if names is not None else models)]
+    
+    def run():
+        for model in selected:
+            try:
+                model.get()
+            except Exception:
+                # Recorded in model.error and reported by status()
+                pass
+    
+    if not background:
+        run()
+        return None
+    
+    thread = threading.Thread(target=run, name='model-warm-up', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,107 @@
+"""
+Logging setup for the recommender package
+Library modules log to "recommender.*" loggers; applications choose the level, format and destination here
+"""
+
+import json
+import logging
+import sys
+import time
+from typing import Optional, TextIO, Union
+
+
+LOG_FORMATS = ('plain', 'text', 'json')
+
+# Attributes every LogRecord has; anything else was passed in extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def record_fields(record: logging.LogRecord) -> dict:
+    """Get the structured fields passed to a log call with extra={...}."""
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+def elapsed_ms(start: float) -> float:
+    """Milliseconds since a time.perf_counter() reading, rounded for log fields."""
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Time, level, logger and message, followed by the structured fields as key=value pairs.
+    """
+    
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            message += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return message
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per record with the structured fields as top-level keys.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **record_fields(record)
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(
+    level: Union[int, str] = logging.INFO,
+    fmt: str = 'text',
+    stream: Optional[TextIO] = None,
+    quiet: bool = False
+) -> logging.Logger:
+    """
+    Send the package's log records to a stream.
+    
+    Replaces any handler added by an earlier call, so it can be called again
+    to change the settings. Records are not passed on to the root logger.
+    Without this call the package follows the application's own logging
+    configuration (and stays silent if there is none).
+    
+    Args:
+        level: Minimum level logged (e.g. logging.INFO or 'DEBUG')
+        fmt: 'plain' (message only, as printed by the CLI), 'text' (time,
+            level, logger, message and key=value fields) or 'json' (one
+            object per line)
+        stream: Destination stream (default: sys.stderr)
+        quiet: Only log warnings and errors, whatever the level
+    
+    Returns:
+        The configured "recommender" logger
+    """
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Log format must be one of {', '.join(LOG_FORMATS)}")
+    
+    logger = logging.getLogger('recommender')
+    for handler in [h for h in logger.handlers if getattr(h, '_recommender_handler', False)]:
+        logger.removeHandler(handler)
+    
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    handler._recommender_handler = True
+    if fmt == 'json':
+        handler.setFormatter(JSONFormatter())
+    elif fmt == 'text':
+        handler.setFormatter(TextFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING if quiet else level)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,274 @@
+"""
+Opt-in timers, counters and histograms for the hot paths
+Measurements are kept in one process-wide registry and exported as a breakdown table or in the Prometheus text format
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of every exported metric name
+PREFIX = 'recommender'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Returned by timer() while metrics are disabled
+_NO_TIMER = nullcontext()
+
+
+class Histogram:
+    """
+    Counts of observed values per bucket, with their sum and maximum.
+    """
+    
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty histogram.
+        
+        Args:
+            buckets: Increasing bucket upper bounds; larger values fall in
+                the final +Inf bucket
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def observe(self, value: float) -> None:
+        """Add one value."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+
+class _Timer:
+    """Context manager adding its elapsed seconds to a histogram on exit."""
+    
+    def __init__(self, registry: 'MetricsRegistry', name: str, labels: Labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = None
+    
+    def __enter__(self) -> '_Timer':
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.registry._observe(self.name, self.labels, time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters, gauges and histograms keyed by name and labels.
+    
+    Recording is opt-in: while the registry is disabled, timer(), inc() and
+    observe() return immediately without recording anything, so
+    instrumented code pays almost nothing for it.
+    """
+    
+    def __init__(self, enabled: bool = False):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            enabled: Whether to record measurements from the start
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+    
+    @staticmethod
+    def _labels(labels: dict) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def _observe(self, name: str, labels: Labels, value: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram()
+            histogram.observe(value)
+    
+    def timer(self, name: str, **labels):
+        """
+        Time a block of code into a histogram.
+        
+        Usage:
+            with metrics.timer('stage_seconds', stage='vectorize'):
+                ...
+        
+        Args:
+            name: Histogram name (seconds)
+            **labels: Label values of the series
+        
+        Returns:
+            Context manager (a no-op while the registry is disabled)
+        """
+        if not self.enabled:
+            return _NO_TIMER
+        return _Timer(self, name, self._labels(labels))
+    
+    def timed(self, name: str, **labels) -> Callable:
+        """
+        Decorator timing every call of a function into a histogram.
+        
+        Args:
+            name: Histogram name (seconds)
+            **labels: Label values of the series
+        
+        Returns:
+            Decorator
+        """
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Add a value to a histogram."""
+        if self.enabled:
+            self._observe(name, self._labels(labels), value)
+    
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increase a counter."""
+        if not self.enabled:
+            return
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to its current value (recorded even while disabled)."""
+        with self._lock:
+            self._gauges[(name, self._labels(labels))] = value
+    
+    def reset(self) -> None:
+        """Remove all measurements."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+    
+    def summary(self) -> List[dict]:
+        """
+        Summarize every histogram series, largest total time first.
+        
+        Returns:
+            One dictionary per series with name, labels, count, total (sum
+            of the observed values), mean and max
+        """
+        with self._lock:
+            series = [
+                {
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': histogram.count,
+                    'total': histogram.sum,
+                    'mean': histogram.sum / histogram.count,
+                    'max': histogram.max
+                }
+                for (name, labels), histogram in self._histograms.items()
+            ]
+        return sorted(series, key=lambda row: row['total'], reverse=True)
+    
+    def counters(self) -> List[dict]:
+        """
+        Get every counter series.
+        
+        Returns:
+            One dictionary per series with name, labels and value
+        """
+        with self._lock:
+            return [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+    
+    def render_prometheus(self) -> str:
+        """
+        Export all series in the Prometheus text exposition format.
+        
+        Names get the 'recommender_' prefix; counters also get the '_total'
+        suffix.
+        
+        Returns:
+            Exposition text
+        """
+        lines = []
+        with self._lock:
+            families = {}
+            for (name, labels), value in self._counters.items():
+                families.setdefault((f'{PREFIX}_{name}_total', 'counter'), []).append((labels, value))
+            for (name, labels), value in self._gauges.items():
+                families.setdefault((f'{PREFIX}_{name}', 'gauge'), []).append((labels, value))
+            for (name, labels), histogram in self._histograms.items():
+                families.setdefault((f'{PREFIX}_{name}', 'histogram'), []).append((labels, histogram))
+            
+            for (name, kind), series in sorted(families.items()):
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in sorted(series, key=lambda item: item[0]):
+                    if kind != 'histogram':
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + (float('inf'),), value.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else _format_value(bound)
+                        lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value.sum)}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Labels) -> str:
+    """Format label pairs as {key="value",...} (empty without labels)."""
+    if not labels:
+        return ''
+    escaped = (
+        (key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value (integers without a decimal point)."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Process-wide registry used by the recommender package
+metrics = MetricsRegistry()
+
+
+def enable(enabled: bool = True) -> None:
+    """Turn recording on (or off) for the process-wide registry."""
+    metrics.enabled = enabled
+
+
+def timer(name: str, **labels):
+    """Time a block of code with the process-wide registry (see MetricsRegistry.timer)."""
+    return metrics.timer(name, **labels)
+
+
+def timed(name: str, **labels) -> Callable:
+    """Decorator timing calls with the process-wide registry (see MetricsRegistry.timed)."""
+    return metrics.timed(name, **labels)
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    """Increase a counter of the process-wide registry."""
+    metrics.inc(name, value, **labels)
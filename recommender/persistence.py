@@ -0,0 +1,267 @@
+"""
+On-disk model artifacts for the recommenders
+Dense arrays are stored as .npy files so they can be memory-mapped on load
+"""
+
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, csc_matrix, issparse
+
+from . import __version__
+
+
+# Bump when the layout of an artifact directory changes
+ARTIFACT_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+
+
+@contextmanager
+def artifact_writer(path: str) -> Iterator[str]:
+    """
+    Write an artifact directory atomically.
+    
+    Files are written to a temporary sibling directory which replaces path
+    only once everything has been written, so readers never see a partial
+    artifact.
+    
+    Args:
+        path: Final artifact directory
+    
+    Yields:
+        Temporary directory to write files into
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    
+    try:
+        yield tmp_path
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    
+    if os.path.exists(path):
+        old_path = f"{path}.old-{os.getpid()}"
+        os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    else:
+        os.replace(tmp_path, path)
+
+
+def write_manifest(path: str, kind: str, params: dict, source: Optional[dict] = None) -> None:
+    """
+    Write the manifest describing an artifact directory.
+    
+    Args:
+        path: Artifact directory
+        kind: Model kind (e.g. 'content', 'collaborative')
+        params: Constructor parameters needed to restore the model
+        source: Optional fingerprint of the data the model was built from
+    """
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'package_version': __version__,
+        'kind': kind,
+        'created_at': time.time(),
+        'params': params,
+        'source': source
+    }
+    with open(os.path.join(path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_manifest(path: str, kind: Optional[str] = None) -> dict:
+    """
+    Read and validate the manifest of an artifact directory.
+    
+    Args:
+        path: Artifact directory
+        kind: Expected model kind, or None to accept any
+    
+    Returns:
+        Manifest dictionary
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"No model artifact found at {path}")
+    
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Artifact at {path} has format version {manifest.get('format_version')}, "
+            f"expected {ARTIFACT_FORMAT_VERSION}. Rebuild the model."
+        )
+    if kind is not None and manifest.get('kind') != kind:
+        raise ValueError(f"Artifact at {path} holds a '{manifest.get('kind')}' model, not '{kind}'")
+    
+    return manifest
+
+
+def source_fingerprint(paths: Iterable[str]) -> Dict[str, list]:
+    """
+    Fingerprint source files by size and modification time.
+    
+    Args:
+        paths: Files the model is built from
+    
+    Returns:
+        Dictionary of file name -> [size, mtime]
+    """
+    fingerprint = {}
+    for file_path in paths:
+        stat = os.stat(file_path)
+        fingerprint[os.path.basename(file_path)] = [stat.st_size, stat.st_mtime]
+    return fingerprint
+
+
+def is_fresh(
+    path: str,
+    kind: str,
+    source: Optional[dict] = None,
+    params: Optional[dict] = None
+) -> bool:
+    """
+    Check whether an artifact exists, is readable and matches the source data.
+    
+    Args:
+        path: Artifact directory
+        kind: Expected model kind
+        source: Fingerprint the artifact must have been built from, if given
+        params: Model parameters the artifact must have been built with, if given
+    
+    Returns:
+        True if the artifact can be loaded instead of rebuilding the model
+    """
+    try:
+        manifest = read_manifest(path, kind)
+    except (FileNotFoundError, ValueError):
+        return False
+    
+    if source is not None and manifest.get('source') != source:
+        return False
+    if params is not None:
+        stored = manifest.get('params', {})
+        return all(stored.get(key) == value for key, value in params.items())
+    return True
+
+
+def load_or_build(
+    path: str,
+    kind: str,
+    source: Optional[dict],
+    build: Callable[[], object],
+    load: Callable[[str], object],
+    params: Optional[dict] = None
+) -> Tuple[object, bool]:
+    """
+    Load a model artifact if it is fresh, otherwise build the model and save it.
+    
+    Failing to save (e.g. a read-only directory, or another process replacing
+    the artifact at the same time) is not an error; the built model is
+    still returned.
+    
+    Args:
+        path: Artifact directory
+        kind: Model kind
+        source: Fingerprint of the data the model is built from
+        build: Function building the model
+        load: Function loading the model from path (e.g. the class's load)
+        params: Model parameters the artifact must have been built with, if given
+    
+    Returns:
+        Tuple of (model, whether it was loaded from the artifact)
+    """
+    if is_fresh(path, kind, source, params):
+        return load(path), True
+    
+    model = build()
+    try:
+        model.save(path, source=source)
+    except OSError:
+        pass
+    return model, False
+
+
+def save_array(path: str, name: str, array: np.ndarray) -> None:
+    """Save a dense array as <name>.npy."""
+    np.save(os.path.join(path, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+
+
+def load_array(path: str, name: str, mmap_mode: Optional[str] = 'r') -> np.ndarray:
+    """Load <name>.npy, memory-mapped unless mmap_mode is None."""
+    return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+
+
+def save_matrix(path: str, name: str, matrix) -> None:
+    """
+    Save a dense or CSR/CSC matrix.
+    
+    Sparse matrices are stored as separate data/indices/indptr .npy files
+    (rather than a compressed .npz) so each part can be memory-mapped.
+    """
+    if issparse(matrix):
+        fmt = 'csc' if matrix.format == 'csc' else 'csr'
+        matrix = matrix.asformat(fmt)
+        save_array(path, f"{name}.data", matrix.data)
+        save_array(path, f"{name}.indices", matrix.indices)
+        save_array(path, f"{name}.indptr", matrix.indptr)
+        meta = {'format': fmt, 'shape': list(matrix.shape)}
+    else:
+        save_array(path, name, matrix)
+        meta = {'format': 'dense'}
+    
+    with open(os.path.join(path, f"{name}.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def load_matrix(path: str, name: str, mmap_mode: Optional[str] = 'r'):
+    """Load a matrix written by save_matrix."""
+    with open(os.path.join(path, f"{name}.json"), encoding='utf-8') as f:
+        meta = json.load(f)
+    
+    if meta['format'] == 'dense':
+        return load_array(path, name, mmap_mode)
+    
+    parts = (
+        load_array(path, f"{name}.data", mmap_mode),
+        load_array(path, f"{name}.indices", mmap_mode),
+        load_array(path, f"{name}.indptr", mmap_mode)
+    )
+    matrix_cls = csc_matrix if meta['format'] == 'csc' else csr_matrix
+    return matrix_cls(parts, shape=tuple(meta['shape']), copy=False)
+
+
+def save_frame(path: str, name: str, df: pd.DataFrame) -> None:
+    """Save a DataFrame as <name>.pkl (keeps dtypes exactly)."""
+    df.to_pickle(os.path.join(path, f"{name}.pkl"))
+
+
+def load_frame(path: str, name: str) -> pd.DataFrame:
+    """Load a DataFrame written by save_frame."""
+    return pd.read_pickle(os.path.join(path, f"{name}.pkl"))
+
+
+def save_json(path: str, name: str, obj) -> None:
+    """Save a JSON-serializable object as <name>.json."""
+    with open(os.path.join(path, f"{name}.json"), 'w', encoding='utf-8') as f:
+        json.dump(obj, f)
+
+
+def load_json(path: str, name: str):
+    """Load an object written by save_json."""
+    with open(os.path.join(path, f"{name}.json"), encoding='utf-8') as f:
+        return json.load(f)
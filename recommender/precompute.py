@@ -0,0 +1,184 @@
+"""
+Precomputed recommendation tables
+Top-N lists for every movie or user, stored as fixed-width arrays that are memory-mapped on load
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from . import persistence
+from .batch import run_batch
+from .data_loader import IdIndex
+
+
+class RecommendationTable:
+    """
+    Top-N recommendations for every key (movie ID or user ID).
+    
+    Row i of ids/scores holds the ranked movie IDs and scores of keys[i];
+    rows with fewer than width results are padded with -1 / NaN. Serving a
+    key is an index lookup plus a slice of one row.
+    """
+    
+    def __init__(self, keys: np.ndarray, ids: np.ndarray, scores: np.ndarray, params: Optional[dict] = None):
+        """
+        Initialize the table.
+        
+        Args:
+            keys: Movie or user ID of each row
+            ids: Recommended movie IDs, shape (len(keys), width)
+            scores: Scores aligned with ids
+            params: Parameters the table was built with (stored in the manifest)
+        """
+        self.keys = keys
+        self.ids = ids
+        self.scores = scores
+        self.params = params or {}
+        self.key_index = IdIndex(keys)
+    
+    @property
+    def width(self) -> int:
+        """Number of recommendations stored per key."""
+        return self.ids.shape[1]
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def lookup(self, key: int, n: Optional[int] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get the stored recommendations of a key.
+        
+        Args:
+            key: Movie or user ID
+            n: Maximum number of recommendations (at most width), or None for all
+        
+        Returns:
+            Tuple of (movie IDs, scores), best first, or None if the key is
+            not in the table
+        """
+        row = self.key_index.get(key)
+        if row is None:
+            return None
+        
+        ids = self.ids[row, :n]
+        found = ids >= 0
+        return np.asarray(ids[found]), np.asarray(self.scores[row, :n][found], dtype=float)
+    
+    def lookup_many(self, keys, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the stored recommendations of many keys at once.
+        
+        Args:
+            keys: Movie or user IDs
+            n: Maximum number of recommendations per key (at most width), or None for all
+        
+        Returns:
+            Tuple of (movie IDs, scores) arrays with one row per key, padded
+            with -1 / NaN (unknown keys get a fully padded row)
+        """
+        rows = self.key_index.get_many(keys)
+        width = self.width if n is None else max(0, min(n, self.width))
+        ids = np.full((len(rows), width), -1, dtype=np.int64)
+        scores = np.full((len(rows), width), np.nan)
+        
+        found = rows >= 0
+        ids[found] = self.ids[rows[found], :width]
+        scores[found] = self.scores[rows[found], :width]
+        return ids, scores
+    
+    def save(self, path: str, source: Optional[dict] = None) -> None:
+        """
+        Save the table to an artifact directory.
+        
+        Args:
+            path: Directory to write (replaced atomically if it exists)
+            source: Optional fingerprint of the data the table was built from
+        """
+        with persistence.artifact_writer(path) as tmp_path:
+            persistence.save_array(tmp_path, 'keys', self.keys)
+            persistence.save_array(tmp_path, 'ids', self.ids)
+            persistence.save_array(tmp_path, 'scores', self.scores)
+            persistence.write_manifest(tmp_path, 'table', self.params, source)
+    
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'RecommendationTable':
+        """
+        Load a table written by save().
+        
+        Args:
+            path: Artifact directory
+            mmap_mode: Memory-map mode for the stored arrays
+        
+        Returns:
+            RecommendationTable
+        """
+        manifest = persistence.read_manifest(path, 'table')
+        return cls(
+            persistence.load_array(path, 'keys', mmap_mode),
+            persistence.load_array(path, 'ids', mmap_mode),
+            persistence.load_array(path, 'scores', mmap_mode),
+            manifest['params']
+        )
+
+
+def build_movie_table(
+    content_model,
+    n: int = 20,
+    min_imdb_rating: float = 0.0,
+    n_jobs: int = 1
+) -> RecommendationTable:
+    """
+    Precompute the most similar movies of every movie.
+    
+    Args:
+        content_model: Fitted ContentBasedRecommender
+        n: Number of similar movies stored per movie
+        min_imdb_rating: Minimum IMDb rating filter
+        n_jobs: Worker processes (see batch.run_batch)
+    
+    Returns:
+        RecommendationTable keyed by movie ID
+    """
+    keys = np.asarray(content_model.movie_index.ids, dtype=np.int64)
+    ids, scores = run_batch(
+        content_model,
+        'get_similar_movie_ids_batch',
+        keys,
+        n_jobs=n_jobs,
+        n_recommendations=n,
+        min_imdb_rating=min_imdb_rating
+    )
+    params = {'table': 'movies', 'n': n, 'min_imdb_rating': min_imdb_rating}
+    return RecommendationTable(keys, ids, scores.astype(np.float32), params)
+
+
+def build_user_table(
+    cf_model,
+    n: int = 20,
+    min_rating: float = 3.0,
+    n_jobs: int = 1
+) -> RecommendationTable:
+    """
+    Precompute the collaborative filtering recommendations of every user.
+    
+    Args:
+        cf_model: Fitted CollaborativeFilteringRecommender
+        n: Number of recommendations stored per user
+        min_rating: Minimum predicted rating to include
+        n_jobs: Worker processes (see batch.run_batch)
+    
+    Returns:
+        RecommendationTable keyed by user ID
+    """
+    keys = np.asarray(cf_model.user_index.ids, dtype=np.int64)
+    ids, scores = run_batch(
+        cf_model,
+        'recommend_for_users',
+        keys,
+        n_jobs=n_jobs,
+        n_recommendations=n,
+        min_rating=min_rating
+    )
+    params = {'table': 'users', 'n': n, 'min_rating': min_rating, 'method': cf_model.method}
+    return RecommendationTable(keys, ids, scores.astype(np.float32), params)
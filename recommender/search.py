@@ -0,0 +1,333 @@
+"""
+Inverted-index search over movie titles, cast and directors
+Every prefix of every token is indexed, so a lookup is a dictionary hit plus a slice;
+a trigram index finds close matches for misspelled queries
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+FieldValues = Sequence[Union[str, Sequence[str], None]]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        List of tokens
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and reduce it to single-space-separated word tokens."""
+    return ' '.join(tokenize(text))
+
+
+def trigrams(text: str) -> set:
+    """
+    Get the character trigrams of normalized text.
+    
+    The text is padded with two leading spaces and one trailing space, so
+    the start of the text (and short texts) still produce trigrams.
+    
+    Args:
+        text: Normalized text
+    
+    Returns:
+        Set of trigrams
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(query: str, text: str, max_distance: Optional[int] = None, prefix: bool = False) -> int:
+    """
+    Levenshtein distance between two strings.
+    
+    Args:
+        query: First string
+        text: Second string
+        max_distance: Stop early once the distance is known to exceed this;
+            the result is then max_distance + 1
+        prefix: Compare query against the closest prefix of text instead of
+            all of it, so trailing text is free
+    
+    Returns:
+        Number of single-character insertions, deletions and substitutions
+    """
+    limit = max_distance + 1 if max_distance is not None else None
+    if prefix and limit is not None:
+        # Longer prefixes of text are already more than max_distance away
+        text = text[:len(query) + max_distance]
+    # row[j] = distance between the query so far and text[:j]
+    row = list(range(len(text) + 1))
+    for i, query_char in enumerate(query, 1):
+        previous, row[0] = row[0], i
+        for j, text_char in enumerate(text, 1):
+            current = min(
+                row[j] + 1,
+                row[j - 1] + 1,
+                previous + (query_char != text_char)
+            )
+            previous, row[j] = row[j], current
+        if limit is not None and min(row) >= limit:
+            return limit
+    
+    distance = min(row) if prefix else row[-1]
+    return min(distance, limit) if limit is not None else distance
+
+
+class SearchIndex:
+    """
+    Prefix search over one or more text fields of a list of documents.
+    
+    Each query token must be a prefix of some token in the document (all
+    query tokens must match). Results are ranked by the fields they matched
+    in (earlier fields rank higher, summed over query tokens), then by
+    rating, then by document order.
+    
+    Postings are stored CSR-style: for each prefix, a slice of one document
+    array that is already in rank order, so a single-token query returns
+    its top results by slicing.
+    """
+    
+    def __init__(
+        self,
+        fields: List[Tuple[str, FieldValues]],
+        ratings: Optional[Sequence[float]] = None
+    ):
+        """
+        Build the index.
+        
+        Args:
+            fields: (name, values) pairs in rank order, e.g.
+                [('title', titles), ('cast', casts), ('director', directors)];
+                each value is a string or a list of strings per document
+            ratings: Optional rating per document used to break ties
+        """
+        if not fields:
+            raise ValueError("At least one field is required")
+        self.field_names = [name for name, _ in fields]
+        n_docs = len(fields[0][1])
+        self.n_docs = n_docs
+        self.ratings = (
+            np.asarray(ratings, dtype=np.float64) if ratings is not None else np.zeros(n_docs)
+        )
+        
+        prefix_ids: Dict[str, int] = {}
+        entry_prefixes, entry_docs, entry_tiers = [], [], []
+        for tier, (_, values) in enumerate(fields):
+            for doc, value in enumerate(values):
+                for token in self._field_tokens(value):
+                    for end in range(1, len(token) + 1):
+                        prefix_id = prefix_ids.setdefault(token[:end], len(prefix_ids))
+                        entry_prefixes.append(prefix_id)
+                        entry_docs.append(doc)
+                        entry_tiers.append(tier)
+        
+        prefixes = np.asarray(entry_prefixes, dtype=np.int64)
+        docs = np.asarray(entry_docs, dtype=np.int64)
+        tiers = np.asarray(entry_tiers, dtype=np.int64)
+        
+        # Keep each (prefix, document) once, with its best (lowest) tier
+        order = np.lexsort((tiers, docs, prefixes))
+        prefixes, docs, tiers = prefixes[order], docs[order], tiers[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (prefixes[1:] != prefixes[:-1]) | (docs[1:] != docs[:-1])
+        prefixes, docs, tiers = prefixes[first], docs[first], tiers[first]
+        
+        # Within each prefix: best tier first, then rating, then document order
+        order = np.lexsort((docs, -self.ratings[docs], tiers, prefixes))
+        self._docs = docs[order].astype(np.int32)
+        self._tiers = tiers[order].astype(np.int8)
+        bounds = np.searchsorted(prefixes[order], np.arange(len(prefix_ids) + 1))
+        self._slices = {
+            prefix: (int(bounds[prefix_id]), int(bounds[prefix_id + 1]))
+            for prefix, prefix_id in prefix_ids.items()
+        }
+        
+        self.fuzzy = FuzzyIndex(fields, self.ratings)
+    
+    @staticmethod
+    def _field_tokens(value) -> Iterable[str]:
+        """Get the distinct tokens of a field value."""
+        if value is None:
+            return ()
+        if isinstance(value, str):
+            return set(tokenize(value))
+        tokens = set()
+        for item in value:
+            if isinstance(item, str):
+                tokens.update(tokenize(item))
+        return tokens
+    
+    def __len__(self) -> int:
+        return self.n_docs
+    
+    def _postings(self, prefix: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the ranked (documents, tiers) matching one query token."""
+        start, end = self._slices.get(prefix, (0, 0))
+        return self._docs[start:end], self._tiers[start:end]
+    
+    def search(self, query: str, limit: Optional[int] = 20, fuzzy: bool = True) -> np.ndarray:
+        """
+        Find the documents matching a query.
+        
+        Args:
+            query: Search text; each token is matched as a prefix
+            limit: Maximum number of results (negative counts as 0), or None for all
+            fuzzy: Fall back to the closest spellings (see FuzzyIndex)
+                when no document matches
+        
+        Returns:
+            Array of document positions, best match first
+        """
+        if limit is not None:
+            limit = max(0, limit)
+        docs = self._prefix_search(query, limit)
+        if len(docs) == 0 and fuzzy:
+            matches = self.fuzzy.lookup(query, limit=limit if limit is not None else 20)
+            docs = np.array([doc for doc, _, _ in matches], dtype=np.int64)
+        return docs
+    
+    def _prefix_search(self, query: str, limit: Optional[int]) -> np.ndarray:
+        """Find the documents having every query token as a word prefix."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return np.array([], dtype=np.int64)
+        
+        postings = sorted((self._postings(token) for token in tokens), key=lambda p: len(p[0]))
+        docs, tiers = postings[0]
+        if len(postings) == 1:
+            return docs[:limit].astype(np.int64)
+        
+        # AND the remaining tokens in, summing the tiers each document matched in
+        tiers = tiers.astype(np.int64)
+        for other_docs, other_tiers in postings[1:]:
+            if len(docs) == 0:
+                break
+            docs, here, there = np.intersect1d(docs, other_docs, assume_unique=True, return_indices=True)
+            tiers = tiers[here] + other_tiers[there]
+        
+        order = np.lexsort((docs, -self.ratings[docs], tiers))
+        return docs[order][:limit].astype(np.int64)
+
+
+class FuzzyIndex:
+    """
+    Typo-tolerant lookup of field values by edit distance.
+    
+    Every value is indexed by its character trigrams. A query only scores
+    the values sharing the most trigrams with it (at most max_candidates),
+    so lookups cost the same however many documents are indexed. Values are
+    compared as prefixes, so "dangl" is one edit away from "Dangal" and
+    "shahrukh" is one edit away from "Shah Rukh Khan".
+    """
+    
+    def __init__(
+        self,
+        fields: List[Tuple[str, FieldValues]],
+        ratings: Optional[Sequence[float]] = None,
+        max_candidates: int = 64
+    ):
+        """
+        Build the index.
+        
+        Args:
+            fields: (name, values) pairs in rank order, as for SearchIndex
+            ratings: Optional rating per document used to break ties
+            max_candidates: Number of values compared per lookup
+        """
+        n_docs = len(fields[0][1]) if fields else 0
+        self.ratings = (
+            np.asarray(ratings, dtype=np.float64) if ratings is not None else np.zeros(n_docs)
+        )
+        self.max_candidates = max_candidates
+        
+        # One entry per distinct (document, normalized value)
+        self._values: List[str] = []
+        docs, tiers = [], []
+        postings: Dict[str, List[int]] = {}
+        for tier, (_, values) in enumerate(fields):
+            for doc, value in enumerate(values):
+                items = [value] if isinstance(value, str) else (value or [])
+                for text in dict.fromkeys(normalize(item) for item in items if isinstance(item, str)):
+                    if not text:
+                        continue
+                    entry = len(self._values)
+                    self._values.append(text)
+                    docs.append(doc)
+                    tiers.append(tier)
+                    for gram in trigrams(text):
+                        postings.setdefault(gram, []).append(entry)
+        
+        self._docs = np.asarray(docs, dtype=np.int32)
+        self._tiers = np.asarray(tiers, dtype=np.int8)
+        self._lengths = np.asarray([len(text) for text in self._values], dtype=np.int32)
+        self._postings = {gram: np.asarray(entries, dtype=np.int32) for gram, entries in postings.items()}
+    
+    def lookup(
+        self,
+        query: str,
+        limit: int = 5,
+        max_distance: Optional[int] = None
+    ) -> List[Tuple[int, int, float]]:
+        """
+        Find the documents with a value closest to a (possibly misspelled) query.
+        
+        Args:
+            query: Search text
+            limit: Maximum number of results (negative counts as 0)
+            max_distance: Largest edit distance accepted (default: a quarter
+                of the query length, at least 1)
+        
+        Returns:
+            List of (document, edit distance, similarity) tuples, closest
+            first; similarity is 1 - distance / query length
+        """
+        text = normalize(query)
+        if not text:
+            return []
+        if max_distance is None:
+            max_distance = max(1, len(text) // 4)
+        
+        grams = trigrams(text)
+        hits = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not hits:
+            return []
+        entries, shared = np.unique(np.concatenate(hits), return_counts=True)
+        
+        # Each edit changes at most three trigrams (plus the trailing one a
+        # prefix match loses), and values too short to contain the query
+        # within max_distance cannot match
+        keep = (
+            (shared >= len(grams) - 3 * max_distance - 1)
+            & (self._lengths[entries] >= len(text) - max_distance)
+        )
+        entries, shared = entries[keep], shared[keep]
+        order = np.argsort(-shared, kind='stable')[:self.max_candidates]
+        
+        best: Dict[int, Tuple[int, int, int]] = {}
+        for entry in entries[order].tolist():
+            value = self._values[entry]
+            distance = edit_distance(text, value, max_distance, prefix=True)
+            if distance > max_distance:
+                continue
+            doc = int(self._docs[entry])
+            # Prefer a closer prefix, then a closer whole value, then an earlier field
+            key = (distance, edit_distance(text, value), int(self._tiers[entry]))
+            if doc not in best or key < best[doc]:
+                best[doc] = key
+        
+        ranked = sorted(best, key=lambda doc: (best[doc], -self.ratings[doc], doc))[:max(0, limit)]
+        return [(doc, best[doc][0], 1.0 - best[doc][0] / len(text)) for doc in ranked]
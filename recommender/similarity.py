@@ -0,0 +1,459 @@
+"""
+Similarity helpers shared by the content-based and collaborative recommenders
+Builds either a dense cosine similarity matrix or a sparse top-K neighbour index
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+from .ann import LSHIndex
+from .metrics import timer
+
+
+SimilarityMatrix = Union[np.ndarray, csr_matrix]
+
+
+def build_similarity_matrix(
+    vectors,
+    n_neighbors: Optional[int] = None,
+    block_size: int = 1024,
+    n_jobs: int = 1,
+    ann: Optional[dict] = None
+) -> SimilarityMatrix:
+    """
+    Build a cosine similarity structure between the rows of a matrix.
+    
+    Args:
+        vectors: Dense or sparse matrix whose rows are compared
+        n_neighbors: If None, return the full dense N x N matrix; otherwise
+            keep only the top n_neighbors per row (see top_k_cosine_similarity)
+        block_size: Number of rows scored at once
+        n_jobs: Number of threads scoring blocks (-1 for one per CPU)
+        ann: Optional LSH parameters (n_tables, window, n_bits, seed); when
+            given, the top-K index is approximate (see lsh_top_k_similarity)
+    
+    Returns:
+        Dense ndarray or sparse CSR similarity matrix
+    """
+    if n_neighbors is None:
+        if ann is not None:
+            raise ValueError("Approximate neighbours need n_neighbors")
+        with timer('stage_seconds', stage='similarity_dense'):
+            if n_jobs == 1:
+                return cosine_similarity(vectors)
+            return dense_cosine_similarity(vectors, block_size=block_size, n_jobs=n_jobs)
+    if ann is not None:
+        with timer('stage_seconds', stage='similarity_lsh'):
+            return lsh_top_k_similarity(vectors, n_neighbors, n_jobs=n_jobs, **ann)
+    with timer('stage_seconds', stage='similarity_top_k'):
+        return top_k_cosine_similarity(vectors, n_neighbors, block_size=block_size, n_jobs=n_jobs)
+
+
+def dense_cosine_similarity(
+    vectors,
+    block_size: int = 1024,
+    n_jobs: int = 1
+) -> np.ndarray:
+    """
+    Build the full dense cosine similarity matrix in row blocks.
+    
+    Gives the same matrix as sklearn's cosine_similarity (up to rounding
+    for dense input); blocks of rows are scored by n_jobs threads straight
+    into the result.
+    
+    Args:
+        vectors: Dense or sparse matrix whose rows are compared
+        block_size: Number of rows scored at once
+        n_jobs: Number of threads scoring blocks (-1 for one per CPU)
+    
+    Returns:
+        Dense N x N ndarray
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    
+    normalized = normalize(csr_matrix(vectors, dtype=np.float64))
+    normalized_t = normalized.T.tocsc()
+    n_rows = normalized.shape[0]
+    result = np.empty((n_rows, n_rows))
+    
+    def score_block(start: int) -> None:
+        end = min(start + block_size, n_rows)
+        result[start:end] = (normalized[start:end] @ normalized_t).toarray()
+    
+    map_blocks(score_block, range(0, n_rows, block_size), n_jobs)
+    return result
+
+
+def top_k_cosine_similarity(
+    vectors,
+    n_neighbors: int,
+    block_size: int = 1024,
+    n_jobs: int = 1
+) -> csr_matrix:
+    """
+    Build a sparse top-K cosine neighbour index.
+    
+    Rows are scored in blocks of block_size against all rows, so peak memory
+    is n_jobs x block_size x N instead of N x N. Each row keeps its
+    n_neighbors most similar other rows plus itself on the diagonal; zero
+    similarities are not stored.
+    
+    Args:
+        vectors: Dense or sparse matrix whose rows are compared
+        n_neighbors: Number of neighbours to keep per row (excluding itself)
+        block_size: Number of rows scored at once
+        n_jobs: Number of threads scoring blocks (-1 for one per CPU)
+    
+    Returns:
+        CSR matrix of shape (N, N) with at most n_neighbors + 1 entries per row
+    """
+    if n_neighbors < 1:
+        raise ValueError("n_neighbors must be at least 1")
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    
+    normalized = normalize(csr_matrix(vectors, dtype=np.float64))
+    normalized_t = normalized.T.tocsc()
+    n_rows = normalized.shape[0]
+    k = min(n_neighbors, n_rows - 1)
+    
+    def score_block(start: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        end = min(start + block_size, n_rows)
+        block = (normalized[start:end] @ normalized_t).toarray()
+        return _block_top_k(block, np.arange(start, end), k)
+    
+    parts = map_blocks(score_block, range(0, n_rows, block_size), n_jobs)
+    return _neighbour_index(
+        [rows for rows, _, _ in parts],
+        [cols for _, cols, _ in parts],
+        [scores for _, _, scores in parts],
+        n_rows
+    )
+
+
+def lsh_top_k_similarity(
+    vectors,
+    n_neighbors: int,
+    n_tables: int = 8,
+    window: int = 256,
+    n_bits: int = 16,
+    seed: int = 0,
+    n_jobs: int = 1
+) -> csr_matrix:
+    """
+    Build an approximate top-K cosine neighbour index with LSH.
+    
+    Same structure as top_k_cosine_similarity, but rows are only scored
+    against the rows sharing one of their LSH blocks (see ann.LSHIndex), so
+    the build costs about N x n_tables x window pair scores instead of N x N.
+    A row can miss true neighbours that never share a block with it; more
+    tables or a wider window raise recall at the cost of speed.
+    
+    Args:
+        vectors: Dense or sparse matrix whose rows are compared
+        n_neighbors: Number of neighbours to keep per row (excluding itself)
+        n_tables: Number of hash tables
+        window: Rows per block
+        n_bits: Hyperplanes per table
+        seed: Random seed for the hyperplanes
+        n_jobs: Number of threads scoring blocks (-1 for one per CPU)
+    
+    Returns:
+        CSR matrix of shape (N, N) with at most n_neighbors + 1 entries per row
+    """
+    if n_neighbors < 1:
+        raise ValueError("n_neighbors must be at least 1")
+    
+    index = LSHIndex(vectors, n_tables=n_tables, window=window, n_bits=n_bits, seed=seed)
+    normalized = index.vectors
+    n_rows = normalized.shape[0]
+    blocks = list(index.blocks())
+    
+    def score_block(number: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        rows = blocks[number]
+        block = normalized[rows]
+        local_rows, local_cols, scores = _block_top_k(
+            (block @ block.T).toarray(), np.arange(len(rows)), min(n_neighbors, len(rows) - 1)
+        )
+        # Diagonal entries are added once below
+        neighbours = local_rows != local_cols
+        return rows[local_rows[neighbours]], rows[local_cols[neighbours]], scores[neighbours]
+    
+    parts = map_blocks(score_block, range(len(blocks)), n_jobs)
+    rows = np.concatenate([np.arange(n_rows)] + [rows for rows, _, _ in parts])
+    cols = np.concatenate([np.arange(n_rows)] + [cols for _, cols, _ in parts])
+    scores = np.concatenate(
+        [np.asarray(normalized.multiply(normalized).sum(axis=1)).ravel()] + [scores for _, _, scores in parts]
+    )
+    
+    # A pair found in several blocks is kept once, then each row is trimmed
+    # back to its n_neighbors best (the diagonal is always kept)
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    off_diagonal = np.flatnonzero(first & (rows != cols))
+    off_rows = rows[off_diagonal]
+    rank = np.arange(len(off_rows)) - np.searchsorted(off_rows, off_rows)
+    keep = rows == cols
+    keep[off_diagonal[rank < n_neighbors]] = True
+    
+    return _neighbour_index([rows[keep]], [cols[keep]], [scores[keep]], n_rows)
+
+
+def map_blocks(function: Callable, starts: Iterable[int], n_jobs: int = 1) -> List:
+    """
+    Apply a block function to every block start, in order.
+    
+    Threads are enough to use several cores: the sparse products, dense
+    conversions and partitions that dominate a block release the GIL, and
+    threads share the input matrices instead of copying them to processes.
+    
+    Args:
+        function: Function scoring the block starting at a row
+        starts: First row of each block
+        n_jobs: Number of threads (-1 for one per CPU, 1 to run inline)
+    
+    Returns:
+        List of the function results in block order
+    """
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1:
+        return [function(start) for start in starts]
+    
+    with ThreadPoolExecutor(max_workers=n_jobs, thread_name_prefix='similarity') as pool:
+        return list(pool.map(function, starts))
+
+
+def update_similarity_matrix(
+    similarity_matrix: SimilarityMatrix,
+    vectors,
+    changed: np.ndarray,
+    n_neighbors: Optional[int] = None,
+    block_size: int = 1024
+) -> SimilarityMatrix:
+    """
+    Update a similarity structure after some rows of vectors changed.
+    
+    Only the rows and columns of the changed vectors are rescored. Rows
+    added at the end of vectors (beyond the size of similarity_matrix) must
+    be listed in changed.
+    
+    For a dense matrix the result equals a full rebuild. For a top-K index
+    the changed rows are exact, while every other row merges its stored
+    neighbours with the rescored changed rows; a neighbour it lost to a
+    changed row is not replaced by one it never stored, so those rows can
+    hold fewer (or slightly different) neighbours than a full rebuild.
+    
+    Args:
+        similarity_matrix: Dense ndarray or sparse top-K index to update
+        vectors: Dense or sparse matrix whose rows are compared, after the change
+        changed: Indices of the rows of vectors that changed or were added
+        n_neighbors: None for a dense matrix, else neighbours kept per row
+        block_size: Number of changed rows scored at once
+    
+    Returns:
+        Updated dense ndarray or sparse CSR similarity matrix
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    
+    normalized = normalize(csr_matrix(vectors, dtype=np.float64))
+    normalized_t = normalized.T.tocsc()
+    n_rows = normalized.shape[0]
+    n_old = similarity_matrix.shape[0]
+    changed = np.unique(np.asarray(changed, dtype=np.int64))
+    
+    if n_neighbors is None:
+        # Update in place unless the matrix grows or is backed by a file
+        if n_rows == n_old and similarity_matrix.flags.writeable and not isinstance(similarity_matrix, np.memmap):
+            updated = similarity_matrix
+        else:
+            updated = np.zeros((n_rows, n_rows))
+            updated[:n_old, :n_old] = similarity_matrix
+        for start in range(0, len(changed), block_size):
+            rows = changed[start:start + block_size]
+            block = (normalized[rows] @ normalized_t).toarray()
+            updated[rows, :] = block
+            updated[:, rows] = block.T
+        return updated
+    
+    k = min(n_neighbors, n_rows - 1)
+    is_changed = np.zeros(n_rows, dtype=bool)
+    is_changed[changed] = True
+    
+    # Stored entries between two unchanged rows are still valid
+    stored = similarity_matrix.tocoo()
+    keep = ~is_changed[stored.row] & ~is_changed[stored.col]
+    row_parts, col_parts, score_parts = [stored.row[keep]], [stored.col[keep]], [stored.data[keep]]
+    
+    for start in range(0, len(changed), block_size):
+        rows = changed[start:start + block_size]
+        block = (normalized[rows] @ normalized_t).toarray()
+        
+        # Changed rows against unchanged ones, as candidates for the unchanged rows
+        block_rows, block_cols = np.nonzero(block * ~is_changed)
+        row_parts.append(block_cols)
+        col_parts.append(rows[block_rows])
+        score_parts.append(block[block_rows, block_cols])
+        
+        # Changed rows get their exact top-K
+        top_rows, top_cols, top_scores = _block_top_k(block, rows, k)
+        row_parts.append(top_rows)
+        col_parts.append(top_cols)
+        score_parts.append(top_scores)
+    
+    rows = np.concatenate(row_parts)
+    cols = np.concatenate(col_parts)
+    scores = np.concatenate(score_parts)
+    
+    # Trim each row back to its k best neighbours (the diagonal is always kept)
+    off_diagonal = np.flatnonzero(rows != cols)
+    order = off_diagonal[np.lexsort((-scores[off_diagonal], rows[off_diagonal]))]
+    sorted_rows = rows[order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_rows, sorted_rows)
+    keep = np.concatenate([np.flatnonzero(rows == cols), order[rank < k]])
+    
+    return _neighbour_index([rows[keep]], [cols[keep]], [scores[keep]], n_rows)
+
+
+def _block_top_k(
+    block: np.ndarray,
+    rows: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Select the top-k neighbours of each row of a scored block.
+    
+    Args:
+        block: Scores of the given rows against all rows (modified in place)
+        rows: Row index of each block row
+        k: Number of neighbours to keep per row
+    
+    Returns:
+        Tuple of (rows, columns, scores) including each row's own diagonal entry
+    """
+    block_rows = np.arange(len(rows))
+    
+    # Self-similarity is kept on the diagonal, not counted as a neighbour
+    self_scores = block[block_rows, rows].copy()
+    block[block_rows, rows] = -np.inf
+    
+    if k < 1:
+        return rows, rows, self_scores
+    
+    top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(block, top, axis=1)
+    return (
+        np.concatenate([np.repeat(rows, k), rows]),
+        np.concatenate([top.ravel(), rows]),
+        np.concatenate([top_scores.ravel(), self_scores])
+    )
+
+
+def _neighbour_index(row_parts, col_parts, score_parts, n_rows: int) -> csr_matrix:
+    """Assemble a CSR neighbour index, dropping zero and -inf entries."""
+    rows = np.concatenate(row_parts)
+    cols = np.concatenate(col_parts)
+    scores = np.concatenate(score_parts)
+    
+    keep = np.isfinite(scores) & (scores != 0)
+    index = csr_matrix((scores[keep], (rows[keep], cols[keep])), shape=(n_rows, n_rows))
+    index.sort_indices()
+    return index
+
+
+def similarity_row(similarity_matrix: SimilarityMatrix, idx: int) -> np.ndarray:
+    """
+    Get one row of a dense or sparse similarity matrix as a dense array.
+    
+    Args:
+        similarity_matrix: Dense ndarray or sparse top-K index
+        idx: Row index
+    
+    Returns:
+        1-D array of similarity scores (0 for pairs outside the top-K index)
+    """
+    if issparse(similarity_matrix):
+        return similarity_matrix[idx].toarray().ravel()
+    return similarity_matrix[idx]
+
+
+def similarity_rows(similarity_matrix: SimilarityMatrix, indices: np.ndarray) -> np.ndarray:
+    """
+    Get the candidate scores of many rows as one dense array.
+    
+    Batch counterpart of row_neighbours: for a top-K index, pairs that are
+    not stored are NaN (not candidates) rather than 0.
+    
+    Args:
+        similarity_matrix: Dense ndarray or sparse top-K index
+        indices: Row indices
+    
+    Returns:
+        Array of shape (len(indices), n_columns)
+    """
+    if not issparse(similarity_matrix):
+        return np.asarray(similarity_matrix[indices], dtype=float)
+    
+    rows = similarity_matrix[indices]
+    dense = np.full(rows.shape, np.nan)
+    dense[np.repeat(np.arange(rows.shape[0]), np.diff(rows.indptr)), rows.indices] = rows.data
+    return dense
+
+
+def row_neighbours(
+    similarity_matrix: SimilarityMatrix,
+    idx: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the candidate neighbours stored for one row.
+    
+    For a dense matrix every column is a candidate; for a top-K index only the
+    stored neighbours (and the row itself) are.
+    
+    Args:
+        similarity_matrix: Dense ndarray or sparse top-K index
+        idx: Row index
+    
+    Returns:
+        Tuple of (column indices in ascending order, similarity scores)
+    """
+    if issparse(similarity_matrix):
+        start, end = similarity_matrix.indptr[idx], similarity_matrix.indptr[idx + 1]
+        return similarity_matrix.indices[start:end], similarity_matrix.data[start:end]
+    row = similarity_matrix[idx]
+    return np.arange(len(row)), row
+
+
+def positive_neighbour_weights(similarity_matrix: SimilarityMatrix) -> csr_matrix:
+    """
+    Get the neighbour weights used for rating prediction.
+    
+    Only positive similarities count, and a row is never its own neighbour.
+    
+    Args:
+        similarity_matrix: Dense ndarray or sparse top-K index
+    
+    Returns:
+        CSR matrix of non-negative weights with an empty diagonal
+    """
+    if issparse(similarity_matrix):
+        weights = similarity_matrix.tocsr(copy=True)
+        weights.data = np.clip(weights.data, 0, None)
+        rows = np.repeat(np.arange(weights.shape[0]), np.diff(weights.indptr))
+        weights.data[weights.indices == rows] = 0
+    else:
+        weights = np.clip(similarity_matrix, 0, None)
+        np.fill_diagonal(weights, 0)
+        weights = csr_matrix(weights)
+    weights.eliminate_zeros()
+    return weights
@@ -4,7 +4,7 @@ Utility functions for the Bollywood Movie Recommendation System
 
 import numpy as np
 import pandas as pd
-from typing import List, Tuple, Union
+from typing import List, Optional, Sequence, Tuple, Union
 
 
 def handle_missing_values(df: pd.DataFrame, column: str, fill_value: str = '') -> pd.DataFrame:
@@ -52,6 +52,110 @@ def calculate_mae(y_true: np.ndarray, y_pred: np.ndarray) -> float:
     return np.mean(np.abs(y_true - y_pred))
 
 
+def top_n_indices(
+    scores: np.ndarray,
+    n: int,
+    mask: Optional[np.ndarray] = None,
+    exclude: Optional[Union[int, Sequence[int]]] = None
+) -> np.ndarray:
+    """
+    Select the indices of the n highest scores in descending order.
+    
+    Uses np.argpartition to find the candidates and only sorts those, so the
+    cost is linear in the number of scores rather than a full sort. Ties are
+    broken by index, matching a stable descending sort.
+    
+    Args:
+        scores: 1-D array of scores (NaN entries are never selected)
+        n: Number of indices to return
+        mask: Optional boolean array; only True positions can be selected
+        exclude: Optional index or indices that must not be selected
+        
+    Returns:
+        Array of at most n indices into scores
+    """
+    scores = np.asarray(scores, dtype=float)
+    eligible = ~np.isnan(scores)
+    if mask is not None:
+        eligible &= np.asarray(mask, dtype=bool)
+    if exclude is not None:
+        eligible[exclude] = False
+    
+    candidates = np.flatnonzero(eligible)
+    if n <= 0 or len(candidates) == 0:
+        return np.empty(0, dtype=np.intp)
+    
+    candidate_scores = scores[candidates]
+    if n < len(candidates):
+        # Keep everything tied with the n-th best score so ties resolve by index
+        partition = np.argpartition(-candidate_scores, n - 1)
+        threshold = candidate_scores[partition[n - 1]]
+        keep = candidate_scores >= threshold
+        candidates = candidates[keep]
+        candidate_scores = candidate_scores[keep]
+    
+    order = np.lexsort((candidates, -candidate_scores))
+    return candidates[order[:n]]
+
+
+def top_n_indices_batch(
+    scores: np.ndarray,
+    n: int,
+    mask: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Select the indices of the n highest scores of every row.
+    
+    Row-wise equivalent of top_n_indices: each row gives the same indices
+    in the same order (ties broken by index), computed with one
+    np.argpartition over the whole matrix.
+    
+    Args:
+        scores: 2-D array of scores (NaN entries are never selected)
+        n: Number of indices to return per row
+        mask: Optional boolean array of the same shape; only True positions
+            can be selected
+        
+    Returns:
+        Integer array of shape (n_rows, n); rows with fewer than n eligible
+        scores are padded with -1
+    """
+    scores = np.array(scores, dtype=float)
+    n_rows, n_cols = scores.shape
+    result = np.full((n_rows, max(n, 0)), -1, dtype=np.intp)
+    if n <= 0 or n_cols == 0:
+        return result
+    
+    if mask is not None:
+        scores[~np.asarray(mask, dtype=bool)] = np.nan
+    eligible = ~np.isnan(scores)
+    scores[~eligible] = -np.inf
+    
+    n_select = min(n, n_cols)
+    if n_select < n_cols:
+        partition = np.argpartition(-scores, n_select - 1, axis=1)[:, :n_select]
+    else:
+        partition = np.broadcast_to(np.arange(n_cols), (n_rows, n_cols))
+    candidate_scores = np.take_along_axis(scores, partition, axis=1)
+    
+    # Order the partitioned candidates by score, then index
+    order = np.lexsort((partition, -candidate_scores), axis=1)
+    top = np.take_along_axis(partition, order, axis=1)
+    
+    # Rows with ties at the cut-off may have kept the wrong tied index;
+    # redo those rows with a stable sort
+    threshold = candidate_scores.min(axis=1)
+    tied = np.flatnonzero(
+        (np.isfinite(threshold)) & ((scores >= threshold[:, None]).sum(axis=1) > n_select)
+    )
+    for row in tied:
+        top[row] = np.argsort(-scores[row], kind='stable')[:n_select]
+    
+    selected = np.take_along_axis(eligible, top, axis=1)
+    result[:, :n_select] = np.where(selected, top, -1)
+    return result
+
+
 def print_recommendations(
     recommendations: List[Tuple], 
     title: str = "Recommendations"
@@ -136,6 +240,58 @@ def print_statistics(stats: dict) -> None:
     print(f"{'='*50}\n")
 
 
+def print_evaluation(results: List[dict]) -> None:
+    """
+    Pretty print model evaluation results.
+    
+    Args:
+        results: Dictionaries from evaluation.evaluate_models
+    """
+    if not results:
+        return
+    k = results[0]['k']
+    print(f"\n{'='*100}")
+    print(f"📏 Model Evaluation ({results[0]['n_test_ratings']} held-out ratings, "
+          f"{results[0]['n_test_users']} users)")
+    print(f"{'='*100}")
+    print(f"{'Model':<9} {'RMSE':>7} {'MAE':>7} {'P@' + str(k):>7} {'R@' + str(k):>7} {'NDCG@' + str(k):>8} "
+          f"{'Cover':>6} {'Build s':>8} {'Pred/s':>10} {'Users/s':>10}")
+    print(f"{'-'*9} {'-'*7} {'-'*7} {'-'*7} {'-'*7} {'-'*8} {'-'*6} {'-'*8} {'-'*10} {'-'*10}")
+    for row in results:
+        print(f"{row['model']:<9} {row['rmse']:>7.4f} {row['mae']:>7.4f} {row['precision']:>7.4f} "
+              f"{row['recall']:>7.4f} {row['ndcg']:>8.4f} {row['coverage']:>6.1%} {row['build_seconds']:>8.3f} "
+              f"{row['predictions_per_second']:>10.0f} {row['users_per_second']:>10.0f}")
+    print(f"{'='*100}\n")
+
+
+def print_profile(timings: List[dict], counters: List[dict], wall_seconds: float) -> None:
+    """
+    Pretty print a breakdown of the timed stages of a run.
+    
+    Stages can be nested (e.g. recommend_users includes predict_user), so
+    their totals may add up to more than the wall time.
+    
+    Args:
+        timings: Histogram summaries from MetricsRegistry.summary
+        counters: Counters from MetricsRegistry.counters
+        wall_seconds: Elapsed time of the whole run
+    """
+    print(f"\n{'='*80}")
+    print(f"⏱️  Profile ({wall_seconds:.3f}s wall time)")
+    print(f"{'='*80}")
+    print(f"{'Stage':<32} {'Calls':>7} {'Total s':>10} {'% wall':>7} {'Mean ms':>10} {'Max ms':>10}")
+    print(f"{'-'*32} {'-'*7} {'-'*10} {'-'*7} {'-'*10} {'-'*10}")
+    for row in timings:
+        name = ', '.join(str(value) for value in row['labels'].values()) or row['name']
+        share = row['total'] / wall_seconds if wall_seconds else 0.0
+        print(f"{name:<32} {row['count']:>7} {row['total']:>10.3f} {share:>7.1%} "
+              f"{row['mean'] * 1000:>10.2f} {row['max'] * 1000:>10.2f}")
+    for row in counters:
+        labels = ', '.join(f"{key}={value}" for key, value in row['labels'].items())
+        print(f"{row['name']}{f' ({labels})' if labels else ''}: {row['value']:g}")
+    print(f"{'='*80}\n")
+
+
 def format_genres(genres: str) -> List[str]:
     """
     Convert pipe-separated genre string to list.